@@ -0,0 +1,69 @@
+# artifacts.py
+
+"""
+Optional, asynchronous persistence of per-evaluation artifacts.
+
+The serving path keeps every artifact (output.json, credential.json, the QR
+code, the chart) as in-memory bytes. If ARTIFACTS_DIR is set, `persist`
+hands them to a background writer that stores them under
+`ARTIFACTS_DIR/<request_id>/`, so concurrent sessions never share a file
+and no request waits on disk I/O.
+"""
+
+import json
+import logging
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+load_dotenv()
+ARTIFACTS_DIR = os.getenv("ARTIFACTS_DIR")
+
+logger = logging.getLogger(__name__)
+
+_writer = ThreadPoolExecutor(max_workers=2, thread_name_prefix="artifacts")
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex
+
+
+def json_bytes(obj) -> bytes:
+    return json.dumps(obj, indent=4).encode()
+
+
+def _write(directory: str, artifacts: dict):
+    os.makedirs(directory, exist_ok=True)
+    for name, data in artifacts.items():
+        path = os.path.join(directory, name)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+
+def _report(future):
+    if future.exception() is not None:
+        logger.warning("⚠️ Could not persist artifacts: %s", future.exception())
+
+
+def persist(request_id: str, artifacts: dict, base_dir: str = None):
+    """
+    Write `{filename: bytes}` to `<base_dir>/<request_id>/` in the background.
+
+    Args:
+        request_id (str): Per-evaluation directory name (see `new_request_id`).
+        artifacts (dict): File name → bytes.
+        base_dir (str): Root directory (default: ARTIFACTS_DIR; persistence is off if unset).
+
+    Returns:
+        Future or None: None when persistence is disabled.
+    """
+    base_dir = base_dir or ARTIFACTS_DIR
+    if not base_dir:
+        return None
+    future = _writer.submit(_write, os.path.join(base_dir, request_id), dict(artifacts))
+    future.add_done_callback(_report)
+    return future
@@ -0,0 +1,109 @@
+# benchmarks/bench_address_index.py
+
+"""
+Benchmark the mmap'd AddressIndex against a Python set of hex strings.
+
+    python -m benchmarks.bench_address_index --sizes 1000000 10000000
+
+For each size it reports build time (text list → compiled index), load time
+of the compiled index, index file size, resident memory growth, and lookups
+per second for hits and misses. `--compare-set` also measures a plain
+`set(str)` (expect ~1.2 GB at 10M entries).
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import tempfile
+import time
+
+from address_index import AddressIndex, WatchedAddressIndex
+
+
+def _rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+def _random_addresses(n: int, seed: int):
+    rng = random.Random(seed)
+    return ["0x" + rng.getrandbits(160).to_bytes(20, "big").hex() for _ in range(n)]
+
+
+def _lookups_per_second(container, probes) -> float:
+    start = time.perf_counter()
+    for p in probes:
+        p in container
+    return len(probes) / (time.perf_counter() - start)
+
+
+def bench(size: int, workdir: str, probes: int, compare_set: bool, bloom_fp_rate: float) -> dict:
+    source = os.path.join(workdir, f"list_{size}.txt")
+    addresses = _random_addresses(size, seed=size)
+    with open(source, "w") as f:
+        f.write("\n".join(addresses))
+    hits = random.Random(1).sample(addresses, min(probes, size))
+    misses = _random_addresses(probes, seed=-size)
+    del addresses
+    gc.collect()
+
+    watched = WatchedAddressIndex(source, cache_dir=workdir, bloom_fp_rate=bloom_fp_rate)
+    start = time.perf_counter()
+    index = watched.current()
+    build_s = time.perf_counter() - start
+    index_path = watched._index_path()
+    del index, watched
+    gc.collect()
+
+    rss_before = _rss_bytes()
+    start = time.perf_counter()
+    index = AddressIndex.load(index_path)
+    load_s = time.perf_counter() - start
+    hit_rate = _lookups_per_second(index, hits)
+    miss_rate = _lookups_per_second(index, misses)
+    rss_after = _rss_bytes()
+
+    result = {
+        "entries": len(index),
+        "build_seconds": round(build_s, 2),
+        "load_seconds": round(load_s, 4),
+        "index_file_mb": round(os.path.getsize(index_path) / 1e6, 1),
+        "rss_growth_mb_after_lookups": round((rss_after - rss_before) / 1e6, 1),
+        "hit_lookups_per_second": int(hit_rate),
+        "miss_lookups_per_second": int(miss_rate),
+    }
+
+    if compare_set:
+        gc.collect()
+        rss_before = _rss_bytes()
+        start = time.perf_counter()
+        with open(source) as f:
+            plain = set(line.strip().lower() for line in f)
+        result["set_build_seconds"] = round(time.perf_counter() - start, 2)
+        result["set_rss_mb"] = round((_rss_bytes() - rss_before) / 1e6, 1)
+        result["set_hit_lookups_per_second"] = int(_lookups_per_second(plain, [h.lower() for h in hits]))
+        del plain
+        gc.collect()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the address index.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    parser.add_argument("--probes", type=int, default=200_000)
+    parser.add_argument("--compare-set", action="store_true")
+    parser.add_argument("--bloom", type=float, default=None, help="Bloom false-positive rate (default: no Bloom)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        report = {str(size): bench(size, workdir, args.probes, args.compare_set, args.bloom) for size in args.sizes}
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main()
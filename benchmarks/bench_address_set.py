@@ -0,0 +1,143 @@
+# benchmarks/bench_address_set.py
+
+"""
+CompactAddressSet vs. a Python set of hex strings, for per-wallet
+counterparty sets.
+
+    python -m benchmarks.bench_address_set --sizes 10000 100000 --cohort 20
+
+For each size n (counterparties of one wallet) it reports:
+
+- memory: tracemalloc bytes held by the finished set, per address
+- build: adding n addresses one at a time (what `WalletAggregate.apply` does)
+- lookups per second for hits and misses
+- union / intersection / difference of two n-sized sets with 50% overlap
+- cohort: union and intersection across `--cohort` wallets
+- serialization: the old JSON hex list vs. `to_bytes()` (size, dump, load)
+"""
+
+import argparse
+import gc
+import json
+import random
+import time
+import tracemalloc
+
+from address_index import CompactAddressSet
+
+
+def _addresses(n: int, rng: random.Random) -> list:
+    return ["0x" + rng.getrandbits(160).to_bytes(20, "big").hex() for _ in range(n)]
+
+
+def _ms(fn, repeat: int = 3) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return round(best * 1000, 3)
+
+
+def _held_bytes(build) -> int:
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    obj = build()
+    held = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    del obj
+    return held
+
+
+def _build_set(addresses):
+    s = set()
+    for a in addresses:
+        s.add(a.lower())
+    return s
+
+
+def _build_compact(addresses):
+    s = CompactAddressSet()
+    for a in addresses:
+        s.add(a)
+    len(s)  # merge the pending adds
+    return s
+
+
+def bench(n: int, cohort: int, probes: int) -> dict:
+    rng = random.Random(n)
+    pool = _addresses(2 * n, rng)
+    CompactAddressSet(pool[:2]) | CompactAddressSet(pool[2:4])  # import NumPy outside the measurements
+    a_list, b_list = pool[:n], pool[n // 2:n // 2 + n]  # 50% overlap
+    # `.lower()` makes fresh strings, as the old fetch path did for every `to` field
+    py_bytes = _held_bytes(lambda: _build_set(a_list))
+    compact_bytes = _held_bytes(lambda: _build_compact(a_list))
+
+    py_a, py_b = set(a_list), set(b_list)
+    ca, cb = CompactAddressSet(a_list), CompactAddressSet(b_list)
+    hits = rng.sample(a_list, min(probes, n))
+    misses = _addresses(probes, rng)
+
+    def lookups(container, keys):
+        start = time.perf_counter()
+        for k in keys:
+            k in container
+        return int(len(keys) / (time.perf_counter() - start))
+
+    members = [rng.sample(pool, n) for _ in range(cohort)]
+    py_cohort = [set(m) for m in members]
+    compact_cohort = [CompactAddressSet(m) for m in members]
+    del members
+
+    json_blob = json.dumps(sorted(py_a))
+    binary_blob = ca.to_bytes()
+    return {
+        "memory_bytes_per_address": {
+            "set_str": round(py_bytes / n, 1),
+            "compact": round(compact_bytes / n, 1),
+        },
+        "build_ms": {"set_str": _ms(lambda: _build_set(a_list)), "compact": _ms(lambda: _build_compact(a_list))},
+        "lookups_per_second": {
+            "set_str": {"hit": lookups(py_a, hits), "miss": lookups(py_a, misses)},
+            "compact": {"hit": lookups(ca, hits), "miss": lookups(ca, misses)},
+        },
+        "pair_ops_ms": {
+            "set_str": {"union": _ms(lambda: py_a | py_b), "intersection": _ms(lambda: py_a & py_b),
+                        "difference": _ms(lambda: py_a - py_b)},
+            "compact": {"union": _ms(lambda: ca | cb), "intersection": _ms(lambda: ca & cb),
+                        "difference": _ms(lambda: ca - cb)},
+        },
+        "cohort_ms": {
+            "wallets": cohort,
+            "set_str": {"union": _ms(lambda: set().union(*py_cohort)),
+                        "intersection": _ms(lambda: set.intersection(*py_cohort))},
+            "compact": {"union": _ms(lambda: CompactAddressSet.union_all(compact_cohort)),
+                        "intersection": _ms(lambda: CompactAddressSet.intersection_all(compact_cohort))},
+        },
+        "serialization": {
+            "json_bytes": len(json_blob),
+            "binary_bytes": len(binary_blob),
+            "json_dump_ms": _ms(lambda: json.dumps(sorted(py_a))),
+            "binary_dump_ms": _ms(ca.to_bytes),
+            "json_load_ms": _ms(lambda: CompactAddressSet(json.loads(json_blob))),
+            "binary_load_ms": _ms(lambda: CompactAddressSet.from_bytes(binary_blob)),
+        },
+        "same_results": (set(ca | cb) == py_a | py_b and set(ca & cb) == py_a & py_b
+                         and set(CompactAddressSet.intersection_all(compact_cohort)) == set.intersection(*py_cohort)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CompactAddressSet against set(str).")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--cohort", type=int, default=20, help="Wallets in the cohort union/intersection")
+    parser.add_argument("--probes", type=int, default=100_000)
+    args = parser.parse_args()
+    report = {str(n): bench(n, args.cohort, args.probes) for n in args.sizes}
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# benchmarks/bench_charts.py
+
+"""
+Chart render cost per evaluation.
+
+    python -m benchmarks.bench_charts --renders 200
+
+Compares the previous approach (new figure + tight_layout + PNG per call)
+with the prebuilt templates (uncached renders), memoized renders (cache
+hits), SVG output and Vega-Lite specs. Reports milliseconds per chart.
+"""
+
+import argparse
+import io
+import json
+import random
+import time
+
+from matplotlib.figure import Figure
+
+import visualizer
+
+
+def _fresh_activity(tx_count, unique_contracts, risk_level):
+    fig = Figure(figsize=(5, 3.5))
+    ax = fig.subplots()
+    values = [tx_count, unique_contracts]
+    bars = ax.bar(["Transactions", "Unique Contracts"], values, color=["skyblue", "lightgreen"], width=0.4,
+                  edgecolor="black")
+    for bar in bars:
+        height = bar.get_height()
+        ax.annotate(f"{int(height)}", xy=(bar.get_x() + bar.get_width() / 2, height), xytext=(0, 3),
+                    textcoords="offset points", ha='center', va='bottom', fontsize=10)
+    ax.set_ylim(0, max(values) + 5)
+    ax.set_title(f"Wallet Activity Overview (Risk: {risk_level.upper()})")
+    ax.set_ylabel("Count")
+    ax.grid(axis="y", linestyle="--", alpha=0.6)
+    fig.tight_layout()
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png")
+    return buf.getvalue()
+
+
+def _fresh_score(score, color):
+    fig = Figure()
+    ax = fig.subplots()
+    bars = ax.bar(["Trust Score"], [score], color=color)
+    ax.set_ylim(0, 100)
+    ax.bar_label(bars)
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png")
+    return buf.getvalue()
+
+
+def _ms_per_call(fn, inputs) -> float:
+    start = time.perf_counter()
+    for args in inputs:
+        fn(*args)
+    return round((time.perf_counter() - start) * 1000 / len(inputs), 4)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark chart rendering.")
+    parser.add_argument("--renders", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    risks = ["low", "medium", "high"]
+    activity = [(rng.randint(0, 5000), rng.randint(0, 300), rng.choice(risks)) for _ in range(args.renders)]
+    scores = [(rng.randint(0, 1000) / 10, rng.choice(["green", "orange", "red"])) for _ in range(args.renders)]
+
+    visualizer.visualize_wallet_analysis(1, 1, "low")  # build templates outside the timings
+    visualizer.render_score_chart(1, "green")
+    visualizer.chart_cache.clear()
+
+    report = {
+        "activity_fresh_figure_ms": _ms_per_call(_fresh_activity, activity),
+        "activity_template_ms": _ms_per_call(visualizer.visualize_wallet_analysis, activity),
+        "activity_cached_ms": _ms_per_call(visualizer.visualize_wallet_analysis, activity),
+        "score_fresh_figure_ms": _ms_per_call(_fresh_score, scores),
+        "score_template_ms": _ms_per_call(visualizer.render_score_chart, scores),
+        "score_cached_ms": _ms_per_call(visualizer.render_score_chart, scores),
+        "activity_svg_ms": _ms_per_call(lambda *a: visualizer.visualize_wallet_analysis(*a, fmt="svg"), activity),
+        "activity_spec_ms": _ms_per_call(lambda *a: visualizer.visualize_wallet_analysis(*a, fmt="spec"), activity),
+        "png_bytes": len(visualizer.visualize_wallet_analysis(*activity[0])),
+        "spec_bytes": len(json.dumps(visualizer.visualize_wallet_analysis(*activity[0], fmt="spec"))),
+        "cache": visualizer.chart_cache.stats(),
+    }
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# benchmarks/bench_did.py
+
+"""
+DID resolution latency: uncached vs. cached, one-by-one vs. batched.
+
+    python -m benchmarks.bench_did --wallets 500 --with-history 20 --rpc-latency-ms 50
+
+Runs against the in-process chain (benchmarks/local_chain.py) served over
+HTTP JSON-RPC, with the EthereumDIDRegistry stand-in and `--rpc-latency-ms`
+added per HTTP request to mimic a remote node. `--with-history`
+identities get `--changes` registry updates each (delegates, a service
+attribute, a public key), so their resolution walks that many blocks of
+events; the rest are plain addresses with the implicit document. Reports,
+per DID: uncached resolution one at a time, uncached `resolve_many`, cached
+lookups, did:key decoding, and the JSON-RPC (HTTP) requests sent.
+"""
+
+import argparse
+import json
+import random
+import time
+
+from verify_did import DIDResolver, resolve_did_key
+
+ISSUER_KEY = "did:key:z6Mkr7AQExaFpEomuhBbi1pjpEvy2YbWoFSDovro2jCNfkTh"
+
+
+def _setup_identities(chain, count: int, changes: int) -> list:
+    """Create `count` funded accounts, each with `changes` registry updates."""
+    w3 = chain.w3
+    registry = chain.did_registry
+    funder = w3.eth.accounts[0]
+    identities = []
+    for i in range(count):
+        key = "0x" + random.Random(i).getrandbits(256).to_bytes(32, "big").hex()
+        address = chain.tester.add_account(key)
+        w3.eth.send_transaction({"from": funder, "to": address, "value": 10 ** 18})
+        for n in range(changes):
+            if n % 3 == 0:
+                registry.functions.addDelegate(address, b"veriKey".ljust(32, b"\0"), funder, 86400).transact(
+                    {"from": address})
+            elif n % 3 == 1:
+                registry.functions.setAttribute(address, b"did/svc/TrustScore".ljust(32, b"\0"),
+                                                f"https://example.org/{i}".encode(), 86400).transact({"from": address})
+            else:
+                registry.functions.setAttribute(address, b"did/pub/Ed25519/veriKey/base58".ljust(32, b"\0"),
+                                                bytes(range(32)), 86400).transact({"from": address})
+        identities.append(address)
+    return identities
+
+
+def _per_did_ms(fn, items) -> float:
+    start = time.perf_counter()
+    fn(items)
+    return round((time.perf_counter() - start) * 1000 / len(items), 4)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark DID resolution.")
+    parser.add_argument("--wallets", type=int, default=500, help="Plain addresses (no registry history)")
+    parser.add_argument("--with-history", type=int, default=20, help="Identities with registry history")
+    parser.add_argument("--changes", type=int, default=3, help="Registry updates per identity")
+    parser.add_argument("--max-batch", type=int, default=100)
+    parser.add_argument("--rpc-latency-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    from benchmarks.local_chain import start_local_chain
+
+    chain = start_local_chain()
+    chain.serve_http(latency=args.rpc_latency_ms / 1000)
+    registry = chain.did_registry.address
+    with_history = _setup_identities(chain, args.with_history, args.changes)
+    rng = random.Random(7)
+    plain = ["0x" + rng.getrandbits(160).to_bytes(20, "big").hex() for _ in range(args.wallets)]
+
+    def resolver():
+        return DIDResolver(chain.rpc_url, registry=registry, network="mainnet", chain_id=1,
+                           max_batch=args.max_batch)
+
+    report = {"rpc_latency_ms": args.rpc_latency_ms, "wallets": args.wallets,
+              "with_history": args.with_history, "changes_each": args.changes}
+    for label, wallets in (("history", with_history), ("plain", plain)):
+        one = resolver()
+        dids = [one.ethr_did(w) for w in wallets]
+        sequential_ms = _per_did_ms(lambda ds: [one.resolve(d) for d in ds], dids)
+        sequential_requests = one.stats()["rpc_requests"]
+        cached_ms = _per_did_ms(lambda ds: [one.resolve(d) for d in ds], dids)
+
+        batched = resolver()
+        results = {}
+        batched_ms = _per_did_ms(lambda ds: results.update(batched.resolve_many(ds)), dids)
+        report[label] = {
+            "uncached_sequential_ms": sequential_ms,
+            "uncached_sequential_rpc_requests": sequential_requests,
+            "uncached_batched_ms": batched_ms,
+            "uncached_batched_rpc_requests": batched.stats()["rpc_requests"],
+            "cached_us": round(cached_ms * 1000, 2),
+            "resolved": sum(r["didDocument"] is not None for r in results.values()),
+            "versioned": sum("versionId" in r["didDocumentMetadata"] for r in results.values()),
+        }
+    if with_history:
+        sample = resolver().resolve(resolver().ethr_did(with_history[0]))["didDocument"]
+        report["history"]["sample_methods"] = len(sample["verificationMethod"])
+        report["history"]["sample_services"] = len(sample.get("service", []))
+
+    keys = resolver()
+    report["did_key"] = {
+        "decode_us": round(_per_did_ms(lambda ds: [resolve_did_key(d) for d in ds], [ISSUER_KEY] * 1000) * 1000, 2),
+        "cached_us": round(_per_did_ms(lambda ds: [keys.resolve(d) for d in ds], [ISSUER_KEY] * 1000) * 1000, 2),
+    }
+    chain.stop()
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main()
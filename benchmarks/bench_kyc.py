@@ -0,0 +1,128 @@
+# benchmarks/bench_kyc.py
+
+"""
+KYC allowlist providers: lookup latency and memory per million entries.
+
+    python -m benchmarks.bench_kyc --sizes 1000000
+    python -m benchmarks.bench_kyc --sizes 1000000 --http-latency-ms 20
+
+For each size it builds the allowlist file, then reports for the file
+(mmap'd AddressIndex) and SQLite providers: build/import time, on-disk size,
+resident memory growth, single-lookup latency and `check_many` throughput.
+The previous implementation (a Python list, lowercased on every call) is
+timed on a handful of probes for comparison. The HTTP provider is measured
+once against benchmarks/fake_passport.py, cold and cached.
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.bench_address_index import _random_addresses, _rss_bytes
+from zk_kyc_checker import FileKYCProvider, HTTPKYCProvider, SQLiteKYCProvider
+
+
+def _single_us(provider, probes) -> float:
+    start = time.perf_counter()
+    for p in probes:
+        provider.contains(p)
+    return round((time.perf_counter() - start) * 1e6 / len(probes), 2)
+
+
+def _batch_per_second(provider, probes) -> int:
+    start = time.perf_counter()
+    provider.check_many(probes)
+    return int(len(probes) / (time.perf_counter() - start))
+
+
+def bench(size: int, workdir: str, probes: int) -> dict:
+    source = os.path.join(workdir, f"kyc_{size}.txt")
+    addresses = _random_addresses(size, seed=size)
+    with open(source, "w") as f:
+        f.write("\n".join(addresses))
+    rng = random.Random(1)
+    mixed = rng.sample(addresses, probes // 2) + _random_addresses(probes - probes // 2, seed=-size)
+    rng.shuffle(mixed)
+
+    legacy = addresses
+    start = time.perf_counter()
+    for p in mixed[:20]:
+        p.lower() in [a.lower() for a in legacy]
+    legacy_ms = round((time.perf_counter() - start) * 1000 / 20, 1)
+    del legacy, addresses
+    gc.collect()
+
+    report = {"legacy_list_lookup_ms": legacy_ms}
+
+    rss_before = _rss_bytes()
+    start = time.perf_counter()
+    file_provider = FileKYCProvider(source, cache_dir=workdir)
+    file_provider.index.current()
+    build_s = time.perf_counter() - start
+    report["file"] = {
+        "build_seconds": round(build_s, 2),
+        "index_mb": round(os.path.getsize(file_provider.index._index_path()) / 1e6, 1),
+        "lookup_us": _single_us(file_provider, mixed),
+        "check_many_per_second": _batch_per_second(file_provider, mixed),
+        "rss_growth_mb": round((_rss_bytes() - rss_before) / 1e6, 1),
+    }
+    del file_provider
+    gc.collect()
+
+    db_path = os.path.join(workdir, f"kyc_{size}.sqlite")
+    rss_before = _rss_bytes()
+    start = time.perf_counter()
+    sqlite_provider = SQLiteKYCProvider(db_path)
+    sqlite_provider.import_file(source)
+    import_s = time.perf_counter() - start
+    report["sqlite"] = {
+        "import_seconds": round(import_s, 2),
+        "db_mb": round(os.path.getsize(db_path) / 1e6, 1),
+        "lookup_us": _single_us(sqlite_provider, mixed),
+        "check_many_per_second": _batch_per_second(sqlite_provider, mixed),
+        "rss_growth_mb": round((_rss_bytes() - rss_before) / 1e6, 1),
+    }
+    return report
+
+
+def bench_http(probes: int, latency_ms: float) -> dict:
+    from benchmarks.fake_passport import start_server
+
+    server, state, url = start_server(latency=latency_ms / 1000)
+    wallets = _random_addresses(probes, seed=7)
+    provider = HTTPKYCProvider(url, ttl=3600, workers=16)
+    try:
+        start = time.perf_counter()
+        cold = provider.check_many(wallets)
+        cold_rate = len(wallets) / (time.perf_counter() - start)
+        return {
+            "latency_ms": latency_ms,
+            "cold_check_many_per_second": int(cold_rate),
+            "cached_lookup_us": _single_us(provider, wallets),
+            "api_requests": state.requests,
+            "passed": sum(cold.values()),
+        }
+    finally:
+        server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark KYC allowlist providers.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000_000])
+    parser.add_argument("--probes", type=int, default=100_000)
+    parser.add_argument("--http-probes", type=int, default=2_000)
+    parser.add_argument("--http-latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        report = {str(size): bench(size, workdir, args.probes) for size in args.sizes}
+    report["http"] = bench_http(args.http_probes, args.http_latency_ms)
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# benchmarks/bench_merkle.py
+
+"""
+Merkle anchoring benchmark.
+
+    python -m benchmarks.bench_merkle --sizes 10000 100000 1000000
+    python -m benchmarks.bench_merkle --sizes 10000 --chain 200
+
+For each size: tree build time, proof generation and verification rates,
+and proof size. `--chain N` also runs end to end against the in-process
+chain (benchmarks/local_chain.py): N credentials registered one by one vs.
+anchored as one Merkle batch, comparing transactions and gas, then checks
+every proof with `AnchorVerifier`.
+"""
+
+import argparse
+import json
+import random
+import time
+
+from merkle_anchor import AnchorBatcher, AnchorVerifier, MerkleTree, verify_proof
+
+
+def _vc_hashes(n: int, seed: int):
+    rng = random.Random(seed)
+    return ["0x" + rng.getrandbits(256).to_bytes(32, "big").hex() for _ in range(n)]
+
+
+def bench_tree(size: int, samples: int) -> dict:
+    hashes = _vc_hashes(size, seed=size)
+    start = time.perf_counter()
+    tree = MerkleTree(hashes)
+    build_s = time.perf_counter() - start
+
+    indexes = random.Random(1).sample(range(size), min(samples, size))
+    start = time.perf_counter()
+    proofs = [tree.proof(i) for i in indexes]
+    proof_rate = len(indexes) / (time.perf_counter() - start)
+
+    root = "0x" + tree.root.hex()
+    start = time.perf_counter()
+    ok = all(verify_proof(hashes[i], proof, root) for i, proof in zip(indexes, proofs))
+    verify_rate = len(indexes) / (time.perf_counter() - start)
+
+    return {
+        "build_seconds": round(build_s, 3),
+        "leaves_per_second": int(size / build_s),
+        "proofs_per_second": int(proof_rate),
+        "verifications_per_second": int(verify_rate),
+        "proof_steps": len(proofs[0]),
+        "proof_json_bytes": len(json.dumps(proofs[0])),
+        "all_verified": ok,
+    }
+
+
+def bench_chain(n: int) -> dict:
+    from benchmarks.local_chain import start_local_chain
+    from vc_registration import RegistrationService
+
+    chain = start_local_chain()
+    w3 = chain.w3
+    service = RegistrationService(w3, chain.contract, chain.private_key, poll_interval=0.1)
+
+    direct = [service.submit(h, 50) for h in _vc_hashes(n, seed=1)]
+    for reg in direct:
+        service.wait(reg.vc_hash, timeout=30)
+    direct_gas = sum(w3.eth.get_transaction_receipt(r.tx_hash)["gasUsed"] for r in direct)
+
+    batcher = AnchorBatcher(service, max_batch=n, max_wait=3600)
+    hashes = _vc_hashes(n, seed=2)
+    start = time.perf_counter()
+    tickets = [batcher.add(h) for h in hashes]
+    for ticket in tickets:
+        ticket.wait(timeout=30)
+    service.wait(tickets[0].registration.vc_hash, timeout=30)
+    anchor_s = time.perf_counter() - start
+    anchored_gas = w3.eth.get_transaction_receipt(tickets[0].registration.tx_hash)["gasUsed"]
+
+    verifier = AnchorVerifier(w3, chain.contract, service.account.address)
+    start = time.perf_counter()
+    verified = sum(verifier.verify(t.vc_hash, t.receipt()) for t in tickets)
+    verify_s = time.perf_counter() - start
+    forged = verifier.verify("0x" + "ab" * 32, dict(tickets[0].receipt(), vc_hash="0x" + "ab" * 32))
+
+    batcher.stop()
+    service.stop()
+    return {
+        "credentials": n,
+        "direct_transactions": len(direct),
+        "direct_total_gas": direct_gas,
+        "anchored_transactions": batcher.batches_sent,
+        "anchored_total_gas": anchored_gas,
+        "anchor_seconds": round(anchor_s, 3),
+        "verified": verified,
+        "verify_seconds": round(verify_s, 3),
+        "forged_proof_accepted": forged,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Merkle anchoring.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--samples", type=int, default=10_000, help="Proofs generated/verified per size")
+    parser.add_argument("--chain", type=int, default=0, help="Credentials for the end-to-end local chain run")
+    args = parser.parse_args()
+
+    report = {str(size): bench_tree(size, args.samples) for size in args.sizes}
+    if args.chain:
+        report["local_chain"] = bench_chain(args.chain)
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# benchmarks/bench_signing.py
+
+"""
+VC signing/verification throughput.
+
+    python -m benchmarks.bench_signing --count 20000 --workers 1 2 4
+
+Reports canonical hashes, signatures and verifications per second in-process
+(one core), then `sign_many` / `verify_many` for each `--workers` count
+(process pool; chunks are pickled to the workers, so this includes IPC).
+Also checks that tampered credentials and malformed proofs (non-string
+`jws` / `verificationMethod`) are rejected and that the canonical
+hash ignores key order while the previous `json.dumps` hash did not.
+"""
+
+import argparse
+import copy
+import hashlib
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+
+
+def _credentials(n: int) -> list:
+    issued = datetime.utcnow().isoformat() + "Z"
+    return [{
+        "@context": ["https://www.w3.org/2018/credentials/v1"],
+        "type": ["VerifiableCredential", "TrustScoreCredential"],
+        "issuer": "placeholder",
+        "issuanceDate": issued,
+        "credentialSubject": {
+            "id": f"did:ethr:sepolia:0x{i:040x}",
+            "wallet": f"0x{i:040x}",
+            "zk_kyc_passed": i % 2 == 0,
+            "score": float(i % 100),
+            "risk_level": "low",
+            "tx_count": None,
+            "contracts_interacted": None,
+        },
+    } for i in range(n)]
+
+
+def _rate(fn, n: int) -> int:
+    start = time.perf_counter()
+    fn()
+    return int(n / (time.perf_counter() - start))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark VC signing and verification.")
+    parser.add_argument("--count", type=int, default=20_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.environ["VC_ISSUER_KEY_PATH"] = os.path.join(workdir, "issuer.pem")
+        import vc_signer
+
+        vc_signer.VC_ISSUER_KEY_PATH = os.environ["VC_ISSUER_KEY_PATH"]
+        vcs = _credentials(args.count)
+        for vc in vcs:
+            vc["issuer"] = vc_signer.issuer_did()
+        created = vcs[0]["issuanceDate"]
+
+        report = {"count": args.count, "cpu_count": os.cpu_count()}
+        report["canonical_hashes_per_second"] = _rate(lambda: [vc_signer.vc_hash(vc) for vc in vcs], args.count)
+        signed = []
+        report["signatures_per_second"] = _rate(
+            lambda: signed.extend(vc_signer.sign_credential(vc, created) for vc in vcs), args.count)
+        results = []
+        report["verifications_per_second"] = _rate(
+            lambda: results.extend(vc_signer.verify_credential(vc) for vc in signed), args.count)
+        report["all_verified"] = all(results)
+
+        tampered = copy.deepcopy(signed[0])
+        tampered["credentialSubject"]["score"] = 100
+        forged_key = copy.deepcopy(signed[1])
+        forged_key["proof"]["verificationMethod"] = vc_signer.issuer_verification_method().replace("z6Mk", "z6Mm")
+        report["tampered_rejected"] = not vc_signer.verify_credential(tampered)
+        report["wrong_key_rejected"] = not vc_signer.verify_credential(forged_key)
+        malformed = [{**signed[2], "proof": {**signed[2]["proof"], field: 5}} for field in ("jws", "verificationMethod")]
+        report["malformed_proof_rejected"] = not any(vc_signer.verify_credential(vc) for vc in malformed)
+
+        reordered = json.loads(json.dumps(signed[0], sort_keys=True))
+        report["canonical_hash_stable_under_key_order"] = vc_signer.vc_hash(reordered) == vc_signer.vc_hash(signed[0])
+        report["json_dumps_hash_stable_under_key_order"] = (
+            hashlib.sha256(json.dumps(reordered).encode()).hexdigest()
+            == hashlib.sha256(json.dumps(signed[0]).encode()).hexdigest()
+        )
+
+        report["pool"] = {}
+        for workers in args.workers:
+            vc_signer.sign_many(vcs[:workers * 64], created, workers=workers)  # start the workers
+            pool_signed = []
+            sign_rate = _rate(lambda: pool_signed.extend(vc_signer.sign_many(vcs, created, workers=workers)),
+                              args.count)
+            pool_results = []
+            verify_rate = _rate(lambda: pool_results.extend(vc_signer.verify_many(pool_signed, workers=workers)),
+                                args.count)
+            report["pool"][str(workers)] = {
+                "sign_many_per_second": sign_rate,
+                "verify_many_per_second": verify_rate,
+                "all_verified": all(pool_results),
+            }
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# benchmarks/bench_startup.py
+
+"""
+Startup and rerun latency of the Streamlit entry points.
+
+    python -m benchmarks.bench_startup --runs 5
+
+For each app it starts a fresh interpreter and uses Streamlit's AppTest
+harness to measure:
+
+- import_ms: importing streamlit itself (paid once per server process)
+- first_run_ms: the first script run in the process (imports + resource setup)
+- rerun_ms: median of subsequent reruns (what every widget interaction costs)
+
+The RPC endpoint is never contacted on the initial render, so placeholder
+credentials are used when PRIVATE_KEY / VC_REGISTRY_ADDRESS are unset. The
+dashboard's history store goes to a temporary directory.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+_PROBE = r"""
+import json, statistics, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+import_ms = (time.perf_counter() - start) * 1000
+
+app = AppTest.from_file(sys.argv[1], default_timeout=120)
+start = time.perf_counter()
+app.run()
+first_run_ms = (time.perf_counter() - start) * 1000
+if app.exception:
+    raise SystemExit(str(app.exception[0].value))
+
+reruns = []
+for _ in range(int(sys.argv[2])):
+    start = time.perf_counter()
+    app.run()
+    reruns.append((time.perf_counter() - start) * 1000)
+print(json.dumps({"import_ms": round(import_ms, 1), "first_run_ms": round(first_run_ms, 1),
+                  "rerun_ms": round(statistics.median(reruns), 1)}))
+"""
+
+PLACEHOLDER_ENV = {
+    "PRIVATE_KEY": "0x" + "11" * 32,
+    "VC_REGISTRY_ADDRESS": "0x" + "22" * 20,
+    "SEPOLIA_RPC_URL": "http://127.0.0.1:9",
+}
+
+
+def measure(script: str, runs: int) -> dict:
+    env = dict(os.environ)
+    for key, value in PLACEHOLDER_ENV.items():
+        env.setdefault(key, value)
+    with tempfile.TemporaryDirectory() as workdir:
+        env["HISTORY_DB_PATH"] = os.path.join(workdir, "history.sqlite")
+        proc = subprocess.run([sys.executable, "-c", _PROBE, script, str(runs)], env=env,
+                              capture_output=True, text=True)
+    if proc.returncode != 0:
+        return {"error": (proc.stderr or proc.stdout).strip().splitlines()[-1]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Streamlit startup and reruns.")
+    parser.add_argument("--apps", nargs="+", default=["app.py", "agent.py", "dashboard.py"])
+    parser.add_argument("--runs", type=int, default=5, help="Reruns per app")
+    args = parser.parse_args()
+    print(json.dumps({app: measure(app, args.runs) for app in args.apps}, indent=4))
+
+
+if __name__ == "__main__":
+    main()
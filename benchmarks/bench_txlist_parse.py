@@ -0,0 +1,120 @@
+# benchmarks/bench_txlist_parse.py
+
+"""
+Etherscan txlist parsing: whole-body `json` vs. streaming field-selective.
+
+    python -m benchmarks.bench_txlist_parse --txs 150 1000 10000 --repeat 5
+
+For each page size, fetches one txlist page from the fake Etherscan server
+(benchmarks/fake_etherscan.py, run as a subprocess so its serialization does
+not count against this process's memory) and folds it into a
+`WalletAggregate` two ways:
+
+- "json": `EtherscanClient.get_list` (`resp.json()` of the whole body, every
+  tx materialized as a ~20-field dict), then `apply`
+- "stream": `EtherscanClient.iter_list(TX_FIELDS)` fed straight into `apply`
+
+Reports median wall time (loopback HTTP included) and the tracemalloc peak
+of each path, measured in a separate pass so tracing does not skew timings.
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import requests
+
+from benchmarks.fake_etherscan import HEAVY_WALLET, generate_txs
+from etherscan_client import EtherscanClient
+from wallet_sync import TX_FIELDS, WalletAggregate
+
+
+def _wallet(index: int) -> str:
+    return f"0x{0xbe00 + index:040x}"
+
+
+def _params(wallet: str) -> dict:
+    return dict(module="account", action="txlist", address=wallet, startblock=0, endblock=99999999,
+                page=1, offset=10_000, sort="asc")
+
+
+def _start_server(fixtures_dir: str) -> tuple:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    proc = subprocess.Popen([sys.executable, "-m", "benchmarks.fake_etherscan", "--port", str(port),
+                             "--fixtures-dir", fixtures_dir], stdout=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}/api"
+    for _ in range(100):
+        try:
+            requests.get(url, timeout=1)
+            return proc, url
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("fake Etherscan did not start")
+
+
+def _fold(client: EtherscanClient, wallet: str, mode: str) -> WalletAggregate:
+    agg = WalletAggregate(wallet)
+    if mode == "json":
+        agg.apply(client.get_list(**_params(wallet)))
+    else:
+        agg.apply(client.iter_list(TX_FIELDS, **_params(wallet)))
+    return agg
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark txlist parsing paths.")
+    parser.add_argument("--txs", type=int, nargs="+", default=[150, 1000, 10_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    wallets = {n: _wallet(i) for i, n in enumerate(args.txs)}
+    fixtures_dir = tempfile.TemporaryDirectory(prefix="txlist-fixtures-")
+    body_sizes = {}
+    heavy = generate_txs(HEAVY_WALLET, "txlist")
+    for n, wallet in wallets.items():
+        body = json.dumps({"status": "1", "message": "OK", "result": heavy[:n]})
+        body_sizes[n] = len(body)
+        with open(os.path.join(fixtures_dir.name, f"{wallet}.txlist.json"), "w") as f:
+            f.write(body)
+    del heavy, body
+    proc, url = _start_server(fixtures_dir.name)
+    client = EtherscanClient([None], base_url=url, rate_per_key=1_000_000)
+
+    report = {"repeat": args.repeat, "pages": {}}
+    for n, wallet in wallets.items():
+        entry = {"body_bytes": body_sizes[n]}
+        results = {}
+        for mode in ("json", "stream"):
+            _fold(client, wallet, mode)  # warm the connection and the server's tx list
+            times = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                results[mode] = _fold(client, wallet, mode)
+                times.append(time.perf_counter() - start)
+            tracemalloc.start()
+            _fold(client, wallet, mode)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            entry[mode] = {"median_ms": round(statistics.median(times) * 1000, 2),
+                           "peak_kib": round(peak / 1024, 1)}
+        entry["same_aggregate"] = all(
+            getattr(results["json"], f) == getattr(results["stream"], f)
+            for f in ("tx_count", "contracts", "last_block", "boundary_hashes"))
+        report["pages"][str(n)] = entry
+    proc.terminate()
+    fixtures_dir.cleanup()
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main()
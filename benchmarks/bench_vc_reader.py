@@ -0,0 +1,70 @@
+# benchmarks/bench_vc_reader.py
+
+"""
+Compare VCRegistry read throughput: one `getVC().call()` per wallet vs. the
+batched, cached `VCRegistryReader`.
+
+    python -m benchmarks.bench_vc_reader --wallets 2000
+    python -m benchmarks.bench_vc_reader --rpc-url http://127.0.0.1:8545 --registry 0x...
+
+Defaults come from SEPOLIA_RPC_URL / VC_REGISTRY_ADDRESS. Reports calls per
+second for the sequential path, a cold batched read and a warm (cached) read.
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+
+from dotenv import load_dotenv
+from web3 import Web3
+
+from vc_reader import VCRegistryReader
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Benchmark VCRegistry reads.")
+    parser.add_argument("--rpc-url", default=os.getenv("SEPOLIA_RPC_URL"))
+    parser.add_argument("--registry", default=os.getenv("VC_REGISTRY_ADDRESS"))
+    parser.add_argument("--wallets", type=int, default=1000)
+    parser.add_argument("--sequential", type=int, default=100, help="Wallets read one-by-one (slow path)")
+    parser.add_argument("--max-batch", type=int, default=100)
+    args = parser.parse_args()
+
+    with open("VCRegistryABI.json") as f:
+        abi = json.load(f)
+    w3 = Web3(Web3.HTTPProvider(args.rpc_url))
+    contract = w3.eth.contract(address=Web3.to_checksum_address(args.registry), abi=abi)
+    rng = random.Random(0)
+    wallets = [Web3.to_checksum_address("0x" + rng.getrandbits(160).to_bytes(20, "big").hex())
+               for _ in range(args.wallets)]
+
+    start = time.perf_counter()
+    for wallet in wallets[:args.sequential]:
+        contract.functions.getVC(wallet).call()
+    sequential = args.sequential / (time.perf_counter() - start)
+
+    reader = VCRegistryReader(w3, contract, rpc_url=args.rpc_url, max_batch=args.max_batch,
+                              invalidation_interval=3600)
+    start = time.perf_counter()
+    reader.get_many(wallets)
+    cold = len(wallets) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    reader.get_many(wallets)
+    warm = len(wallets) / (time.perf_counter() - start)
+
+    print(json.dumps({
+        "wallets": len(wallets),
+        "max_batch": args.max_batch,
+        "sequential_calls_per_second": round(sequential, 1),
+        "batched_cold_calls_per_second": round(cold, 1),
+        "batched_warm_calls_per_second": round(warm, 1),
+        "http_requests_batched": reader.rpc.requests_sent,
+    }, indent=4))
+
+
+if __name__ == "__main__":
+    main()
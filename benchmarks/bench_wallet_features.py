@@ -0,0 +1,175 @@
+# benchmarks/bench_wallet_features.py
+
+"""
+Cold on-chain feature extraction: the four Etherscan endpoints fetched
+concurrently (`fetch_onchain.get_wallet_data`) vs. one after another.
+
+    python -m benchmarks.bench_wallet_features --wallets 20 --latency-ms 150
+
+The fake Etherscan (benchmarks/fake_etherscan.py) runs as a subprocess with
+`--latency-ms` added to every response. For each fresh wallet it times:
+
+- each endpoint synced alone (txlist, txlistinternal, tokentx, tokennfttx)
+- "sequential": the sum of those, i.e. what fetching them in turn costs
+- "slowest_single": the slowest of those
+- "concurrent": `get_wallet_data` from a reset cursor, merge included
+
+and reports the median of each over `--wallets` wallets, plus the heavy
+fixture wallet (10k normal txs, 2.5k of each other type).
+
+Also checks, with a fake client whose tokentx endpoint fails, that the
+evaluation comes back degraded ("onchain") rather than scoring the failed
+endpoint as empty, and that a first txlist sync that fails mid-stream raises
+without saving the partial history.
+"""
+
+import argparse
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+from benchmarks.fake_etherscan import HEAVY_WALLET
+
+
+def _start_server(latency_ms: float) -> tuple:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    proc = subprocess.Popen([sys.executable, "-m", "benchmarks.fake_etherscan", "--port", str(port),
+                             "--latency-ms", str(latency_ms)], stdout=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}/api"
+    for _ in range(100):
+        try:
+            requests.get(url, timeout=1)
+            return proc, url
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("fake Etherscan did not start")
+
+
+def _ms(start: float) -> float:
+    return (time.perf_counter() - start) * 1000
+
+
+def _measure(wallet: str) -> dict:
+    import fetch_onchain
+    from wallet_sync import WalletAggregate, sync_wallet
+
+    run = {}
+    for action in fetch_onchain.FEATURE_ACTIONS:
+        start = time.perf_counter()
+        sync_wallet(WalletAggregate(wallet, action), fetch_onchain.fetch_list_page(action))
+        run[action] = _ms(start)
+    run["sequential"] = sum(run[a] for a in fetch_onchain.FEATURE_ACTIONS)
+    run["slowest_single"] = max(run[a] for a in fetch_onchain.FEATURE_ACTIONS)
+
+    fetch_onchain.sync_store.reset(wallet)
+    start = time.perf_counter()
+    fetch_onchain.get_wallet_data(wallet, use_cache=False)
+    run["concurrent"] = _ms(start)
+    return run
+
+
+class _FailingClient:
+    """Fake Etherscan client: `failing` actions raise after `rows` rows, the others have no rows."""
+
+    def __init__(self, failing, rows: int = 0):
+        self.failing = failing
+        self.rows = rows
+
+    def iter_list(self, fields, **params):
+        from etherscan_client import EtherscanError
+
+        action = params["action"]
+        if action not in self.failing:
+            return
+        for i in range(self.rows):
+            yield {"blockNumber": str(i + 1), "hash": f"0x{i:064x}", "from": params["address"], "to": "0x" + "ab" * 20}
+        raise EtherscanError(f"{action} unavailable")
+
+
+def _check_failed_endpoint() -> dict:
+    import evaluator
+    import fetch_onchain
+
+    wallet = "0x" + "fe" * 20
+    patched = {"get_client": (fetch_onchain, lambda: _FailingClient({"tokentx"})),
+               "resolve_did": (evaluator, lambda w: {"did": None, "verification_method": None, "vc_issued": False}),
+               "_check_kyc": (evaluator, lambda w: False)}
+    saved = {name: getattr(module, name) for name, (module, _) in patched.items()}
+    for name, (module, fake) in patched.items():
+        setattr(module, name, fake)
+    try:
+        fetch_onchain.sync_store.reset(wallet)
+        result = evaluator.evaluate_wallet(wallet)
+    finally:
+        for name, (module, _) in patched.items():
+            setattr(module, name, saved[name])
+    return {"failed_endpoint_degraded": result["degraded"] == ["onchain"]}
+
+
+def _check_partial_first_sync() -> dict:
+    import fetch_onchain
+    from etherscan_client import EtherscanError
+
+    wallet = "0x" + "fd" * 20
+    get_client = fetch_onchain.get_client
+    fetch_onchain.get_client = lambda: _FailingClient({"txlist"}, rows=3)
+    try:
+        fetch_onchain.sync_store.reset(wallet)
+        fetch_onchain._sync_action(wallet, "txlist")
+        raised = False
+    except EtherscanError:
+        raised = True
+    finally:
+        fetch_onchain.get_client = get_client
+    saved = fetch_onchain.sync_store.load(wallet, "txlist").last_block
+    return {"partial_first_sync_not_saved": raised and saved < 0}
+
+
+def _median(runs: list) -> dict:
+    return {key: round(statistics.median(run[key] for run in runs), 1) for key in runs[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark concurrent vs. sequential endpoint fetches.")
+    parser.add_argument("--wallets", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=150.0)
+    args = parser.parse_args()
+
+    proc, url = _start_server(args.latency_ms)
+    workdir = tempfile.TemporaryDirectory(prefix="features-bench-")
+    os.environ.update({
+        "ETHERSCAN_API_URL": url,
+        "ETHERSCAN_API_KEY": "bench",
+        "ETHERSCAN_RATE_PER_KEY": "100000",
+        "ETHERSCAN_CACHE_PATH": "",
+        "WALLET_SYNC_PATH": os.path.join(workdir.name, "wallet_sync.sqlite"),
+    })
+    try:
+        _measure(HEAVY_WALLET)  # warm connections and the server's fixtures
+        rng = random.Random(22)
+        wallets = ["0x" + rng.getrandbits(160).to_bytes(20, "big").hex() for _ in range(args.wallets)]
+        report = {
+            "latency_ms": args.latency_ms,
+            "random_wallets": _median([_measure(w) for w in wallets]),
+            "heavy_10k": _median([_measure(HEAVY_WALLET) for _ in range(3)]),
+            "checks": {**_check_failed_endpoint(), **_check_partial_first_sync()},
+        }
+    finally:
+        proc.terminate()
+        workdir.cleanup()
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# EthereumDIDRegistry.vy
+#
+# Minimal stand-in for the ERC-1056 EthereumDIDRegistry that did:ethr resolves
+# against (same selectors and events; no meta-transactions),
+# used by benchmarks/local_chain.py. Bytecode/ABI: EthereumDIDRegistry.bin/.json (vyper 0.3.10).
+# @version 0.3.10
+event DIDOwnerChanged:
+    identity: indexed(address)
+    owner: address
+    previousChange: uint256
+
+event DIDDelegateChanged:
+    identity: indexed(address)
+    delegateType: bytes32
+    delegate: address
+    validTo: uint256
+    previousChange: uint256
+
+event DIDAttributeChanged:
+    identity: indexed(address)
+    name: bytes32
+    value: Bytes[1024]
+    validTo: uint256
+    previousChange: uint256
+
+owners: HashMap[address, address]
+delegates: public(HashMap[address, HashMap[bytes32, HashMap[address, uint256]]])
+changed: public(HashMap[address, uint256])
+
+
+@view
+@internal
+def _identityOwner(identity: address) -> address:
+    owner: address = self.owners[identity]
+    if owner != empty(address):
+        return owner
+    return identity
+
+
+@view
+@external
+def identityOwner(identity: address) -> address:
+    return self._identityOwner(identity)
+
+
+@view
+@external
+def validDelegate(identity: address, delegateType: bytes32, delegate: address) -> bool:
+    return self.delegates[identity][delegateType][delegate] > block.timestamp
+
+
+@external
+def changeOwner(identity: address, newOwner: address):
+    assert msg.sender == self._identityOwner(identity), "bad_actor"
+    self.owners[identity] = newOwner
+    log DIDOwnerChanged(identity, newOwner, self.changed[identity])
+    self.changed[identity] = block.number
+
+
+@external
+def addDelegate(identity: address, delegateType: bytes32, delegate: address, validity: uint256):
+    assert msg.sender == self._identityOwner(identity), "bad_actor"
+    self.delegates[identity][delegateType][delegate] = block.timestamp + validity
+    log DIDDelegateChanged(identity, delegateType, delegate, block.timestamp + validity, self.changed[identity])
+    self.changed[identity] = block.number
+
+
+@external
+def revokeDelegate(identity: address, delegateType: bytes32, delegate: address):
+    assert msg.sender == self._identityOwner(identity), "bad_actor"
+    self.delegates[identity][delegateType][delegate] = block.timestamp
+    log DIDDelegateChanged(identity, delegateType, delegate, block.timestamp, self.changed[identity])
+    self.changed[identity] = block.number
+
+
+@external
+def setAttribute(identity: address, name: bytes32, attrValue: Bytes[1024], validity: uint256):
+    assert msg.sender == self._identityOwner(identity), "bad_actor"
+    log DIDAttributeChanged(identity, name, attrValue, block.timestamp + validity, self.changed[identity])
+    self.changed[identity] = block.number
+
+
+@external
+def revokeAttribute(identity: address, name: bytes32, attrValue: Bytes[1024]):
+    assert msg.sender == self._identityOwner(identity), "bad_actor"
+    log DIDAttributeChanged(identity, name, attrValue, 0, self.changed[identity])
+    self.changed[identity] = block.number
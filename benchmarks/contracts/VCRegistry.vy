@@ -0,0 +1,28 @@
+# VCRegistry.vy
+#
+# Minimal stand-in for the deployed Sepolia VCRegistry (same ABI as VCRegistryABI.json),
+# used by benchmarks/local_chain.py. Bytecode: VCRegistry.bin (vyper 0.3.10).
+# @version 0.3.10
+struct VCRecord:
+    vcHash: bytes32
+    score: uint8
+    timestamp: uint256
+
+event VCRegistered:
+    wallet: indexed(address)
+    vcHash: bytes32
+    score: uint8
+    timestamp: uint256
+
+vcRecords: public(HashMap[address, VCRecord])
+
+@external
+def registerVC(vcHash: bytes32, score: uint8, timestamp: uint256):
+    self.vcRecords[msg.sender] = VCRecord({vcHash: vcHash, score: score, timestamp: timestamp})
+    log VCRegistered(msg.sender, vcHash, score, timestamp)
+
+@external
+@view
+def getVC(wallet: address) -> (bytes32, uint8, uint256):
+    r: VCRecord = self.vcRecords[wallet]
+    return r.vcHash, r.score, r.timestamp
@@ -0,0 +1,234 @@
+# benchmarks/fake_etherscan.py
+
+"""
+Local stand-in for the Etherscan account API.
+
+Serves deterministic, Etherscan-shaped tx lists so the fetch path can be
+exercised and benchmarked offline:
+
+    python -m benchmarks.fake_etherscan --port 8650 --rate 5 --latency-ms 40
+    ETHERSCAN_API_URL=http://127.0.0.1:8650/api streamlit run app.py
+
+Supported: module=account, action=txlist|txlistinternal|tokentx|tokennfttx with
+startblock/endblock/page/offset/sort (token and NFT rows carry a token
+`contractAddress` and `logIndex`, internal rows a `traceId`). Per-key rate limits answer with the same
+in-body "Max rate limit reached" error Etherscan uses.
+
+Recorded tx lists can replace the generated ones: `fixtures_dir` /
+`--fixtures-dir` serves `<address>.<action>.json` (a tx list or a full
+Etherscan response) when present. `--save-fixtures DIR` writes the built-in
+fixture wallets in that layout.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Well-known fixture wallets; any other address gets 0-299 txs derived from its hash.
+EMPTY_WALLET = "0x00000000000000000000000000000000000000e0"
+TYPICAL_WALLET = "0x00000000000000000000000000000000000000a1"
+HEAVY_WALLET = "0x00000000000000000000000000000000000000f1"
+FIXTURE_TX_COUNTS = {EMPTY_WALLET: 0, TYPICAL_WALLET: 150, HEAVY_WALLET: 10_000}
+
+RISKY_CONTRACT = "0x111111111111111111111111111111111111dead"
+ACTIONS = ("txlist", "txlistinternal", "tokentx", "tokennfttx")
+MAX_WINDOW = 10_000
+
+
+def _digest(*parts) -> bytes:
+    return hashlib.sha256("|".join(str(p) for p in parts).encode()).digest()
+
+
+def tx_count_for(address: str, action: str = "txlist") -> int:
+    address = address.lower()
+    if address in FIXTURE_TX_COUNTS:
+        count = FIXTURE_TX_COUNTS[address]
+        return count if action == "txlist" else count // 4
+    return int.from_bytes(_digest(address, action)[:2], "big") % (300 if action == "txlist" else 60)
+
+
+def generate_txs(address: str, action: str = "txlist") -> list:
+    """Deterministic ascending tx list for `address` in Etherscan's field layout."""
+    address = address.lower()
+    txs = []
+    block = 17_000_000
+    for i in range(tx_count_for(address, action)):
+        d = _digest(address, action, i)
+        block += d[0] % 3  # several txs can share a block
+        counterparty = "0x" + _digest("contract", d[1] % 40).hex()[:40]
+        if i % 97 == 96 and address != HEAVY_WALLET:
+            counterparty = RISKY_CONTRACT
+        outgoing = d[2] % 4 != 0
+        txs.append({
+            "blockNumber": str(block),
+            "timeStamp": str(1_680_000_000 + block * 12),
+            "hash": "0x" + d.hex(),
+            "nonce": str(i),
+            "blockHash": "0x" + _digest("block", block).hex(),
+            "transactionIndex": str(d[3] % 150),
+            "from": address if outgoing else counterparty,
+            "to": counterparty if outgoing else address,
+            "value": str(int.from_bytes(d[4:12], "big")),
+            "gas": "21000",
+            "gasPrice": str(10_000_000_000 + d[12]),
+            "isError": "0",
+            "txreceipt_status": "1",
+            "input": "0x" + d.hex() * 2,
+            "contractAddress": "",
+            "cumulativeGasUsed": str(21000 * (d[3] % 150 + 1)),
+            "gasUsed": "21000",
+            "confirmations": str(100 + i),
+            "methodId": "0x" + d[:4].hex(),
+            "functionName": "transfer(address _to, uint256 _value)",
+        })
+        if action in ("tokentx", "tokennfttx"):
+            txs[-1].update(contractAddress="0x" + _digest("token", action, d[5] % 20).hex()[:40],
+                           logIndex=str(d[6] % 200))
+        elif action == "txlistinternal":
+            txs[-1].update(traceId=str(d[6] % 4))
+    return txs
+
+
+class FakeEtherscan:
+    """Shared state for the handler: fixtures, per-key rate limiting, latency, counters."""
+
+    def __init__(self, rate_per_key: float = None, latency: float = 0.0, fixtures_dir: str = None):
+        self.rate_per_key = rate_per_key
+        self.latency = latency
+        self.fixtures_dir = fixtures_dir
+        self.requests = 0
+        self.rate_limited = 0
+        self._windows = {}
+        self._fixtures = {}
+        self._lock = threading.Lock()
+
+    def _allow(self, key) -> bool:
+        if not self.rate_per_key:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            window_start, count = self._windows.get(key, (now, 0))
+            if now - window_start >= 1.0:
+                window_start, count = now, 0
+            if count >= self.rate_per_key:
+                return False
+            self._windows[key] = (window_start, count + 1)
+            return True
+
+    def txs(self, address, action):
+        key = (address.lower(), action)
+        with self._lock:
+            if key not in self._fixtures:
+                self._fixtures[key] = self._recorded(*key) or generate_txs(address, action)
+            return self._fixtures[key]
+
+    def _recorded(self, address, action):
+        path = os.path.join(self.fixtures_dir, f"{address}.{action}.json") if self.fixtures_dir else None
+        if path is None or not os.path.exists(path):
+            return None
+        with open(path) as f:
+            data = json.load(f)
+        return data["result"] if isinstance(data, dict) else data
+
+    def handle(self, params: dict) -> dict:
+        with self._lock:
+            self.requests += 1
+        if not self._allow(params.get("apikey")):
+            with self._lock:
+                self.rate_limited += 1
+            return {"status": "0", "message": "NOTOK", "result": "Max rate limit reached"}
+
+        action = params.get("action")
+        if params.get("module") != "account" or action not in ACTIONS:
+            return {"status": "0", "message": "NOTOK", "result": "Error! Missing Or invalid Action name"}
+
+        startblock = int(params.get("startblock", 0))
+        endblock = int(params.get("endblock", 99999999))
+        page = int(params.get("page", 1))
+        offset = int(params.get("offset", MAX_WINDOW))
+        if page * offset > MAX_WINDOW:
+            return {"status": "0", "message": "NOTOK", "result": "Result window is too large, PageNo x Offset size must be less than or equal to 10000"}
+
+        txs = [tx for tx in self.txs(params.get("address", ""), action)
+               if startblock <= int(tx["blockNumber"]) <= endblock]
+        if params.get("sort") == "desc":
+            txs = txs[::-1]
+        txs = txs[(page - 1) * offset: page * offset]
+        if not txs:
+            return {"status": "0", "message": "No transactions found", "result": []}
+        return {"status": "1", "message": "OK", "result": txs}
+
+
+def _make_handler(state: FakeEtherscan):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            params = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+            if state.latency:
+                time.sleep(state.latency)
+            body = json.dumps(state.handle(params)).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def save_fixtures(directory: str):
+    """Write the built-in fixture wallets as `<address>.<action>.json` files."""
+    os.makedirs(directory, exist_ok=True)
+    for address in FIXTURE_TX_COUNTS:
+        for action in ACTIONS:
+            with open(os.path.join(directory, f"{address}.{action}.json"), "w") as f:
+                json.dump(generate_txs(address, action), f)
+
+
+def start_server(port: int = 0, rate_per_key: float = None, latency: float = 0.0, fixtures_dir: str = None):
+    """
+    Start the fake server on a background thread.
+
+    Returns:
+        (server, state, url): call `server.shutdown()` when done.
+    """
+    state = FakeEtherscan(rate_per_key=rate_per_key, latency=latency, fixtures_dir=fixtures_dir)
+    server = ThreadingHTTPServer(("127.0.0.1", port), _make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state, f"http://127.0.0.1:{server.server_address[1]}/api"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local fake Etherscan API.")
+    parser.add_argument("--port", type=int, default=8650)
+    parser.add_argument("--rate", type=float, default=None, help="Requests per second allowed per API key")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--fixtures-dir", help="Serve recorded <address>.<action>.json tx lists from here")
+    parser.add_argument("--save-fixtures", metavar="DIR", help="Write the built-in fixtures to DIR and exit")
+    args = parser.parse_args()
+
+    if args.save_fixtures:
+        save_fixtures(args.save_fixtures)
+        print(f"💾 Fixtures written to {args.save_fixtures}")
+        return
+    server, _, url = start_server(args.port, args.rate, args.latency_ms / 1000, args.fixtures_dir)
+    print(f"🧪 Fake Etherscan listening on {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
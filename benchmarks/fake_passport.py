@@ -0,0 +1,98 @@
+# benchmarks/fake_passport.py
+
+"""
+Local stand-in for a Passport-style scoring API.
+
+    python -m benchmarks.fake_passport --port 8660 --latency-ms 30
+    KYC_PROVIDER=http KYC_API_URL=http://127.0.0.1:8660 streamlit run app.py
+
+`GET /score/<address>` answers `{"address", "score", "passing_score",
+"threshold"}`. Scores are derived from the address hash, so roughly
+`--pass-rate` of addresses pass; addresses in `allowlist` always pass.
+"""
+
+import argparse
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+THRESHOLD = 20.0
+
+
+class FakePassport:
+    def __init__(self, allowlist=(), pass_rate: float = 0.3, latency: float = 0.0):
+        self.allowlist = {a.lower() for a in allowlist}
+        self.pass_rate = pass_rate
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def score(self, address: str) -> dict:
+        address = address.lower()
+        with self._lock:
+            self.requests += 1
+        fraction = int.from_bytes(hashlib.sha256(address.encode()).digest()[:4], "big") / 2 ** 32
+        passing = address in self.allowlist or fraction < self.pass_rate
+        score = round(THRESHOLD + 10 if passing else THRESHOLD * fraction, 2)
+        return {"address": address, "score": score, "passing_score": passing, "threshold": THRESHOLD}
+
+
+def _make_handler(state: FakePassport):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            if state.latency:
+                time.sleep(state.latency)
+            parts = self.path.rstrip("/").split("/")
+            if len(parts) < 2 or parts[-2] != "score":
+                status, payload = 404, {"detail": "Not found"}
+            else:
+                status, payload = 200, state.score(parts[-1])
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def start_server(port: int = 0, allowlist=(), pass_rate: float = 0.3, latency: float = 0.0):
+    """
+    Start the fake API on a background thread.
+
+    Returns:
+        (server, state, url): call `server.shutdown()` when done.
+    """
+    state = FakePassport(allowlist, pass_rate, latency)
+    server = ThreadingHTTPServer(("127.0.0.1", port), _make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local fake Passport scoring API.")
+    parser.add_argument("--port", type=int, default=8660)
+    parser.add_argument("--pass-rate", type=float, default=0.3)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server, _, url = start_server(args.port, pass_rate=args.pass_rate, latency=args.latency_ms / 1000)
+    print(f"🧪 Fake Passport API listening on {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
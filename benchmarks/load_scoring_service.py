@@ -0,0 +1,128 @@
+# benchmarks/load_scoring_service.py
+
+"""
+Local load test for scoring_service.py.
+
+    python -m benchmarks.load_scoring_service --requests 2000 --concurrency 64
+
+Starts the fake Etherscan API (with `--latency-ms` per call), runs the
+scoring service in a subprocess against it with throwaway cache files, then
+drives it with keep-alive asyncio clients. `--hot-wallets` / `--hot-fraction`
+send part of the traffic to a few wallets so single-flight coalescing shows
+up; `--no-cache` disables the summary cache so every miss reaches the
+(fake) API. Reports p50/p90/p99 latency, requests/second, status counts and
+the service's own /stats.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from benchmarks.fake_etherscan import start_server
+
+
+async def _request(reader, writer, path):
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: bench\r\n\r\n".encode())
+    await writer.drain()
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split(" ")[1])
+    length = next(int(line.split(":", 1)[1]) for line in lines if line.lower().startswith("content-length"))
+    await reader.readexactly(length)
+    return status
+
+
+async def _drive(port, paths, concurrency):
+    latencies, statuses = [], {}
+    queue = iter(paths)
+
+    async def client():
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        for path in queue:
+            start = time.perf_counter()
+            status = await _request(reader, writer, path)
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses[status] = statuses.get(status, 0) + 1
+        writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, statuses, time.perf_counter() - start
+
+
+def _percentile(sorted_values, pct):
+    return round(sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))], 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the scoring service.")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=16, help="Service evaluation threads")
+    parser.add_argument("--max-pending", type=int, default=256)
+    parser.add_argument("--wallets", type=int, default=500, help="Distinct cold wallets")
+    parser.add_argument("--hot-wallets", type=int, default=5)
+    parser.add_argument("--hot-fraction", type=float, default=0.5)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Fake Etherscan latency per call")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--port", type=int, default=8791)
+    args = parser.parse_args()
+
+    etherscan, etherscan_state, etherscan_url = start_server(latency=args.latency_ms / 1000)
+    rng = random.Random(0)
+    cold = ["0x" + rng.getrandbits(160).to_bytes(20, "big").hex() for _ in range(args.wallets)]
+    hot = ["0x" + rng.getrandbits(160).to_bytes(20, "big").hex() for _ in range(args.hot_wallets)]
+    paths = [f"/score/{rng.choice(hot) if rng.random() < args.hot_fraction else rng.choice(cold)}"
+             for _ in range(args.requests)]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        env = dict(os.environ,
+                   ETHERSCAN_API_URL=etherscan_url, ETHERSCAN_API_KEY="bench", ETHERSCAN_RATE_PER_KEY="100000",
+                   ETHERSCAN_CACHE_PATH=os.path.join(workdir, "etherscan.sqlite"),
+                   WALLET_SYNC_PATH=os.path.join(workdir, "wallet_sync.sqlite"))
+        if args.no_cache:
+            env["ETHERSCAN_CACHE_TTL"] = "0"
+        service = subprocess.Popen(
+            [sys.executable, "scoring_service.py", "--port", str(args.port), "--workers", str(args.workers),
+             "--max-pending", str(args.max_pending)],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        base = f"http://127.0.0.1:{args.port}"
+        try:
+            for _ in range(100):
+                try:
+                    urllib.request.urlopen(base + "/health", timeout=1)
+                    break
+                except OSError:
+                    time.sleep(0.1)
+            latencies, statuses, elapsed = asyncio.run(_drive(args.port, paths, args.concurrency))
+            with urllib.request.urlopen(base + "/stats") as resp:
+                service_stats = json.load(resp)
+        finally:
+            service.terminate()
+            service.wait()
+            etherscan.shutdown()
+
+    latencies.sort()
+    print(json.dumps({
+        "requests": len(latencies),
+        "concurrency": args.concurrency,
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": _percentile(latencies, 50),
+        "p90_ms": _percentile(latencies, 90),
+        "p99_ms": _percentile(latencies, 99),
+        "statuses": statuses,
+        "etherscan_requests": etherscan_state.requests,
+        "service": service_stats,
+    }, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# benchmarks/local_chain.py
+
+"""
+In-process chain stand-in for benchmarks and local testing.
+
+Runs eth-tester (py-evm) with the VCRegistry and EthereumDIDRegistry
+stand-ins from benchmarks/contracts deployed, and can expose it as an HTTP JSON-RPC
+endpoint (including JSON-RPC batches) so code that expects a node URL,
+such as vc_reader's batched reads, works unchanged.
+
+Needs the dev-only packages: pip install "eth-tester[py-evm]"
+
+    from benchmarks.local_chain import start_local_chain
+    chain = start_local_chain(http=True)
+    chain.w3, chain.contract, chain.did_registry, chain.private_key, chain.rpc_url
+"""
+
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from web3 import Web3
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+CONTRACTS_DIR = os.path.join(BENCH_DIR, "contracts")
+ABI_PATH = os.path.join(os.path.dirname(BENCH_DIR), "VCRegistryABI.json")
+
+
+class LocalChain:
+    """Handle returned by `start_local_chain`."""
+
+    def __init__(self, tester, w3, contract, did_registry, private_key):
+        self.tester = tester
+        self.w3 = w3
+        self.contract = contract
+        self.did_registry = did_registry
+        self.private_key = private_key
+        self.rpc_url = None
+        self.server = None
+        # eth-tester is not thread-safe; every call made through the HTTP endpoint holds this
+        self.lock = threading.Lock()
+
+    def serve_http(self, port: int = 0, latency: float = 0.0) -> str:
+        """
+        Expose the chain as a JSON-RPC endpoint on a background thread; returns its URL.
+
+        Args:
+            latency (float): Seconds added to every HTTP request, to mimic a remote node.
+        """
+        chain = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _call(self, request):
+                params = request.get("params", [])
+                if request["method"] in ("eth_call", "eth_estimateGas") and "from" not in params[0]:
+                    params[0]["from"] = chain.w3.eth.accounts[0]
+                try:
+                    with chain.lock:
+                        if request["method"] == "eth_getLogs":
+                            # raw eth_getLogs trips web3's request normalizers; go through the typed API
+                            result = chain.w3.eth.get_logs({key: int(value, 16) if key.endswith("Block") else value
+                                                            for key, value in params[0].items()})
+                        else:
+                            result = chain.w3.manager.request_blocking(request["method"], params)
+                    return {"jsonrpc": "2.0", "id": request.get("id"), "result": json.loads(Web3.to_json(result))}
+                except Exception as e:
+                    return {"jsonrpc": "2.0", "id": request.get("id"), "error": {"code": -32000, "message": str(e)}}
+
+            def do_POST(self):
+                if latency:
+                    time.sleep(latency)
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                out = [self._call(r) for r in body] if isinstance(body, list) else self._call(body)
+                data = json.dumps(out).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                try:
+                    self.wfile.write(data)
+                except BrokenPipeError:
+                    pass  # the client gave up (timeout) while the chain was busy
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.rpc_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        return self.rpc_url
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+
+
+def _deploy(w3, abi_path: str, bin_path: str):
+    with open(abi_path) as f:
+        abi = json.load(f)
+    with open(bin_path) as f:
+        bytecode = f.read().strip()
+    deploy_tx = w3.eth.contract(abi=abi, bytecode=bytecode).constructor().transact({"from": w3.eth.accounts[0]})
+    address = w3.eth.get_transaction_receipt(deploy_tx)["contractAddress"]
+    return w3.eth.contract(address=address, abi=abi)
+
+
+def start_local_chain(http: bool = False) -> LocalChain:
+    """
+    Start eth-tester, deploy the registry stand-ins and return a `LocalChain`.
+
+    Args:
+        http (bool): Also serve it over HTTP JSON-RPC (`chain.rpc_url`).
+    """
+    try:
+        from eth_tester import EthereumTester, PyEVMBackend
+    except ImportError as e:
+        raise ImportError('local chain needs eth-tester: pip install "eth-tester[py-evm]"') from e
+
+    tester = EthereumTester(PyEVMBackend())
+    w3 = Web3(Web3.EthereumTesterProvider(tester))
+    contract = _deploy(w3, ABI_PATH, os.path.join(CONTRACTS_DIR, "VCRegistry.bin"))
+    did_registry = _deploy(w3, os.path.join(CONTRACTS_DIR, "EthereumDIDRegistry.json"),
+                           os.path.join(CONTRACTS_DIR, "EthereumDIDRegistry.bin"))
+    private_key = tester.backend.account_keys[0].to_hex()
+
+    chain = LocalChain(tester, w3, contract, did_registry, private_key)
+    if http:
+        chain.serve_http()
+    return chain
@@ -0,0 +1,357 @@
+# benchmarks/suite.py
+
+"""
+End-to-end benchmark suite for the evaluate and register paths.
+
+    python -m benchmarks.suite --output bench_report.json
+    python -m benchmarks.suite --quick --compare bench_report.json
+
+Runs fully offline: the fake Etherscan API (benchmarks/fake_etherscan.py,
+with its empty / typical / 10k-tx fixture wallets, or recorded tx lists via
+`--fixtures-dir`) and the in-process chain (benchmarks/local_chain.py)
+serving the VCRegistry and EthereumDIDRegistry stand-ins over JSON-RPC. The
+pipeline modules are imported only after the environment points them at
+these stand-ins and at throwaway cache files.
+
+Report sections (JSON; `--compare` prints the relative change of every
+numeric field against an earlier report):
+
+- startup: one-off matplotlib warm-up and issuer key load.
+- stages: per fixture wallet, median cold and warm latency of each stage
+  (fetch, DID, KYC, score, VC signing, hashing, chart, history append).
+- end_to_end: median `evaluate_wallet` cold and warm per fixture wallet.
+- concurrency: `evaluate_many` over fresh wallets at each `--concurrency`
+  level: wallets/s and per-wallet p50/p90/p99. The in-process chain runs
+  eth_calls one at a time, so cold DID lookups bound this on the stand-in;
+  `did_errors` counts lookups that timed out.
+- register: direct `registerVC` (submit → receipt) latency/throughput and
+  one Merkle-anchored batch of the same size.
+- memory: tracemalloc peaks for cold fetch/evaluate per fixture (separate
+  pass, so tracing does not skew the timings) and the process max RSS. The
+  fake Etherscan runs in-process, so its response serialization is included
+  (about twice the body size); benchmarks.bench_txlist_parse isolates the
+  client side.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from benchmarks.fake_etherscan import EMPTY_WALLET, HEAVY_WALLET, TYPICAL_WALLET, start_server
+
+FIXTURES = {"empty": EMPTY_WALLET, "typical": TYPICAL_WALLET, "heavy_10k": HEAVY_WALLET}
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 3)
+
+
+def _timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, _ms(start)
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    return round(sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))], 3)
+
+
+def _random_wallets(n: int, seed: int) -> list:
+    rng = random.Random(seed)
+    return ["0x" + rng.getrandbits(160).to_bytes(20, "big").hex() for _ in range(n)]
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              timeout=10, cwd=REPO_ROOT).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def configure_environment(workdir: str, etherscan_url: str, chain) -> None:
+    """Point every pipeline module at the stand-ins and at throwaway state under `workdir`."""
+    os.environ.update({
+        "ETHERSCAN_API_URL": etherscan_url,
+        "ETHERSCAN_API_KEY": "bench",
+        "ETHERSCAN_RATE_PER_KEY": "100000",
+        "ETHERSCAN_CACHE_PATH": os.path.join(workdir, "etherscan.sqlite"),
+        "WALLET_SYNC_PATH": os.path.join(workdir, "wallet_sync.sqlite"),
+        "DID_ETHR_RPC_URL": chain.rpc_url,
+        "DID_ETHR_REGISTRY": chain.did_registry.address,
+        "DID_CACHE_PATH": os.path.join(workdir, "did.sqlite"),
+        "VC_ISSUER_KEY_PATH": os.path.join(workdir, "issuer.pem"),
+        "HISTORY_DB_PATH": os.path.join(workdir, "history.sqlite"),
+        "RISKY_CONTRACTS_PATH": os.path.join(REPO_ROOT, "risky_contracts.json"),
+        "RISKY_INDEX_CACHE_DIR": os.path.join(workdir, "risky_index"),
+        "KYC_PROVIDER": "static",
+    })
+
+
+def make_cold(wallet: str):
+    """Drop every cached trace of `wallet` (summary cache, sync cursor, DID document)."""
+    import fetch_onchain
+    from verify_did import get_did_resolver
+
+    address = fetch_onchain.normalize_address(wallet)
+    fetch_onchain.invalidate_wallet_data(address)
+    fetch_onchain.sync_store.reset(address)
+    resolver = get_did_resolver()
+    resolver.cache.invalidate(resolver.ethr_did(wallet))
+
+
+def _median_runs(fn, repeat: int) -> dict:
+    """Run `fn` (returning a flat dict of timings) `repeat` times; median of each field."""
+    runs = [fn() for _ in range(repeat)]
+    return {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+
+
+def _stage_timings(wallet: str, history) -> dict:
+    from fetch_onchain import get_wallet_data
+    from score_calculator import calculate_score, get_risk_level
+    from vc_issuer import issue_vc, vc_hash
+    from verify_did import resolve_did
+    from visualizer import chart_cache, render_score_chart, visualize_wallet_analysis
+    from zk_kyc_checker import check_kyc
+
+    make_cold(wallet)
+    stages = {}
+    onchain, stages["fetch_cold_ms"] = _timed(get_wallet_data, wallet)
+    _, stages["fetch_warm_ms"] = _timed(get_wallet_data, wallet)
+    did_info, stages["did_cold_ms"] = _timed(resolve_did, wallet)
+    _, stages["did_warm_ms"] = _timed(resolve_did, wallet)
+    kyc, stages["kyc_ms"] = _timed(check_kyc, wallet)
+    score, stages["score_ms"] = _timed(calculate_score, onchain, did_info, kyc)
+    risk = get_risk_level(score)
+    vc, stages["issue_vc_ms"] = _timed(issue_vc, wallet, score, risk, kyc, did_info)
+    _, stages["vc_hash_ms"] = _timed(vc_hash, vc)
+    chart_cache.clear()
+    _, stages["score_chart_ms"] = _timed(render_score_chart, score, "green")
+    _, stages["score_chart_cached_ms"] = _timed(render_score_chart, score, "green")
+    chart_args = (onchain["tx_count"], onchain["unique_contracts_interacted"], risk)
+    _, stages["activity_chart_ms"] = _timed(visualize_wallet_analysis, *chart_args)
+    _, stages["activity_chart_cached_ms"] = _timed(visualize_wallet_analysis, *chart_args)
+    _, stages["history_append_ms"] = _timed(history.append, {"wallet": wallet, "score": score, "risk_level": risk})
+    stages["tx_count"] = onchain["tx_count"]
+    return stages
+
+
+def bench_startup() -> dict:
+    """One-off costs paid by the first evaluation in a process, measured up front so stage numbers are steady-state."""
+    import visualizer
+    from vc_signer import issuer_key
+
+    _, warm_up = _timed(visualizer.warm_up)
+    _, key = _timed(issuer_key)
+    return {"chart_warm_up_ms": warm_up, "issuer_key_ms": key}
+
+
+def _end_to_end_timings(wallet: str) -> dict:
+    from evaluator import evaluate_wallet
+
+    make_cold(wallet)
+    _, cold = _timed(evaluate_wallet, wallet)
+    _, warm = _timed(evaluate_wallet, wallet)
+    return {"cold_ms": cold, "warm_ms": warm}
+
+
+def bench_concurrency(levels, wallets_per_level: int) -> dict:
+    from evaluator import BatchStats, evaluate_many, evaluate_wallet
+
+    report = {}
+    for i, level in enumerate(levels):
+        latencies = []
+
+        def timed_evaluate(wallet):
+            result, ms = _timed(evaluate_wallet, wallet)
+            latencies.append(ms)
+            return result
+
+        stats = BatchStats(level)
+        results = list(evaluate_many(_random_wallets(wallets_per_level, seed=1000 + i), level, stats,
+                                     evaluate=timed_evaluate))
+        latencies.sort()
+        report[str(level)] = {
+            "wallets_per_second": round(stats.wallets_per_second, 2),
+            "failed": sum("error" in r for r in results),
+            "did_errors": sum("error" in r.get("did_info", {}) for r in results),
+            "p50_ms": _percentile(latencies, 50),
+            "p90_ms": _percentile(latencies, 90),
+            "p99_ms": _percentile(latencies, 99),
+        }
+    return report
+
+
+def bench_register(chain, count: int) -> dict:
+    from merkle_anchor import AnchorBatcher
+    from vc_registration import RegistrationService
+
+    service = RegistrationService(chain.w3, chain.contract, chain.private_key, poll_interval=0.02)
+    hashes = ["0x" + h.hex() for h in (random.Random(i).getrandbits(256).to_bytes(32, "big") for i in range(count))]
+
+    start = time.perf_counter()
+    submitted = {}
+    for h in hashes:
+        submitted[h] = (service.submit(h, 50), time.perf_counter())
+    submit_s = time.perf_counter() - start
+    latencies = []
+    while submitted:
+        for h, (reg, t0) in list(submitted.items()):
+            if reg.done.is_set():
+                latencies.append((time.perf_counter() - t0) * 1000)
+                del submitted[h]
+        time.sleep(0.005)
+    total_s = time.perf_counter() - start
+    latencies.sort()
+    report = {
+        "count": count,
+        "submits_per_second": round(count / submit_s, 1),
+        "confirmed_per_second": round(count / total_s, 1),
+        "p50_ms": _percentile(latencies, 50),
+        "p99_ms": _percentile(latencies, 99),
+    }
+
+    batcher = AnchorBatcher(service, max_batch=count, max_wait=3600)
+    start = time.perf_counter()
+    tickets = [batcher.add("0x" + h[2:][::-1]) for h in hashes]
+    for ticket in tickets:
+        ticket.wait(timeout=60)
+    service.wait(tickets[0].registration.vc_hash, timeout=60)
+    report["merkle_batch_ms"] = _ms(start)
+    report["merkle_transactions"] = batcher.batches_sent
+    batcher.stop()
+    service.stop()
+    return report
+
+
+def bench_memory() -> dict:
+    from evaluator import evaluate_wallet
+    from fetch_onchain import get_wallet_data
+
+    report = {}
+    tracemalloc.start()
+    try:
+        for label, wallet in FIXTURES.items():
+            make_cold(wallet)
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            get_wallet_data(wallet)
+            fetch_peak = tracemalloc.get_traced_memory()[1] - base
+            make_cold(wallet)
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            evaluate_wallet(wallet)
+            evaluate_peak = tracemalloc.get_traced_memory()[1] - base
+            report[label] = {"fetch_cold_peak_kb": round(fetch_peak / 1024, 1),
+                             "evaluate_cold_peak_kb": round(evaluate_peak / 1024, 1)}
+    finally:
+        tracemalloc.stop()
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    report["process_max_rss_mb"] = round(usage / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    return report
+
+
+def _flatten(obj, prefix=""):
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            yield from _flatten(value, f"{prefix}{key}.")
+    elif isinstance(obj, (int, float)) and not isinstance(obj, bool):
+        yield prefix[:-1], obj
+
+
+def compare(old: dict, new: dict) -> list:
+    """`(field, old, new, change %)` for every numeric field present in both reports."""
+    old_values = dict(_flatten({k: v for k, v in old.items() if k != "meta"}))
+    rows = []
+    for key, value in _flatten({k: v for k, v in new.items() if k != "meta"}):
+        if key in old_values:
+            before = old_values[key]
+            change = round((value - before) * 100 / before, 1) if before else None
+            rows.append((key, before, value, change))
+    return rows
+
+
+def run(args) -> dict:
+    from benchmarks.local_chain import start_local_chain
+
+    chain = start_local_chain()
+    chain.serve_http(latency=args.rpc_latency_ms / 1000)
+    server, etherscan, url = start_server(latency=args.etherscan_latency_ms / 1000, fixtures_dir=args.fixtures_dir)
+    with tempfile.TemporaryDirectory() as workdir:
+        configure_environment(workdir, url, chain)
+        from history_store import HistoryStore
+
+        history = HistoryStore(os.environ["HISTORY_DB_PATH"])
+        report = {
+            "meta": {
+                "commit": _git_commit(),
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "args": vars(args),
+            },
+            "startup": bench_startup(),
+            "end_to_end": {label: _median_runs(lambda: _end_to_end_timings(w), args.repeat)
+                           for label, w in FIXTURES.items()},
+            "stages": {label: _median_runs(lambda: _stage_timings(w, history), args.repeat)
+                       for label, w in FIXTURES.items()},
+            "concurrency": bench_concurrency(args.concurrency, args.wallets),
+            "register": bench_register(chain, args.registrations),
+            "memory": bench_memory(),
+        }
+        report["meta"]["etherscan_requests"] = etherscan.requests
+    server.shutdown()
+    chain.stop()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the end-to-end benchmark suite.")
+    parser.add_argument("--output", help="Write the JSON report here (default: stdout)")
+    parser.add_argument("--compare", help="Earlier report to diff against")
+    parser.add_argument("--quick", action="store_true", help="Smaller run for a fast sanity check")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per stage/end-to-end timing (median reported)")
+    parser.add_argument("--wallets", type=int, default=200, help="Fresh wallets per concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--registrations", type=int, default=100)
+    parser.add_argument("--etherscan-latency-ms", type=float, default=20.0)
+    parser.add_argument("--rpc-latency-ms", type=float, default=5.0)
+    parser.add_argument("--fixtures-dir", help="Recorded tx lists served by the fake Etherscan")
+    args = parser.parse_args()
+    if args.quick:
+        args.repeat, args.wallets, args.concurrency, args.registrations = 2, 40, [1, 8], 20
+
+    report = run(args)
+    text = json.dumps(report, indent=4)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+        print(f"📄 Report written to {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            old = json.load(f)
+        print(f"\n📊 Changes vs {args.compare} ({old.get('meta', {}).get('commit')}):", file=sys.stderr)
+        for key, before, after, change in compare(old, report):
+            pct = "n/a" if change is None else f"{change:+.1f}%"
+            print(f"  {key:55s} {before:>12} → {after:>12}  {pct}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+# bulk_score.py
+
+"""
+Resumable bulk scoring job for large wallet lists (e.g. nightly re-scoring).
+
+    python bulk_score.py wallets.csv --output scores/ --format parquet --chunk-size 5000
+
+Reads the `--column` (default "wallet") of a CSV in chunks. Each chunk is
+evaluated with `evaluator.evaluate_many` (get_wallet_data → resolve_did →
+check_kyc → calculate_score on a thread pool), and its credentials are issued
+on a process pool (`issue_vc` signing, JSON serialization and, with `--qr`, the
+QR code) while the next chunk is being evaluated.
+
+Every chunk becomes one part file, `part-00000.jsonl` (or `.parquet`), written
+atomically, after which `_checkpoint.json` records how many rows are done.
+Rerunning the same command after a crash resumes after the last finished
+chunk; a chunk cut short is simply redone (its part file is overwritten).
+A row whose evaluation was partial (e.g. the DID registry was unreachable)
+names the missing stages in its `degraded` column and gets no credential.
+Parquet output needs pyarrow.
+"""
+
+import argparse
+import base64
+import csv
+import itertools
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from evaluator import DEFAULT_CONCURRENCY, BatchStats, evaluate_many
+from logging_config import configure_logging
+from metrics import start_exporter
+from vc_issuer import credential_qr_png, issue_vc, vc_hash
+from vc_signer import VC_SIGN_WORKERS, issuer_key
+
+DEFAULT_CHUNK_SIZE = 1000
+CHECKPOINT_NAME = "_checkpoint.json"
+FORMATS = ("jsonl", "parquet")
+_NO_CREDENTIAL = {"vc_hash": None, "credential": None, "credential_qr_png": None}
+
+logger = logging.getLogger(__name__)
+
+
+class CheckpointMismatch(Exception):
+    """The output directory holds a checkpoint from a different job."""
+
+
+def read_wallets(path: str, column: str = "wallet", skip: int = 0):
+    """
+    Yield wallet addresses from a CSV file, skipping the first `skip` data rows
+    (blank cells included, so row positions stay stable across resumes).
+    """
+    with open(path, newline="") as f:
+        reader = csv.DictReader(f)
+        if column not in (reader.fieldnames or ()):
+            raise ValueError(f"{path} has no {column!r} column (columns: {reader.fieldnames})")
+        for row in itertools.islice(reader, skip, None):
+            yield (row.get(column) or "").strip()
+
+
+def _chunks(iterable, size: int):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _evaluate_chunk(wallets: list, concurrency: int, stats: BatchStats) -> list:
+    """Evaluate a chunk; returns one result per input row, in input order."""
+    results = {"": {"wallet": "", "error": "empty wallet cell"}}
+    results.update((r["wallet"], r) for r in evaluate_many(dict.fromkeys(w for w in wallets if w),
+                                                          concurrency, stats))
+    return [results[w] for w in wallets]
+
+
+def _credentials(args):
+    """Issue, serialize and optionally QR-encode the credentials of a chunk (runs in a worker)."""
+    results, with_qr = args
+    rows = []
+    for result in results:
+        row = dict(_NO_CREDENTIAL)
+        if "error" not in result and not result.get("degraded"):  # never sign a partial score
+            vc = issue_vc(result["wallet"], result["score"], result["risk_level"], result["zk_kyc_passed"],
+                          result["did_info"])
+            row["vc_hash"] = vc_hash(vc)
+            row["credential"] = json.dumps(vc, separators=(",", ":"))
+            if with_qr:
+                row["credential_qr_png"] = credential_qr_png(vc)
+        rows.append(row)
+    return rows
+
+
+def _output_rows(results: list, credentials: list) -> list:
+    """Flat output records: the evaluation result plus its credential fields."""
+    rows = []
+    for result, credential in zip(results, credentials):
+        did_info = result.get("did_info") or {}
+        rows.append({
+            "wallet": result["wallet"],
+            "score": result.get("score"),
+            "risk_level": result.get("risk_level"),
+            "zk_kyc_passed": result.get("zk_kyc_passed"),
+            "tx_count": result.get("tx_count"),
+            "unique_contracts_interacted": result.get("unique_contracts_interacted"),
+            "interacted_with_risky_contract": result.get("interacted_with_risky_contract"),
+            "did": did_info.get("did"),
+            "vc_issued": did_info.get("vc_issued"),
+            "error": result.get("error"),
+            "degraded": ",".join(result.get("degraded") or ()) or None,
+            **credential,
+        })
+    return rows
+
+
+def _write_atomic(path: str, write):
+    tmp = f"{path}.tmp"
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def write_jsonl(path: str, rows: list):
+    def write(tmp):
+        with open(tmp, "w") as f:
+            for row in rows:
+                if row.get("credential_qr_png") is not None:
+                    row = dict(row, credential_qr_png=base64.b64encode(row["credential_qr_png"]).decode())
+                f.write(json.dumps(row) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    _write_atomic(path, write)
+
+
+def write_parquet(path: str, rows: list):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("Parquet output needs pyarrow (pip install pyarrow)") from e
+
+    schema = pa.schema([
+        ("wallet", pa.string()), ("score", pa.float64()), ("risk_level", pa.string()),
+        ("zk_kyc_passed", pa.bool_()), ("tx_count", pa.int64()), ("unique_contracts_interacted", pa.int64()),
+        ("interacted_with_risky_contract", pa.bool_()), ("did", pa.string()), ("vc_issued", pa.bool_()),
+        ("error", pa.string()), ("degraded", pa.string()), ("vc_hash", pa.string()), ("credential", pa.string()),
+        ("credential_qr_png", pa.binary()),
+    ])
+    table = pa.Table.from_pylist(rows, schema=schema)
+    _write_atomic(path, lambda tmp: pq.write_table(table, tmp, compression="zstd"))
+
+
+WRITERS = {"jsonl": write_jsonl, "parquet": write_parquet}
+
+
+def load_checkpoint(output_dir: str, job: dict) -> dict:
+    """
+    The saved progress for `job` in `output_dir` (all zeros if there is none).
+
+    Raises:
+        CheckpointMismatch: the checkpoint was written with another input, column,
+            chunk size or format.
+    """
+    path = os.path.join(output_dir, CHECKPOINT_NAME)
+    if not os.path.exists(path):
+        return {"rows_done": 0, "parts": 0, "failed": 0}
+    with open(path) as f:
+        checkpoint = json.load(f)
+    saved = {key: checkpoint.get(key) for key in job}
+    if saved != job:
+        raise CheckpointMismatch(f"{path} belongs to another job ({saved}); use --restart or another --output")
+    return checkpoint
+
+
+def save_checkpoint(output_dir: str, job: dict, progress: dict):
+    def write(tmp):
+        with open(tmp, "w") as f:
+            json.dump({**job, **progress, "updated_at": time.time()}, f, indent=2)
+
+    _write_atomic(os.path.join(output_dir, CHECKPOINT_NAME), write)
+
+
+def run(input_path: str, output_dir: str, fmt: str = "jsonl", column: str = "wallet",
+        chunk_size: int = DEFAULT_CHUNK_SIZE, concurrency: int = DEFAULT_CONCURRENCY,
+        workers: int = VC_SIGN_WORKERS, with_vc: bool = True, with_qr: bool = False,
+        restart: bool = False, stats: BatchStats = None) -> dict:
+    """
+    Score every wallet in `input_path`, resuming from the checkpoint in `output_dir`.
+
+    Args:
+        input_path (str): CSV file with a `column` of wallet addresses.
+        output_dir (str): Directory for the part files and `_checkpoint.json`.
+        fmt (str): "jsonl" or "parquet".
+        chunk_size (int): Rows per chunk (and per part file).
+        concurrency (int): Wallets evaluated in parallel.
+        workers (int): Credential processes; 0 issues credentials in-process.
+        with_vc (bool): Issue and sign a credential per scored wallet.
+        with_qr (bool): Also render each credential's QR code (PNG bytes).
+        restart (bool): Ignore any checkpoint and start from the first row.
+        stats (BatchStats): Optional counters updated as wallets complete.
+
+    Returns:
+        dict: Final progress (rows_done, parts, failed).
+    """
+    if fmt not in WRITERS:
+        raise ValueError(f"format must be one of {FORMATS}")
+    os.makedirs(output_dir, exist_ok=True)
+    job = {"input": os.path.abspath(input_path), "column": column, "chunk_size": chunk_size, "format": fmt}
+    progress = {"rows_done": 0, "parts": 0, "failed": 0} if restart else load_checkpoint(output_dir, job)
+    progress = {key: progress[key] for key in ("rows_done", "parts", "failed")}
+    if progress["rows_done"]:
+        logger.info("⏩ Resuming %s after %d rows (%d parts)", input_path, progress["rows_done"], progress["parts"])
+
+    stats = stats or BatchStats(concurrency)
+    pool = None
+    if with_vc and workers > 0:
+        issuer_key()  # load (or create) the key once, before workers read the file
+        pool = ProcessPoolExecutor(max_workers=workers)
+
+    def finish(part, results, future):
+        if future is not None:
+            credentials = future.result()
+        elif with_vc:
+            credentials = _credentials((results, with_qr))
+        else:
+            credentials = [_NO_CREDENTIAL] * len(results)
+        path = os.path.join(output_dir, f"part-{part:05d}.{fmt}")
+        WRITERS[fmt](path, _output_rows(results, credentials))
+        progress["rows_done"] += len(results)
+        progress["parts"] = part + 1
+        progress["failed"] += sum(1 for r in results if "error" in r)
+        save_checkpoint(output_dir, job, progress)
+        logger.info("💾 %s: %d rows (%d done, %.1f wallets/s)", os.path.basename(path), len(results),
+                    progress["rows_done"], stats.wallets_per_second)
+
+    # Credentials of chunk N are issued on the pool while chunk N+1 is evaluated
+    previous = None
+    try:
+        part = progress["parts"]
+        for wallets in _chunks(read_wallets(input_path, column, progress["rows_done"]), chunk_size):
+            results = _evaluate_chunk(wallets, concurrency, stats)
+            future = pool.submit(_credentials, (results, with_qr)) if pool is not None else None
+            if previous is not None:
+                finish(*previous)
+            previous = (part, results, future)
+            part += 1
+        if previous is not None:
+            finish(*previous)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    return progress
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a CSV of wallets in resumable, chunked batches.")
+    parser.add_argument("input", help="CSV file with a column of wallet addresses")
+    parser.add_argument("--output", required=True, help="Directory for part files and the checkpoint")
+    parser.add_argument("--format", choices=FORMATS, default="jsonl")
+    parser.add_argument("--column", default="wallet", help="CSV column holding the address")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--workers", type=int, default=VC_SIGN_WORKERS,
+                        help="Processes issuing credentials (0 = in-process)")
+    parser.add_argument("--no-vc", dest="with_vc", action="store_false", help="Skip credential issuance")
+    parser.add_argument("--qr", dest="with_qr", action="store_true", help="Also render credential QR codes")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start over")
+    args = parser.parse_args(argv)
+
+    configure_logging()
+    start_exporter()  # METRICS_FILE is also written at exit
+    stats = BatchStats(args.concurrency)
+    try:
+        progress = run(args.input, args.output, args.format, args.column, args.chunk_size, args.concurrency,
+                       args.workers, args.with_vc, args.with_qr, args.restart, stats)
+    except (CheckpointMismatch, ValueError, RuntimeError) as e:
+        parser.exit(2, f"❌ {e}\n")
+    print(f"📈 Throughput: {json.dumps({**stats.as_dict(), **progress})}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,10 @@
 from web3 import Web3
 import os
 import json
-import time
 from dotenv import load_dotenv
 
+from vc_registration import get_registration_service
+
 load_dotenv()
 
 # ✅ Load values from .env
@@ -22,23 +23,19 @@ with open("VCRegistryABI.json") as f:
 
 contract = w3.eth.contract(address=Web3.to_checksum_address(CONTRACT_ADDRESS), abi=abi)
 
-def register_vc(vc_hash: str, score: int):
-    nonce = w3.eth.get_transaction_count(from_address)
-    timestamp = int(time.time())
-
-    txn = contract.functions.registerVC(vc_hash, score, timestamp).build_transaction({
-        'chainId': 11155111,  # Sepolia Chain ID
-        'gas': 250000,
-        'gasPrice': w3.to_wei('10', 'gwei'),
-        'nonce': nonce
-    })
+registration_service = get_registration_service(w3, contract, PRIVATE_KEY)
 
-    signed_txn = w3.eth.account.sign_transaction(txn, private_key=PRIVATE_KEY)
-    tx_hash = w3.eth.send_raw_transaction(signed_txn.rawTransaction)
-    print(f"✅ Tx sent! Hash: {tx_hash.hex()}")
+def register_vc(vc_hash: str, score: int, wait: bool = True):
+    registration = registration_service.submit(vc_hash, score)
+    if registration.status == "failed":
+        print(f"❌ VC registration failed: {registration.error}")
+        return registration
+    print(f"✅ Tx sent! Hash: {registration.tx_hash}")
 
-    receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
-    print("🎉 VC Registered Successfully:", receipt)
+    if wait:
+        registration_service.wait(vc_hash)
+        print("🎉 VC Registration finished:", registration.as_dict())
+    return registration
 
 # 🧪 Example usage
 if __name__ == "__main__":
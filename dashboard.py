@@ -1,105 +1,103 @@
 import streamlit as st
-import json
-import os
-from fetch_onchain import get_wallet_data
-from verify_did import resolve_did
-from zk_kyc_checker import check_kyc
-from score_calculator import calculate_score
-from vc_issuer import issue_vc
-from visualizer import visualize_wallet_analysis
+from etherscan_client import EtherscanError
+from evaluator import evaluate_and_issue
+from artifacts import new_request_id, json_bytes, persist
+from resources import get_history_store, init_observability
 
 st.set_page_config(page_title="🔐 Identity Trust Dashboard", layout="wide")
 
 st.title("📊 Identity Trust Dashboard")
+init_observability()  # logging + metrics exporter, once per process
 
 wallet = st.text_input("🔗 Wallet Address", "0x99cee6d471907dAaB1805448493104223c848D22")
 
-HISTORY_FILE = "history.json"
-
-# ✅ Load history if it exists
-def load_history():
-    if os.path.exists(HISTORY_FILE):
-        with open(HISTORY_FILE, "r") as f:
-            return json.load(f)
-    return []
+history_store = get_history_store()  # one store per process (survives Streamlit reruns)
 
 # ✅ Save current result to history
 def save_to_history(entry):
-    history = load_history()
-    history.insert(0, entry)  # newest first
-    with open(HISTORY_FILE, "w") as f:
-        json.dump(history, f, indent=4)
+    history_store.append(entry)
 
 # ✅ Clear full history
 def clear_history():
-    if os.path.exists(HISTORY_FILE):
-        os.remove(HISTORY_FILE)
+    history_store.clear()
 
 # ✅ Evaluate Wallet Section
 if st.button("🔍 Evaluate Wallet"):
-    onchain = get_wallet_data(wallet)
-    did_info = resolve_did(wallet)
-    kyc = check_kyc(wallet)
-    score = calculate_score(onchain, did_info, kyc)
-
-    result = {
-        "wallet": wallet,
-        "zk_kyc_passed": kyc,
-        "tx_count": onchain["tx_count"],
-        "unique_contracts_interacted": onchain["unique_contracts_interacted"],
-        "interacted_with_risky_contract": onchain["interacted_with_risky_contract"],
-        "score": score,
-        "risk_level": "low" if score > 75 else "medium" if score > 50 else "high",
-        "did_info": did_info
-    }
-
-    # ✅ Save to history
-    save_to_history(result)
+    try:
+        evaluation = evaluate_and_issue(wallet, charts=("activity",), qr=True)
+    except EtherscanError as e:
+        st.error(f"❌ Could not fetch on-chain data from Etherscan: {str(e)}")
+        st.stop()
+    result = evaluation["result"]
+    did_info = result["did_info"]
+
+    # ✅ Save to history (a partial score would later read like a real one)
+    if not result["degraded"]:
+        save_to_history(result)
 
     st.subheader("✅ Final Evaluation")
+    if result["degraded"]:
+        st.warning(f"⏱️ Partial result: {', '.join(result['degraded'])} timed out or could not be reached "
+                   "and counted as missing evidence; this partial result is not saved to history.")
     st.json(result)
 
     st.markdown("---")
     st.subheader("🧠 On‑Chain Analysis")
-    st.write(f"🔸 Transaction Count: **{onchain['tx_count']}**")
-    st.write(f"🔸 Unique Contracts: **{onchain['unique_contracts_interacted']}**")
-    if onchain["interacted_with_risky_contract"]:
+    st.write(f"🔸 Transaction Count: **{result['tx_count']}**")
+    st.write(f"🔸 Unique Contracts: **{result['unique_contracts_interacted']}**")
+    if result["interacted_with_risky_contract"]:
         st.error("⚠️ Interacted with risky contract!")
 
     st.subheader("🔐 DID & zk‑KYC")
     st.write(f"🆔 DID: `{did_info['did']}`")
-    st.success("✅ zk‑KYC passed" if kyc else "❌ zk‑KYC failed")
+    st.success("✅ zk‑KYC passed" if result["zk_kyc_passed"] else "❌ zk‑KYC failed")
 
     st.subheader("📊 Trust Score")
-    st.write(f"🔢 Score: **{score}**")
+    st.write(f"🔢 Score: **{result['score']}**")
     st.write(f"⚠️ Risk Level: **{result['risk_level'].upper()}**")
 
-    st.markdown("---")
-    st.subheader("📈 Visualization")
-    visualize_wallet_analysis(onchain["tx_count"], onchain["unique_contracts_interacted"], result["risk_level"])
-    st.image("wallet_analysis.png", caption="Trust Analysis Chart", use_column_width=True)
+    artifacts = {"output.json": json_bytes(result)}
+    chart_png = evaluation["activity_chart"]
+    if chart_png is not None:
+        st.markdown("---")
+        st.subheader("📈 Visualization")
+        st.image(chart_png, caption="Trust Analysis Chart", use_column_width=True)
+        artifacts["wallet_analysis.png"] = chart_png
 
     st.markdown("---")
     st.subheader("📜 Verifiable Credential")
-    vc = issue_vc(wallet, score, result["risk_level"], kyc, did_info)
-    st.download_button("📥 Download credential.json", data=json.dumps(vc, indent=4), file_name="credential.json")
-    st.image("credential_qr.png", caption="VC QR Code", use_column_width=False)
+    if evaluation["vc"]:
+        credential_bytes = artifacts["credential.json"] = evaluation["credential_json"]
+        st.download_button("📥 Download credential.json", data=credential_bytes, file_name="credential.json")
+        if evaluation["qr_png"] is not None:
+            artifacts["credential_qr.png"] = evaluation["qr_png"]
+            st.image(evaluation["qr_png"], caption="VC QR Code", use_column_width=False)
+    else:
+        st.info("No credential is issued for a partial evaluation.")
+
+    persist(new_request_id(), artifacts)
 
 # ✅ Evaluation History Section
 st.markdown("---")
 st.subheader("📚 Evaluation History")
 
-history = load_history()
+history = history_store.latest(5)
 
 col1, col2 = st.columns([3, 1])
 with col1:
     if history:
-        for i, item in enumerate(history[:5]):  # show latest 5
+        for i, item in enumerate(history):  # latest 5
             with st.expander(f"🧾 {item['wallet']} | Score: {item['score']} | Risk: {item['risk_level'].upper()}"):
                 st.json(item)
     else:
         st.info("No previous evaluations found.")
 
+    wallet_history = history_store.by_wallet(wallet, limit=10)
+    if wallet_history:
+        with st.expander(f"🔎 Past evaluations of {wallet} ({len(wallet_history)} shown)"):
+            for item in wallet_history:
+                st.write(f"Score: **{item['score']}** | Risk: **{item['risk_level'].upper()}**")
+
 with col2:
     if st.button("🧹 Clear History"):
         clear_history()
@@ -0,0 +1,408 @@
+# evaluator.py
+
+"""
+Wallet evaluation engine shared by the UIs and batch jobs.
+
+`evaluate_wallet` runs the fetch, DID and KYC stages of one wallet concurrently,
+scores the result and returns the result dict the Streamlit pages show.
+`evaluate_and_issue` is the full interactive pipeline behind app.py, agent.py
+and dashboard.py: evaluation, credential, QR code and charts under one latency
+budget, with on-chain registration handed to a background thread.
+`evaluate_many` runs `evaluate_wallet` for many wallets on a bounded thread
+pool (the stages are network-bound, so threads overlap the waits) and yields
+results as soon as they complete.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from artifacts import json_bytes, persist
+from fetch_onchain import get_wallet_data
+from logging_config import configure_logging
+from metrics import REGISTRY, start_exporter
+from resources import VC_ANCHOR_MODE, get_anchor_batcher, get_registration_service
+from vc_issuer import credential_json, credential_qr_png, issue_vc, vc_hash
+from verify_did import resolve_did
+from visualizer import render_score_chart, visualize_wallet_analysis
+from zk_kyc_checker import KYCUnavailable, check_kyc
+from score_calculator import RISK_COLORS, calculate_score, get_risk_level
+
+DEFAULT_CONCURRENCY = int(os.getenv("EVAL_CONCURRENCY", "8"))
+# Latency budget of one interactive evaluation in seconds (0 = wait for every stage)
+EVAL_TIMEOUT = float(os.getenv("EVAL_TIMEOUT", "10")) or None
+EVAL_STAGE_WORKERS = int(os.getenv("EVAL_STAGE_WORKERS", "64"))
+
+DEGRADED = REGISTRY.counter("trust_eval_degraded_total",
+                            "Evaluation stages that missed the request deadline or whose backend was unavailable.",
+                            ("stage",))
+
+logger = logging.getLogger(__name__)
+
+# Stages of all concurrent evaluations share one pool. A stage that misses its
+# deadline keeps running and still fills the caches (Etherscan summary, DID,
+# KYC) for the next request for the same wallet.
+_stage_pool = ThreadPoolExecutor(max_workers=EVAL_STAGE_WORKERS, thread_name_prefix="eval-stage")
+# Registration runs after the response; RegistrationService serializes sends anyway
+_registration_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="register")
+
+# What a stage contributes when it misses the deadline: no evidence, so no points.
+# Artifact stages (charts, QR code) fall back to None.
+_FALLBACKS = {
+    "onchain": {"tx_count": 0, "unique_contracts_interacted": 0, "interacted_with_risky_contract": False},
+    "did": {"did": None, "verification_method": None, "vc_issued": False, "error": "timeout"},
+    "kyc": False,
+}
+
+
+def _deadline(timeout):
+    return None if timeout is None else time.monotonic() + timeout
+
+
+def _start(stages: dict) -> dict:
+    """Submit independent stages (name → zero-argument callable) to the stage pool."""
+    return {name: _stage_pool.submit(stage) for name, stage in stages.items()}
+
+
+def _degrade(name: str, degraded: list, why: str):
+    degraded.append(name)
+    DEGRADED.inc(stage=name)
+    logger.warning("⏱️ Stage %s %s; continuing with its fallback", name, why)
+
+
+def _collect(futures: dict, deadline, degraded: list, tolerate_errors: bool = False) -> dict:
+    """
+    Wait for started stages until `deadline` (a `time.monotonic()` value, or None for no limit).
+
+    Returns:
+        dict: Stage name → result. A stage still running at the deadline (or,
+            with `tolerate_errors`, one that raised) is appended to `degraded`
+            and maps to its fallback.
+
+    Raises:
+        Whatever a finished stage raised, unless `tolerate_errors`.
+    """
+    timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+    wait(futures.values(), timeout=timeout)
+    results = {}
+    for name, future in futures.items():
+        if not future.done():
+            _degrade(name, degraded, "missed the deadline")
+        elif tolerate_errors and future.exception() is not None:
+            _degrade(name, degraded, f"failed: {future.exception()}")
+        else:
+            results[name] = future.result()
+            continue
+        fallback = _FALLBACKS.get(name)
+        results[name] = dict(fallback) if isinstance(fallback, dict) else fallback
+    return results
+
+
+def _check_kyc(wallet_address: str):
+    """`check_kyc`, or None when the provider could not be asked."""
+    try:
+        return check_kyc(wallet_address)
+    except KYCUnavailable:
+        return None
+
+
+def _evaluate(wallet_address: str, deadline) -> dict:
+    degraded = []
+    stages = _collect(_start({
+        "onchain": lambda: get_wallet_data(wallet_address),
+        "did": lambda: resolve_did(wallet_address),
+        "kyc": lambda: _check_kyc(wallet_address),
+    }), deadline, degraded)
+    onchain_data, did_info, kyc_passed = stages["onchain"], stages["did"], stages["kyc"]
+    if onchain_data.get("incomplete_actions") and "onchain" not in degraded:
+        # Features of a failed endpoint are stale or empty, not evidence of no activity
+        _degrade("onchain", degraded, f"could not sync {', '.join(onchain_data['incomplete_actions'])}")
+    if did_info.get("error") == "unavailable" and "did" not in degraded:
+        # The registry could not be read: "no DID" would be a guess, not evidence
+        _degrade("did", degraded, "could not reach the DID registry")
+    if kyc_passed is None:
+        kyc_passed = _FALLBACKS["kyc"]
+        _degrade("kyc", degraded, "could not reach the KYC provider")
+    score = calculate_score(onchain_data, did_info, kyc_passed)
+
+    return {
+        "wallet": wallet_address,
+        "zk_kyc_passed": kyc_passed,
+        "tx_count": onchain_data["tx_count"],
+        "unique_contracts_interacted": onchain_data["unique_contracts_interacted"],
+        "interacted_with_risky_contract": onchain_data["interacted_with_risky_contract"],
+        "score": score,
+        "risk_level": get_risk_level(score),
+        "did_info": did_info,
+        "degraded": degraded,
+    }
+
+
+def evaluate_wallet(wallet_address: str, timeout: float = None) -> dict:
+    """
+    Evaluate a single wallet: fetch, DID resolution and KYC run concurrently, then the score.
+
+    Args:
+        wallet_address (str): Wallet address to evaluate.
+        timeout (float): Seconds to wait for the stages; None waits for all of them.
+
+    Returns:
+        dict: Evaluation result (wallet, KYC, on-chain counts, score, risk level,
+            DID info). `degraded` lists the stages ("onchain", "did", "kyc")
+            that missed the timeout or whose backend was unavailable (for
+            "onchain", an Etherscan endpoint that failed to sync); they were
+            scored as absent or stale evidence, so the score is not final.
+
+    Raises:
+        EtherscanError: On-chain data could not be fetched.
+    """
+    return _evaluate(wallet_address, _deadline(timeout))
+
+
+def evaluate_and_issue(wallet_address: str, timeout: float = EVAL_TIMEOUT, charts=("score",), qr: bool = False,
+                       register: bool = False, request_id: str = None) -> dict:
+    """
+    The interactive pipeline shared by app.py, agent.py and dashboard.py.
+
+    `evaluate_wallet` runs first; once the score is known the charts and the
+    credential QR code render concurrently while the VC is signed (≈0.15 ms).
+    Every stage shares the `timeout` budget and whatever misses it is listed in
+    `result["degraded"]` with a None artifact (as is a DID registry that could
+    not be reached, or a chart or QR code that failed to render). No credential
+    is issued for a degraded evaluation, as it would sign a score computed
+    without some of the evidence. Registration goes to a background thread
+    (`register_credential`), so the response never waits on the chain.
+
+    Args:
+        wallet_address (str): Wallet address to evaluate.
+        timeout (float): Latency budget in seconds (None = no limit).
+        charts (tuple): Charts to render: "score" and/or "activity".
+        qr (bool): Render the credential's QR code.
+        register (bool): Submit the VC hash for on-chain registration.
+        request_id (str): Artifact request ID (merkle mode saves the anchor proof under it).
+
+    Returns:
+        dict: result, vc, vc_hash ("0x…"), credential_json, qr_png, score_chart,
+            activity_chart and registration (a `register_credential` future).
+            Anything not produced is None.
+
+    Raises:
+        EtherscanError: On-chain data could not be fetched.
+    """
+    deadline = _deadline(timeout)
+    result = _evaluate(wallet_address, deadline)
+    score, risk_level = result["score"], result["risk_level"]
+
+    stages = {}
+    if "score" in charts:
+        stages["score_chart"] = lambda: render_score_chart(score, RISK_COLORS[risk_level])
+    if "activity" in charts:
+        stages["activity_chart"] = lambda: visualize_wallet_analysis(
+            result["tx_count"], result["unique_contracts_interacted"], risk_level)
+    futures = _start(stages)
+
+    evaluation = {"result": result, "vc": None, "vc_hash": None, "credential_json": None, "qr_png": None,
+                  "score_chart": None, "activity_chart": None, "registration": None}
+    if not result["degraded"]:
+        vc = evaluation["vc"] = issue_vc(wallet_address, score, risk_level, result["zk_kyc_passed"],
+                                         result["did_info"])
+        evaluation["vc_hash"] = f"0x{vc_hash(vc)}"
+        if qr:
+            futures.update(_start({"qr_png": lambda: credential_qr_png(vc)}))
+        evaluation["credential_json"] = credential_json(vc)
+        if register:
+            evaluation["registration"] = register_credential(evaluation["vc_hash"], score, request_id)
+
+    # The VC may already be registering: an artifact failure must not hide its hash
+    evaluation.update(_collect(futures, deadline, result["degraded"], tolerate_errors=True))
+    return evaluation
+
+
+def _log_registration(future):
+    if future.exception() is not None:
+        logger.error("❌ Background VC registration failed: %s", future.exception())
+
+
+def register_credential(vc_hash: str, score, request_id: str = None):
+    """
+    Submit a VC hash for on-chain registration on a background thread.
+
+    Returns:
+        Future: Resolves to the `Registration` from `RegistrationService.submit`
+            ("direct" mode; the service tracks the receipt) or to the
+            `AnchorTicket` ("merkle" mode; with `request_id`, the inclusion
+            proof is saved as `anchor_proof.json` once the root is anchored).
+    """
+    def register():
+        if VC_ANCHOR_MODE == "merkle":
+            on_anchored = None if request_id is None else (
+                lambda receipt: persist(request_id, {"anchor_proof.json": json_bytes(receipt)}))
+            return get_anchor_batcher().add(vc_hash, on_anchored=on_anchored)
+        return get_registration_service().submit(vc_hash, score)
+
+    future = _registration_pool.submit(register)
+    future.add_done_callback(_log_registration)
+    return future
+
+
+def registration_status(future) -> dict:
+    """
+    Snapshot of a `register_credential` future for display (never blocks).
+
+    Returns:
+        dict: status ("sending" until the submit returns, then the record's
+            status: "queued", "submitted", "confirmed", "failed", ...), tx_hash,
+            error, and anchor_proof: in merkle mode the credential's inclusion
+            proof bundle (`AnchorTicket.receipt()`) once its batch was sent, else None.
+    """
+    if not future.done():
+        return {"status": "sending", "tx_hash": None, "error": None, "anchor_proof": None}
+    if future.exception() is not None:
+        return {"status": "failed", "tx_hash": None, "error": str(future.exception()), "anchor_proof": None}
+    record = future.result()
+    registration = getattr(record, "registration", record)  # an AnchorTicket wraps its batch's Registration
+    return {"status": record.status, "tx_hash": registration.tx_hash if registration else None,
+            "error": record.error, "anchor_proof": record.receipt() if hasattr(record, "receipt") else None}
+
+
+class BatchStats:
+    """
+    Progress and throughput counters for one `evaluate_many` run.
+    Safe to read from another thread while the batch is running.
+    """
+
+    def __init__(self, concurrency: int):
+        self.concurrency = concurrency
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def _record(self, ok: bool):
+        with self._lock:
+            self.completed += 1
+            if not ok:
+                self.failed += 1
+
+    @property
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        return end - self.started_at
+
+    @property
+    def wallets_per_second(self) -> float:
+        elapsed = self.elapsed
+        return self.completed / elapsed if elapsed > 0 else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "concurrency": self.concurrency,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "elapsed_seconds": round(self.elapsed, 3),
+            "wallets_per_second": round(self.wallets_per_second, 2),
+        }
+
+
+def evaluate_many(wallets, concurrency: int = DEFAULT_CONCURRENCY, stats: BatchStats = None,
+                  evaluate=evaluate_wallet):
+    """
+    Evaluate many wallets concurrently, yielding results in completion order.
+
+    At most `concurrency` evaluations run at once and only a small window of
+    wallets is pulled from `wallets` ahead of the workers, so arbitrarily large
+    iterables (e.g. a file of 20k addresses) are streamed rather than loaded.
+    A failing wallet yields `{"wallet": ..., "error": ...}` instead of aborting
+    the batch.
+
+    Args:
+        wallets (iterable): Wallet addresses.
+        concurrency (int): Maximum number of wallets evaluated in parallel.
+        stats (BatchStats): Optional counters updated as results complete.
+        evaluate (callable): Per-wallet evaluation function.
+
+    Yields:
+        dict: One result per wallet, same shape as `evaluate_wallet`.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be >= 1")
+    if stats is None:
+        stats = BatchStats(concurrency)
+
+    window = concurrency * 2
+    wallet_iter = iter(wallets)
+    pending = {}
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="evaluate")
+    if stats.started_at is None:  # one stats object may span several batches (e.g. bulk_score chunks)
+        stats.started_at = time.perf_counter()
+    stats.finished_at = None
+
+    def fill():
+        while len(pending) < window:
+            try:
+                wallet = next(wallet_iter)
+            except StopIteration:
+                return
+            pending[executor.submit(evaluate, wallet)] = wallet
+            stats.submitted += 1
+
+    try:
+        fill()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                wallet = pending.pop(future)
+                try:
+                    result = future.result()
+                    stats._record(True)
+                except Exception as e:
+                    result = {"wallet": wallet, "error": str(e)}
+                    stats._record(False)
+                yield result
+            fill()
+    finally:
+        stats.finished_at = time.perf_counter()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _read_wallets(path):
+    with open(path, "r") as f:
+        for line in f:
+            wallet = line.strip()
+            if wallet and not wallet.startswith("#"):
+                yield wallet
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate a list of wallets concurrently.")
+    parser.add_argument("wallets_file", help="Text file with one wallet address per line")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--output", help="Write results as JSON lines to this file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    configure_logging()
+    start_exporter()  # METRICS_FILE is also written at exit
+    stats = BatchStats(args.concurrency)
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        for result in evaluate_many(_read_wallets(args.wallets_file), args.concurrency, stats):
+            out.write(json.dumps(result) + "\n")
+    finally:
+        if args.output:
+            out.close()
+
+    print(f"📈 Throughput: {json.dumps(stats.as_dict())}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,69 +1,142 @@
 # fetch_onchain.py
 
+import logging
 import os
-import json
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-import requests
+
+from address_index import WatchedAddressIndex
+from cache import LRUCache, SQLiteCache, TieredCache
+from etherscan_client import EtherscanError, get_client
+from metrics import timed
+from wallet_sync import ACTIONS, WalletSyncStore, fields_for, merge_features, sync_wallet
 
 load_dotenv()
+logger = logging.getLogger(__name__)
+
+# 🗄️ Summary cache: in-memory LRU in front of a SQLite file shared across reruns/processes.
+# Within the TTL a re-evaluation makes no Etherscan request at all.
+CACHE_TTL = float(os.getenv("ETHERSCAN_CACHE_TTL", "300"))
+CACHE_MAX_ENTRIES = int(os.getenv("ETHERSCAN_CACHE_MAX_ENTRIES", "1024"))
+CACHE_PATH = os.getenv("ETHERSCAN_CACHE_PATH", ".cache/etherscan.sqlite")
+
+wallet_cache = TieredCache(
+    LRUCache(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL),
+    SQLiteCache(CACHE_PATH, ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES * 100) if CACHE_PATH else None,
+)
+
+# 🧭 Per-wallet block cursors: after the TTL only blocks newer than the cursor are fetched
+SYNC_PATH = os.getenv("WALLET_SYNC_PATH", ".cache/wallet_sync.sqlite")
+sync_store = WalletSyncStore(SYNC_PATH)
+
+# 🔀 Etherscan list endpoints folded into the features, fetched concurrently under the client's
+# shared per-key rate limit (txlist in the caller's thread, the rest on this pool)
+FEATURE_ACTIONS = tuple(a.strip() for a in os.getenv("ETHERSCAN_ACTIONS", ",".join(ACTIONS)).split(",") if a.strip())
+FETCH_WORKERS = int(os.getenv("ETHERSCAN_FETCH_WORKERS", "32"))
+_fetch_pool = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="etherscan")
+
+# ☣️ Risky-contract list: compiled once into a mmap'd index, reloaded when the file changes
+RISKY_CONTRACTS_PATH = os.getenv("RISKY_CONTRACTS_PATH", "risky_contracts.json")
+RISKY_INDEX_CACHE_DIR = os.getenv("RISKY_INDEX_CACHE_DIR", ".cache")
+risky_index = WatchedAddressIndex(RISKY_CONTRACTS_PATH, cache_dir=RISKY_INDEX_CACHE_DIR)
+
+def normalize_address(wallet_address):
+    return wallet_address.strip().lower()
+
+@timed("fetch")
+def get_wallet_data(wallet_address, use_cache=True):
+    """
+    Summarize a wallet's on-chain activity from Etherscan: normal txs, internal
+    txs, ERC-20 and NFT transfers (FEATURE_ACTIONS), fetched concurrently so a
+    cold fetch takes about as long as the slowest endpoint (python -m
+    benchmarks.bench_wallet_features, 150 ms per response: ~200 ms vs ~755 ms
+    fetched in turn; ~935 ms vs ~1.4 s for a 10k-tx wallet, whose 8 MB txlist
+    page alone takes ~670 ms).
 
-ETHERSCAN_API_KEY = os.getenv("ETHERSCAN_API_KEY")
+    Each endpoint's stored aggregate is advanced incrementally (see wallet_sync.py),
+    so re-scoring an active wallet costs one small request per endpoint.
 
-def get_wallet_data(wallet_address):
-    base_url = "https://api.etherscan.io/api"
+    Args:
+        wallet_address (str): Wallet address.
+        use_cache (bool): Set to False to bypass the summary cache and sync now.
 
-    tx_resp = requests.get(base_url, params={
-        "module": "account",
-        "action": "txlist",
-        "address": wallet_address,
-        "startblock": 0,
-        "endblock": 99999999,
-        "sort": "asc",
-        "apikey": ETHERSCAN_API_KEY
-    })
+    Returns:
+        dict: The merged feature record (see `wallet_sync.merge_features`), plus
+        `incomplete_actions`: the endpoints whose sync failed, whose features
+        therefore only cover what was stored before (empty when all are current).
 
-    print("📡 Etherscan raw response:", tx_resp.text)
+    Raises:
+        EtherscanError: Etherscan could not be reached (after retries) and no normal txs are stored yet.
+    """
+    address = normalize_address(wallet_address)
+    cache_key = f"features:{address}"
+    if use_cache:
+        cached = wallet_cache.get(cache_key)
+        if cached is not None:
+            return cached
 
+    primary, *others = FEATURE_ACTIONS
+    futures = [_fetch_pool.submit(_sync_action, address, action) for action in others]
+    results = [_sync_action(address, primary)] + [f.result() for f in futures]
+    aggregates = [agg for agg, _ in results]
+
+    data = merge_features(aggregates, load_risky_contracts())
+    data["incomplete_actions"] = [agg.action for agg, complete in results if not complete]
+    for agg in aggregates:
+        sync_store.save(agg)
+    if not data["incomplete_actions"]:
+        wallet_cache.set(cache_key, data)
+    return data
+
+def invalidate_wallet_data(wallet_address):
+    """Drop a wallet's cached summary, so the next `get_wallet_data` syncs with Etherscan."""
+    wallet_cache.invalidate(f"features:{normalize_address(wallet_address)}")
+
+def _sync_action(address, action):
+    """
+    Advance the stored aggregate of one endpoint. Returns `(aggregate, complete)`.
+
+    A failed sync keeps whatever was stored plus the rows read before the failure
+    (`complete` is False); it raises instead for normal txs with nothing stored
+    before this sync, so a partial first history is neither saved nor scored.
+    """
+    agg = sync_store.load(address, action)
+    # Pages are streamed into the aggregate, so a failure can leave it part-synced:
+    # judge "nothing stored yet" by the cursor before the sync started
+    stored_block = agg.last_block
     try:
-        txs = tx_resp.json().get("result", [])
-    except Exception as e:
-        print("❌ Error parsing response:", e)
-        return {
-            "tx_count": 0,
-            "unique_contracts_interacted": 0,
-            "interacted_with_risky_contract": False
-        }
-
-    if not isinstance(txs, list):
-        print("⚠️ Unexpected txs format:", txs)
-        return {
-            "tx_count": 0,
-            "unique_contracts_interacted": 0,
-            "interacted_with_risky_contract": False
-        }
-
-    contracts = set()
-    risky = load_risky_contracts()
-    interacted_risky = False
-
-    for tx in txs:
-        to_address = tx.get("to")
-        if to_address:
-            to_address = to_address.lower()
-            contracts.add(to_address)
-            if to_address in risky:
-                interacted_risky = True
-
-    return {
-        "tx_count": len(txs),
-        "unique_contracts_interacted": len(contracts),
-        "interacted_with_risky_contract": interacted_risky
-    }
+        return agg, sync_wallet(agg, fetch_list_page(action))
+    except EtherscanError as e:
+        if stored_block < 0 and action == "txlist":
+            raise
+        # Serve the last synced state rather than scoring the wallet as inactive
+        logger.warning("⚠️ Etherscan %s sync failed, using stored data up to block %s: %s",
+                       action, agg.last_block, e)
+        return agg, False
+
+def fetch_list_page(action):
+    """
+    Page fetcher for `sync_wallet`: streams one ascending page of `action` rows from
+    `startblock`, parsed incrementally and keeping only the fields the aggregate reads
+    (raises EtherscanError while iterated).
+    """
+    fields = fields_for(action)
+
+    def fetch_page(wallet_address, startblock, page_size):
+        return get_client().iter_list(
+            fields,
+            module="account",
+            action=action,
+            address=wallet_address,
+            startblock=startblock,
+            endblock=99999999,
+            page=1,
+            offset=page_size,
+            sort="asc",
+        )
+
+    return fetch_page
 
 def load_risky_contracts():
-    try:
-        with open("risky_contracts.json", "r") as f:
-            return set(addr.lower() for addr in json.load(f))
-    except Exception as e:
-        print("⚠️ Could not load risky contracts:", e)
-        return set()
+    """Return the process-wide risky-contract index (supports `address in index`)."""
+    return risky_index
@@ -0,0 +1,170 @@
+# history_store.py
+
+"""
+Append-only evaluation history in SQLite.
+
+Each evaluation is one INSERT (atomic, safe across sessions and processes
+thanks to WAL + a busy timeout), so saving no longer rewrites the whole
+history. Reads are newest-first keyset pages over the primary key, so the
+dashboard's "latest 5" touches five rows regardless of history size.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class HistoryStore:
+    """
+    Args:
+        path (str): SQLite file.
+        max_entries (int): Rows kept by `apply_retention` (None = unlimited).
+        max_age (float): Seconds a row is kept by `apply_retention` (None = forever).
+        retention_every (int): Run `apply_retention` automatically every N appends.
+    """
+
+    def __init__(self, path: str, max_entries: int = None, max_age: float = None, retention_every: int = 100):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.retention_every = retention_every
+        self._appends = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                wallet TEXT NOT NULL,
+                score REAL,
+                risk_level TEXT,
+                created_at REAL NOT NULL,
+                entry TEXT NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS history_wallet ON history (wallet, id)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS history_created_at ON history (created_at)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS imports (source TEXT PRIMARY KEY, imported_at REAL NOT NULL)")
+        self._conn.commit()
+
+    def append(self, entry: dict) -> int:
+        """Store one evaluation; returns its id."""
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO history (wallet, score, risk_level, created_at, entry) VALUES (?, ?, ?, ?, ?)",
+                (entry["wallet"].lower(), entry.get("score"), entry.get("risk_level"), time.time(),
+                 json.dumps(entry)),
+            )
+            self._conn.commit()
+            self._appends += 1
+            run_retention = self.retention_every and self._appends % self.retention_every == 0
+        if run_retention:
+            self.apply_retention()
+        return cur.lastrowid
+
+    def page(self, limit: int = 20, before: int = None, wallet: str = None):
+        """
+        Newest-first page of entries.
+
+        Args:
+            limit (int): Page size.
+            before (int): Cursor from the previous page (only ids below it are returned).
+            wallet (str): Restrict to one wallet.
+
+        Returns:
+            tuple: (entries, next_cursor); next_cursor is None on the last page.
+        """
+        query = "SELECT id, entry FROM history"
+        clauses, params = [], []
+        if wallet is not None:
+            clauses.append("wallet = ?")
+            params.append(wallet.lower())
+        if before is not None:
+            clauses.append("id < ?")
+            params.append(before)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(limit + 1)
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        next_cursor = rows[limit - 1][0] if len(rows) > limit else None
+        return [json.loads(entry) for _, entry in rows[:limit]], next_cursor
+
+    def latest(self, limit: int = 5) -> list:
+        return self.page(limit)[0]
+
+    def by_wallet(self, wallet: str, limit: int = 20) -> list:
+        return self.page(limit, wallet=wallet)[0]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+
+    def apply_retention(self) -> int:
+        """Delete rows beyond `max_entries` / older than `max_age`; returns rows deleted."""
+        deleted = 0
+        with self._lock:
+            if self.max_age is not None:
+                cur = self._conn.execute("DELETE FROM history WHERE created_at < ?", (time.time() - self.max_age,))
+                deleted += cur.rowcount
+            if self.max_entries is not None:
+                cur = self._conn.execute(
+                    "DELETE FROM history WHERE id <= "
+                    "(SELECT id FROM history ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+                deleted += cur.rowcount
+            self._conn.commit()
+        return deleted
+
+    def compact(self):
+        """Apply retention and reclaim the freed pages on disk."""
+        self.apply_retention()
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._conn.execute("VACUUM")
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM history")
+            self._conn.commit()
+
+    def import_json(self, path: str) -> int:
+        """
+        One-off migration of a legacy newest-first `history.json`.
+
+        The source is recorded in the store so it is imported only once; the
+        file itself is left untouched.
+
+        Returns:
+            int: Entries imported.
+        """
+        source = os.path.abspath(path)
+        try:
+            with open(path, "r") as f:
+                history = json.load(f)
+        except FileNotFoundError:
+            return 0
+        now = time.time()
+        rows = [(entry["wallet"].lower(), entry.get("score"), entry.get("risk_level"), now, json.dumps(entry))
+                for entry in reversed(history)]  # oldest first so ids keep the order
+        with self._lock:
+            # The imports row and the entries commit together, so concurrent processes import once
+            cur = self._conn.execute("INSERT OR IGNORE INTO imports (source, imported_at) VALUES (?, ?)",
+                                     (source, now))
+            if cur.rowcount == 0:
+                self._conn.rollback()
+                return 0
+            self._conn.executemany(
+                "INSERT INTO history (wallet, score, risk_level, created_at, entry) VALUES (?, ?, ?, ?, ?)", rows
+            )
+            self._conn.commit()
+        return len(rows)
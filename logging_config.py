@@ -0,0 +1,70 @@
+# logging_config.py
+
+"""
+Process-wide logging setup for the entry points (Streamlit pages, scoring
+service, CLI tools). Library modules only call `logging.getLogger(__name__)`.
+
+- LOG_LEVEL: DEBUG | INFO (default) | WARNING | ERROR. DEBUG adds per-page
+  Etherscan sync lines and per-stage timings.
+- LOG_FORMAT: "text" (default) or "json" (one object per line, with any
+  `extra=` fields such as `stage` / `duration_ms` / `wallet`).
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+
+from dotenv import load_dotenv
+
+load_dotenv()
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+
+# Attributes every LogRecord has; anything else came from `extra=`
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message, plus `extra=` fields."""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update({k: v for k, v in vars(record).items() if k not in _RECORD_FIELDS})
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+_configured = False
+_configure_lock = threading.Lock()
+
+
+def configure_logging(level: str = None, fmt: str = None):
+    """
+    Attach one stderr handler to the root logger (once per process; Streamlit
+    reruns and repeated imports are no-ops).
+
+    Args:
+        level (str): Log level name (default LOG_LEVEL).
+        fmt (str): "text" or "json" (default LOG_FORMAT).
+    """
+    global _configured
+    with _configure_lock:
+        if _configured:
+            return
+        _configured = True
+        handler = logging.StreamHandler(sys.stderr)
+        if (fmt or LOG_FORMAT) == "json":
+            handler.setFormatter(JSONFormatter())
+        else:
+            handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+        root = logging.getLogger()
+        root.addHandler(handler)
+        root.setLevel(level or LOG_LEVEL)
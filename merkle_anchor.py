@@ -0,0 +1,334 @@
+# merkle_anchor.py
+
+"""
+Merkle-batched anchoring of VC hashes.
+
+Instead of one `registerVC` transaction per credential, `AnchorBatcher`
+collects VC hashes for up to `max_wait` seconds or `max_batch` leaves,
+builds a Merkle tree and anchors only the root through the registry (one
+transaction per batch, sent via `RegistrationService`). Every credential
+gets an inclusion proof; `AnchorVerifier` checks a credential against a
+root the issuer anchored on-chain.
+
+Tree: sha256 with domain separation (leaf = H(0x00 || vc_hash),
+node = H(0x01 || left || right)) so an inner node can never be passed off
+as a leaf. An unpaired node at the end of a level is promoted unchanged
+(no duplication), so proofs may have fewer steps than the tree height.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+
+from vc_registration import FAILED, normalize_vc_hash
+
+load_dotenv()
+# First block worth scanning for anchored roots (the registry's deployment block)
+VC_REGISTRY_DEPLOY_BLOCK = int(os.getenv("VC_REGISTRY_DEPLOY_BLOCK", "0"))
+
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+# `score` value stored with anchored roots (registerVC needs one; roots are not scores)
+ANCHOR_SCORE = 0
+
+logger = logging.getLogger(__name__)
+
+
+def _to_bytes32(vc_hash) -> bytes:
+    """32 raw bytes of a hash; ValueError for anything else."""
+    try:
+        raw = bytes.fromhex(normalize_vc_hash(vc_hash)[2:])
+    except (AttributeError, TypeError) as e:
+        raise ValueError(f"not a 32-byte hash: {vc_hash!r}") from e
+    if len(raw) != 32:
+        raise ValueError(f"not a 32-byte hash: {vc_hash!r}")
+    return raw
+
+
+def leaf_hash(vc_hash) -> bytes:
+    return hashlib.sha256(LEAF_PREFIX + _to_bytes32(vc_hash)).digest()
+
+
+class MerkleTree:
+    """
+    Merkle tree over VC hashes (hex strings or 32-byte values).
+
+    All levels are kept so proofs are O(log n) lookups.
+    """
+
+    def __init__(self, vc_hashes):
+        sha256 = hashlib.sha256
+        level = [sha256(LEAF_PREFIX + _to_bytes32(h)).digest() for h in vc_hashes]
+        if not level:
+            raise ValueError("cannot build a Merkle tree with no leaves")
+        self.levels = [level]
+        while len(level) > 1:
+            pairs = len(level) - 1
+            parent = [sha256(NODE_PREFIX + level[i] + level[i + 1]).digest() for i in range(0, pairs, 2)]
+            if len(level) % 2:
+                parent.append(level[-1])
+            self.levels.append(parent)
+            level = parent
+
+    def __len__(self):
+        return len(self.levels[0])
+
+    @property
+    def root(self) -> bytes:
+        return self.levels[-1][0]
+
+    def proof(self, index: int) -> list:
+        """
+        Inclusion proof for leaf `index`.
+
+        Returns:
+            list: `[side, sibling_hex]` steps from the leaf up, side being "L" when the
+            sibling is on the left.
+        """
+        steps = []
+        for level in self.levels[:-1]:
+            sibling = index ^ 1
+            if sibling < len(level):
+                steps.append(["L" if sibling < index else "R", "0x" + level[sibling].hex()])
+            index //= 2
+        return steps
+
+
+def root_from_proof(vc_hash, proof) -> bytes:
+    node = leaf_hash(vc_hash)
+    for side, sibling in proof:
+        sibling = _to_bytes32(sibling)
+        node = hashlib.sha256(NODE_PREFIX + (sibling + node if side == "L" else node + sibling)).digest()
+    return node
+
+
+def verify_proof(vc_hash, proof, root) -> bool:
+    """Check an inclusion proof against a root (off-chain only); False for a malformed proof."""
+    try:
+        return root_from_proof(vc_hash, proof) == _to_bytes32(root)
+    except (ValueError, TypeError):
+        return False
+
+
+class AnchorTicket:
+    """A VC hash waiting for (or included in) an anchored batch."""
+
+    def __init__(self, vc_hash: str, on_anchored=None):
+        self.vc_hash = vc_hash
+        self.on_anchored = on_anchored
+        self.index = None
+        self.tree = None
+        self.registration = None
+        self.error = None
+        self.ready = threading.Event()
+
+    @property
+    def status(self) -> str:
+        if self.error is not None:
+            return FAILED
+        if self.registration is None:
+            return "queued"
+        return self.registration.status
+
+    def receipt(self) -> dict:
+        """Proof bundle handed to the credential holder (None until the batch is sent)."""
+        if self.tree is None:
+            return None
+        reg = self.registration
+        return {
+            "vc_hash": self.vc_hash,
+            "root": "0x" + self.tree.root.hex(),
+            "leaf_index": self.index,
+            "leaf_count": len(self.tree),
+            "proof": self.tree.proof(self.index),
+            "anchor_tx": reg.tx_hash if reg else None,
+            "anchor_block": reg.block_number if reg else None,
+            "anchor_timestamp": reg.timestamp if reg else None,
+            "status": self.status,
+        }
+
+    def wait(self, timeout: float = None) -> dict:
+        """Block until the batch containing this hash has been sent; returns `receipt()`."""
+        self.ready.wait(timeout)
+        return self.receipt()
+
+
+class AnchorBatcher:
+    """
+    Accumulate VC hashes and anchor one Merkle root per window.
+
+    Args:
+        registration_service (RegistrationService): Sends the root transactions.
+        max_batch (int): Leaves per batch; a full batch is flushed immediately.
+        max_wait (float): Seconds the oldest queued hash may wait before a flush.
+    """
+
+    def __init__(self, registration_service, max_batch: int = 1024, max_wait: float = 30.0):
+        self.registration_service = registration_service
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.batches_sent = 0
+        self._queue = []
+        self._oldest = None
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._flusher = threading.Thread(target=self._run, name="merkle-anchor", daemon=True)
+        self._flusher.start()
+
+    def add(self, vc_hash, on_anchored=None) -> AnchorTicket:
+        """
+        Queue a VC hash for the next batch.
+
+        Args:
+            vc_hash: VC hash (hex string or 32 bytes).
+            on_anchored (callable): Called with the receipt dict once the root is confirmed
+                (or failed); runs on the batcher's thread.
+        """
+        ticket = AnchorTicket(normalize_vc_hash(vc_hash), on_anchored)
+        with self._cond:
+            if not self._queue:
+                self._oldest = time.monotonic()
+            self._queue.append(ticket)
+            if len(self._queue) >= self.max_batch:
+                self._cond.notify()
+        return ticket
+
+    def flush(self):
+        """Anchor whatever is queued now (no-op when empty)."""
+        with self._cond:
+            batch, self._queue = self._queue, []
+        if batch:
+            self._anchor(batch)
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        self._flusher.join(timeout=5)
+        self.flush()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopped:
+                    if len(self._queue) >= self.max_batch:
+                        break
+                    if self._queue and time.monotonic() - self._oldest >= self.max_wait:
+                        break
+                    timeout = self.max_wait if not self._queue else self.max_wait - (time.monotonic() - self._oldest)
+                    self._cond.wait(max(timeout, 0.01))
+                if self._stopped:
+                    return
+                batch, self._queue = self._queue[:self.max_batch], self._queue[self.max_batch:]
+                self._oldest = time.monotonic() if self._queue else None
+            try:
+                self._anchor(batch)
+            except Exception as e:
+                logger.error("⚠️ Merkle anchoring failed: %s", e)
+
+    def _anchor(self, batch):
+        try:
+            tree = MerkleTree([t.vc_hash for t in batch])
+        except Exception as e:
+            for ticket in batch:
+                ticket.error = str(e)
+                ticket.ready.set()
+            raise
+        registration = self.registration_service.submit(tree.root, ANCHOR_SCORE)
+        self.batches_sent += 1
+        for index, ticket in enumerate(batch):
+            ticket.index = index
+            ticket.tree = tree
+            ticket.registration = registration
+            if registration.status == FAILED:
+                ticket.error = registration.error
+            ticket.ready.set()
+
+        callbacks = [t for t in batch if t.on_anchored is not None]
+        if callbacks:
+            threading.Thread(target=self._notify, args=(registration, callbacks), daemon=True).start()
+
+    def _notify(self, registration, tickets):
+        registration.done.wait()
+        for ticket in tickets:
+            try:
+                ticket.on_anchored(ticket.receipt())
+            except Exception as e:
+                logger.exception("⚠️ Anchor callback failed for %s: %s", ticket.vc_hash, e)
+
+
+class AnchorVerifier:
+    """
+    Verify credentials against roots anchored on-chain by `issuer`.
+
+    A root counts as anchored if the registry emitted `VCRegistered(issuer, root, ...)`.
+    With the receipt's `anchor_block` that is one `eth_getLogs` for that block.
+    Without it the issuer's logs are scanned from `deploy_block`, once: the
+    scanned high-water mark is kept, so later misses (unknown or forged roots)
+    only read blocks mined since. Seen roots are cached either way.
+
+    Args:
+        w3 (Web3): Web3 instance.
+        contract: VCRegistry contract object.
+        issuer (str): Address that anchors the roots.
+        deploy_block (int): First block that can hold an anchor (VC_REGISTRY_DEPLOY_BLOCK).
+    """
+
+    def __init__(self, w3, contract, issuer: str, deploy_block: int = VC_REGISTRY_DEPLOY_BLOCK):
+        from web3 import Web3
+        from vc_reader import LOG_BLOCK_RANGE, VC_REGISTERED_TOPIC
+
+        self.w3 = w3
+        self.contract = contract
+        self.issuer = Web3.to_checksum_address(issuer)
+        self._topics = [VC_REGISTERED_TOPIC, "0x" + "00" * 12 + self.issuer[2:].lower()]
+        self._block_range = LOG_BLOCK_RANGE
+        self._anchored = set()
+        self._scanned = deploy_block - 1  # last block read by the full scan
+        self._lock = threading.Lock()
+
+    def _read_logs(self, start: int, end: int):
+        for frm in range(start, end + 1, self._block_range):
+            logs = self.w3.eth.get_logs({
+                "address": self.contract.address,
+                "topics": self._topics,
+                "fromBlock": frm,
+                "toBlock": min(frm + self._block_range - 1, end),
+            })
+            for log in logs:
+                anchored_root = bytes(log["data"])[:32] if isinstance(log["data"], (bytes, bytearray)) \
+                    else bytes.fromhex(log["data"][2:66])
+                self._anchored.add(anchored_root)
+
+    def is_anchored(self, root, block_number: int = None) -> bool:
+        """True if the issuer anchored `root` (in `block_number`, when given); False for a malformed root."""
+        try:
+            root = _to_bytes32(root)
+        except ValueError:
+            return False
+        with self._lock:
+            if root in self._anchored:
+                return True
+            if block_number is not None:
+                self._read_logs(block_number, block_number)
+            else:
+                latest = self.w3.eth.block_number
+                if latest > self._scanned:
+                    self._read_logs(self._scanned + 1, latest)
+                    self._scanned = latest
+            return root in self._anchored
+
+    def verify(self, vc_hash, receipt: dict) -> bool:
+        """True if `vc_hash` is in the receipt's tree and that root was anchored by the issuer."""
+        try:
+            if _to_bytes32(vc_hash) != _to_bytes32(receipt["vc_hash"]):
+                return False
+        except (ValueError, KeyError):
+            return False
+        if not verify_proof(vc_hash, receipt.get("proof"), receipt.get("root")):
+            return False
+        return self.is_anchored(receipt["root"], receipt.get("anchor_block"))
@@ -0,0 +1,293 @@
+# metrics.py
+
+"""
+Per-stage timings and counters in the Prometheus text format.
+
+Every pipeline stage is wrapped in `timed(stage)`, which records its wall
+time in the `trust_stage_duration_seconds{stage=...}` histogram and counts
+exceptions in `trust_stage_errors_total{stage=...}`:
+
+    fetch, parse, did, kyc, score, vc_issue, qr, chart, tx_submit, receipt_wait
+
+The registry is process-wide and thread-safe. It is exported by
+scoring_service.py at `GET /metrics`, and by `start_exporter()` (called from
+resources.init_observability by the Streamlit pages):
+
+- METRICS_PORT: serve `/metrics` over HTTP on this port, bound to METRICS_HOST
+  (default 127.0.0.1; the metrics carry wallet-level stage data, so expose
+  them to other hosts only deliberately).
+- METRICS_FILE: rewrite this file every METRICS_FILE_INTERVAL seconds and at
+  exit (atomic replace; suits node_exporter's textfile collector).
+"""
+
+import atexit
+import bisect
+import functools
+import http.server
+import logging
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = os.getenv("METRICS_PORT")
+METRICS_FILE = os.getenv("METRICS_FILE")
+METRICS_FILE_INTERVAL = float(os.getenv("METRICS_FILE_INTERVAL", "15"))
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Seconds; spans cache hits (sub-ms) to slow Etherscan syncs and receipt waits
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+                   30.0, 60.0, 120.0, 300.0)
+
+logger = logging.getLogger(__name__)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    """Monotonic counter, optionally split by labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels.get(n, "") for n in self.label_names)
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram, optionally split by labels."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # labels → [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(n, "") for n in self.label_names)
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            series[slot] += 1
+            series[-1] += value
+
+    def count(self, **labels) -> int:
+        key = tuple(labels.get(n, "") for n in self.label_names)
+        with self._lock:
+            series = self._series.get(key)
+            return sum(series[:-1]) if series else 0
+
+    def samples(self):
+        with self._lock:
+            series = sorted((k, list(v)) for k, v in self._series.items())
+        for key, counts in series:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = 'le="%s"' % ("+Inf" if bound == float("inf") else repr(float(bound)))
+                yield f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}"
+            labels = _format_labels(self.label_names, key)
+            yield f"{self.name}_sum{labels} {_format_value(counts[-1])}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class Registry:
+    """Named metrics, rendered together."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labels=()) -> Counter:
+        return self._register(Counter(name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+STAGE_SECONDS = REGISTRY.histogram("trust_stage_duration_seconds", "Wall time per pipeline stage.", ("stage",))
+STAGE_ERRORS = REGISTRY.counter("trust_stage_errors_total", "Pipeline stages that raised.", ("stage",))
+
+
+class timed:
+    """
+    Time a stage, as a context manager or a decorator:
+
+        with timed("fetch"):
+            ...
+
+        @timed("score")
+        def calculate_score(...): ...
+    """
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self._start = None
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self._start
+        STAGE_SECONDS.observe(elapsed, stage=self.stage)
+        if exc_type is not None:
+            STAGE_ERRORS.inc(stage=self.stage)
+        logger.debug("⏱️ %s took %.1f ms", self.stage, elapsed * 1000,
+                     extra={"stage": self.stage, "duration_ms": round(elapsed * 1000, 3)})
+        return False
+
+    def __call__(self, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            # A fresh timer per call, so concurrent calls don't share a start time
+            with timed(self.stage):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+
+def observe_stage(stage: str, seconds: float):
+    """Record a stage duration measured elsewhere (e.g. across threads)."""
+    STAGE_SECONDS.observe(seconds, stage=stage)
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+def write_textfile(path: str = None):
+    """Write the current metrics to `path` (default METRICS_FILE), replacing it atomically."""
+    path = path or METRICS_FILE
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        f.write(render())
+    os.replace(tmp, path)
+
+
+class _MetricsHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0].rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        data = render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logger.debug("metrics scrape: " + format, *args)
+
+
+def _write_periodically(path: str, interval: float):
+    while True:
+        time.sleep(interval)
+        try:
+            write_textfile(path)
+        except OSError as e:
+            logger.warning("⚠️ Could not write metrics to %s: %s", path, e)
+
+
+_exporter_started = False
+_exporter_lock = threading.Lock()
+
+
+def start_exporter(port=None, path: str = None, interval: float = None, host: str = None):
+    """
+    Start the configured exporters once per process (no-op when neither is set).
+
+    Args:
+        port (int): HTTP port for `/metrics` (default METRICS_PORT).
+        path (str): Text file to keep updated (default METRICS_FILE).
+        interval (float): Seconds between file writes (default METRICS_FILE_INTERVAL).
+        host (str): Interface the HTTP endpoint binds to (default METRICS_HOST).
+    """
+    global _exporter_started
+    host = host or METRICS_HOST
+    port = port or METRICS_PORT
+    path = path or METRICS_FILE
+    with _exporter_lock:
+        if _exporter_started:
+            return
+        _exporter_started = True
+        if port:
+            try:
+                server = http.server.ThreadingHTTPServer((host, int(port)), _MetricsHandler)
+            except OSError as e:
+                # Another process (e.g. a second Streamlit page) already serves this port
+                logger.warning("⚠️ Metrics endpoint not started on port %s: %s", port, e)
+            else:
+                threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+                logger.info("📊 Metrics on http://%s:%s/metrics", host, server.server_address[1])
+        if path:
+            threading.Thread(target=_write_periodically, args=(path, interval or METRICS_FILE_INTERVAL),
+                             name="metrics-file", daemon=True).start()
+            atexit.register(write_textfile, path)
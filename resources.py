@@ -0,0 +1,133 @@
+# resources.py
+
+"""
+Process-wide, lazily created resources shared by app.py, agent.py and dashboard.py.
+
+Streamlit re-executes the entry script on every interaction, but imported
+modules stay in `sys.modules`, so anything memoized here is built once per
+server process and reused by every session and rerun (the same lifetime as
+`st.cache_resource`, without pulling Streamlit into headless callers such as
+evaluator.py). Heavy imports (web3, matplotlib) happen inside the factories,
+so the first paint does not wait for them; `prewarm()` loads them in the
+background while the user is still typing.
+"""
+
+import functools
+import json
+import logging
+import os
+import threading
+
+from dotenv import load_dotenv
+
+load_dotenv()
+PRIVATE_KEY = os.getenv("PRIVATE_KEY")
+RPC_URL = os.getenv("SEPOLIA_RPC_URL")
+VC_REGISTRY_ADDRESS = os.getenv("VC_REGISTRY_ADDRESS")
+ABI_PATH = os.getenv("VC_REGISTRY_ABI_PATH", "VCRegistryABI.json")
+
+# "direct": one registerVC tx per credential; "merkle": batch VC hashes and anchor one root per window
+VC_ANCHOR_MODE = os.getenv("VC_ANCHOR_MODE", "direct")
+ANCHOR_MAX_BATCH = int(os.getenv("ANCHOR_MAX_BATCH", "1024"))
+ANCHOR_MAX_WAIT = float(os.getenv("ANCHOR_MAX_WAIT", "30"))
+
+HISTORY_FILE = "history.json"  # legacy file, imported into the store once
+HISTORY_DB_PATH = os.getenv("HISTORY_DB_PATH", ".cache/history.sqlite")
+HISTORY_MAX_ENTRIES = int(os.getenv("HISTORY_MAX_ENTRIES", "10000"))
+HISTORY_MAX_AGE_DAYS = os.getenv("HISTORY_MAX_AGE_DAYS")
+
+logger = logging.getLogger(__name__)
+
+
+def resource(factory):
+    """Memoize a zero-argument factory for the life of the process (thread-safe, built once)."""
+    lock = threading.Lock()
+    instance = []
+
+    @functools.wraps(factory)
+    def get():
+        if not instance:
+            with lock:
+                if not instance:
+                    instance.append(factory())
+        return instance[0]
+
+    get.clear = instance.clear
+    return get
+
+
+@resource
+def init_observability():
+    """Configure logging (LOG_LEVEL/LOG_FORMAT) and start the metrics exporters (METRICS_PORT/METRICS_FILE)."""
+    from logging_config import configure_logging
+    from metrics import start_exporter
+    configure_logging()
+    start_exporter()
+    return True
+
+
+@resource
+def get_web3():
+    from web3 import Web3
+    return Web3(Web3.HTTPProvider(RPC_URL))
+
+
+@resource
+def get_registry_abi():
+    with open(ABI_PATH) as f:
+        return json.load(f)
+
+
+@resource
+def get_contract():
+    from web3 import Web3
+    return get_web3().eth.contract(address=Web3.to_checksum_address(VC_REGISTRY_ADDRESS), abi=get_registry_abi())
+
+
+@resource
+def get_registration_service():
+    """One local nonce sequence and background receipt tracker per process."""
+    from vc_registration import get_registration_service as service_for
+    return service_for(get_web3(), get_contract(), PRIVATE_KEY)
+
+
+@resource
+def get_anchor_batcher():
+    from merkle_anchor import AnchorBatcher
+    return AnchorBatcher(get_registration_service(), max_batch=ANCHOR_MAX_BATCH, max_wait=ANCHOR_MAX_WAIT)
+
+
+@resource
+def get_vc_reader():
+    from vc_reader import get_vc_reader as reader_for
+    return reader_for(get_web3(), get_contract())
+
+
+@resource
+def get_history_store():
+    from history_store import HistoryStore
+    store = HistoryStore(
+        HISTORY_DB_PATH,
+        max_entries=HISTORY_MAX_ENTRIES,
+        max_age=float(HISTORY_MAX_AGE_DAYS) * 86400 if HISTORY_MAX_AGE_DAYS else None,
+    )
+    store.import_json(HISTORY_FILE)
+    return store
+
+
+def _warm_up():
+    try:
+        import visualizer
+        visualizer.warm_up()
+        get_contract()
+        import vc_reader, vc_registration  # noqa: F401
+    except Exception as e:
+        logger.warning("⚠️ Resource warm-up failed: %s", e)
+
+
+@resource
+def prewarm():
+    """Start loading web3/matplotlib and building the contract on a daemon thread (once per process)."""
+    thread = threading.Thread(target=_warm_up, name="prewarm", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,89 @@
+# rpc_batch.py
+
+"""
+Minimal JSON-RPC batch client.
+
+web3.py 6 has no batch support, so bulk reads (eth_call for many wallets,
+eth_getBlockByNumber for a range of blocks, ...) go through here as one HTTP
+POST per chunk instead of one round trip per call.
+"""
+
+import itertools
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class JSONRPCError(Exception):
+    """An individual call in a batch (or the whole batch) failed."""
+
+
+class BatchRPCClient:
+    """
+    Args:
+        url (str): HTTP JSON-RPC endpoint.
+        max_batch (int): Calls per HTTP request (providers cap this, often at 100-1000).
+        timeout (float): Seconds per HTTP request.
+    """
+
+    def __init__(self, url: str, max_batch: int = 100, timeout: float = 20.0):
+        self.url = url
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self.requests_sent = 0
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_maxsize=16))
+        self.session.mount("https://", HTTPAdapter(pool_maxsize=16))
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _next_id(self) -> int:
+        with self._lock:
+            return next(self._ids)
+
+    def call(self, method: str, params: list):
+        """Single call; raises JSONRPCError on error."""
+        result = self.batch([(method, params)])[0]
+        if isinstance(result, JSONRPCError):
+            raise result
+        return result
+
+    def batch(self, calls) -> list:
+        """
+        Execute `(method, params)` calls, chunked into batches of `max_batch`.
+
+        Returns:
+            list: One entry per call, in order: the `result` value, or a
+            JSONRPCError instance for calls that failed individually.
+
+        Raises:
+            JSONRPCError: a whole HTTP request failed.
+        """
+        calls = list(calls)
+        results = []
+        for start in range(0, len(calls), self.max_batch):
+            chunk = calls[start:start + self.max_batch]
+            payload = [{"jsonrpc": "2.0", "id": self._next_id(), "method": method, "params": params}
+                       for method, params in chunk]
+            try:
+                resp = self.session.post(self.url, json=payload, timeout=self.timeout)
+                resp.raise_for_status()
+                body = resp.json()
+            except (requests.RequestException, ValueError) as e:
+                raise JSONRPCError(f"batch request failed: {e}") from e
+            self.requests_sent += 1
+
+            if isinstance(body, dict):
+                # Some nodes answer a rejected batch with a single error object
+                raise JSONRPCError(str(body.get("error", body)))
+            by_id = {item.get("id"): item for item in body}
+            for request in payload:
+                item = by_id.get(request["id"])
+                if item is None:
+                    results.append(JSONRPCError("missing response"))
+                elif "error" in item:
+                    results.append(JSONRPCError(str(item["error"])))
+                else:
+                    results.append(item.get("result"))
+        return results
@@ -1,5 +1,13 @@
 # score_calculator.py
 
+import logging
+
+from metrics import timed
+
+logger = logging.getLogger(__name__)
+
+
+@timed("score")
 def calculate_score(onchain_data: dict, did_info: dict, kyc_passed: bool) -> float:
     """
     Calculate a trust score based on on-chain data, DID credentials, and zk-KYC status.
@@ -8,8 +16,10 @@ def calculate_score(onchain_data: dict, did_info: dict, kyc_passed: bool) -> flo
     - zk-KYC: 40 pts
     - Verifiable Credential (VC): 20 pts
     - Transaction count: max 20 pts (0.1 pt per tx, capped at 200 txs)
-    - Unique contract interactions: max 20 pts (2 pts each, capped at 10)
-    - Risky contract interaction: -10 pts
+    - Unique contract interactions: max 20 pts (2 pts each, capped at 10); counterparties of
+      normal, internal, ERC-20 and NFT transfers the wallet sent (see wallet_sync.merge_features;
+      received transfers and airdrops do not count)
+    - Risky contract interaction (any of those outgoing transfers): -10 pts
 
     Returns:
         A float score between 0 and 100.
@@ -27,7 +37,112 @@ def calculate_score(onchain_data: dict, did_info: dict, kyc_passed: bool) -> flo
 
     # ⚠️ Penalty for risky interactions
     if onchain_data.get("interacted_with_risky_contract", False):
-        print("⚠️ Wallet interacted with risky contract. -10 pts")
+        logger.info("⚠️ Wallet interacted with risky contract. -10 pts")
         score -= 10
 
     return round(min(max(score, 0), 100), 1)  # Clamp to [0, 100]
+
+
+def get_risk_level(score: float) -> str:
+    """
+    Map a trust score to the risk level shown in the UIs and stored in the VC.
+
+    Returns:
+        "low" (> 75), "medium" (> 50) or "high".
+    """
+    return "low" if score > 75 else "medium" if score > 50 else "high"
+
+
+RISK_COLORS = {"low": "green", "medium": "orange", "high": "red"}
+
+
+def score_breakdown(onchain_data: dict, did_info: dict, kyc_passed: bool) -> dict:
+    """
+    Per-component points behind `calculate_score`.
+
+    Returns:
+        dict: kyc_points, vc_points, tx_points, contract_points, risky_penalty
+        (a positive number that is subtracted) and total (== calculate_score).
+    """
+    return {
+        "kyc_points": 40 if kyc_passed else 0,
+        "vc_points": 20 if did_info.get("vc_issued") else 0,
+        "tx_points": min(onchain_data.get("tx_count", 0) / 10, 20),
+        "contract_points": min(onchain_data.get("unique_contracts_interacted", 0) * 2, 20),
+        "risky_penalty": 10 if onchain_data.get("interacted_with_risky_contract", False) else 0,
+        "total": calculate_score(onchain_data, did_info, kyc_passed),
+    }
+
+
+def breakdown_lines(breakdown: dict) -> list:
+    """Human-readable lines for a `score_breakdown` result, as shown in the UIs."""
+    lines = [
+        f"{'✅' if breakdown['kyc_points'] else '❌'} zk‑KYC: +{breakdown['kyc_points']}",
+        f"{'✅' if breakdown['vc_points'] else '❌'} Verifiable Credential: +{breakdown['vc_points']}",
+        f"🔸 Transactions: +{round(breakdown['tx_points'], 1)} / 20",
+        f"🔸 Unique contracts: +{breakdown['contract_points']} / 20",
+    ]
+    if breakdown["risky_penalty"]:
+        lines.append(f"⚠️ Risky contract interaction: -{breakdown['risky_penalty']}")
+    return lines
+
+
+def features_to_columns(records) -> dict:
+    """
+    Convert a list of feature dicts into the columns `calculate_scores_batch` takes.
+
+    Each record holds `tx_count`, `unique_contracts_interacted`,
+    `interacted_with_risky_contract`, `zk_kyc_passed` and `vc_issued`
+    (missing keys count as 0/False).
+    """
+    import numpy as np
+
+    return {
+        "tx_count": np.fromiter((r.get("tx_count", 0) for r in records), dtype=np.int64),
+        "unique_contracts": np.fromiter((r.get("unique_contracts_interacted", 0) for r in records), dtype=np.int64),
+        "risky": np.fromiter((bool(r.get("interacted_with_risky_contract", False)) for r in records), dtype=bool),
+        "kyc_passed": np.fromiter((bool(r.get("zk_kyc_passed", False)) for r in records), dtype=bool),
+        "vc_issued": np.fromiter((bool(r.get("vc_issued", False)) for r in records), dtype=bool),
+    }
+
+
+def calculate_scores_batch(tx_count, unique_contracts, risky, kyc_passed, vc_issued) -> dict:
+    """
+    Vectorized `calculate_score` over columns of equal length.
+
+    The arithmetic mirrors the scalar function operation for operation in
+    float64, so every score is bit-for-bit identical to `calculate_score`.
+
+    Args:
+        tx_count, unique_contracts: integer arrays.
+        risky, kyc_passed, vc_issued: boolean arrays.
+
+    Returns:
+        dict of arrays: score, risk_level, and the `score_breakdown` components
+        (kyc_points, vc_points, tx_points, contract_points, risky_penalty).
+    """
+    import numpy as np
+
+    tx_count = np.asarray(tx_count, dtype=np.int64)
+    unique_contracts = np.asarray(unique_contracts, dtype=np.int64)
+    risky = np.asarray(risky, dtype=bool)
+
+    kyc_points = np.where(np.asarray(kyc_passed, dtype=bool), 40.0, 0.0)
+    vc_points = np.where(np.asarray(vc_issued, dtype=bool), 20.0, 0.0)
+    tx_points = np.minimum(tx_count / 10, 20.0)
+    contract_points = np.minimum(unique_contracts * 2, 20).astype(np.float64)
+    risky_penalty = np.where(risky, 10.0, 0.0)
+
+    score = (kyc_points + vc_points) + (tx_points + contract_points)
+    score = np.where(risky, score - risky_penalty, score)
+    score = np.round(np.clip(score, 0, 100), 1)
+
+    return {
+        "score": score,
+        "risk_level": np.where(score > 75, "low", np.where(score > 50, "medium", "high")),
+        "kyc_points": kyc_points,
+        "vc_points": vc_points,
+        "tx_points": tx_points,
+        "contract_points": contract_points,
+        "risky_penalty": risky_penalty,
+    }
@@ -0,0 +1,285 @@
+# scoring_service.py
+
+"""
+Headless HTTP/JSON scoring service.
+
+Exposes the evaluate pipeline (get_wallet_data → resolve_did → check_kyc →
+calculate_score, optionally issue_vc) to backend callers:
+
+    GET  /score/<wallet>[?vc=1]
+    POST /score            {"wallet": "0x...", "issue_vc": false}
+    POST /verify           {"credentials": [<signed VC>, ...]}
+    GET  /health
+    GET  /stats
+    GET  /metrics          Prometheus text (per-stage timings, see metrics.py)
+
+Built on asyncio streams (no extra dependencies). Evaluations run on a
+bounded thread pool; concurrent requests for the same wallet share one
+in-flight evaluation (single-flight), and once `max_pending` distinct
+evaluations and /verify batches are queued or running new ones are rejected
+with 503 + Retry-After instead of piling up.
+
+    python scoring_service.py --port 8700 --workers 16
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from dotenv import load_dotenv
+
+from etherscan_client import EtherscanError
+from evaluator import evaluate_wallet
+from logging_config import configure_logging
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, render as render_metrics, start_exporter
+
+load_dotenv()
+SCORING_HOST = os.getenv("SCORING_HOST", "127.0.0.1")
+SCORING_PORT = int(os.getenv("SCORING_PORT", "8700"))
+SCORING_WORKERS = int(os.getenv("SCORING_WORKERS", "8"))
+SCORING_MAX_PENDING = int(os.getenv("SCORING_MAX_PENDING", "256"))
+
+WALLET_RE = re.compile(r"^0x[0-9a-fA-F]{40}$")
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 64 * 1024
+
+logger = logging.getLogger(__name__)
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 502: "Bad Gateway", 503: "Service Unavailable",
+            500: "Internal Server Error"}
+
+
+class Overloaded(Exception):
+    """Too many evaluations or verifications are queued; the caller should retry later."""
+
+
+class ScoringService:
+    """
+    Args:
+        workers (int): Evaluations running at once (thread pool size).
+        max_pending (int): Distinct evaluations plus /verify batches queued or running before
+            new ones get 503.
+        evaluate (callable): Pipeline for one wallet (default: `evaluator.evaluate_wallet`).
+    """
+
+    def __init__(self, workers: int = SCORING_WORKERS, max_pending: int = SCORING_MAX_PENDING,
+                 evaluate=evaluate_wallet):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.evaluate = evaluate
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="score")
+        self._in_flight = {}
+        self._verifying = 0
+        self._started_at = time.monotonic()
+        self.stats = {"requests": 0, "evaluations": 0, "coalesced": 0, "rejected": 0, "errors": 0}
+
+    # --- evaluation --------------------------------------------------------
+
+    def _admit(self):
+        """Raise `Overloaded` if `max_pending` jobs already hold the executor."""
+        pending = len(self._in_flight) + self._verifying
+        if pending >= self.max_pending:
+            self.stats["rejected"] += 1
+            raise Overloaded(f"{pending} evaluations or verifications pending")
+
+    async def score(self, wallet: str, with_vc: bool = False) -> dict:
+        """
+        Evaluate a wallet, joining an in-flight evaluation of the same wallet if there is one.
+
+        Raises:
+            Overloaded: `max_pending` evaluations are already queued or running.
+        """
+        key = wallet.lower()
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.stats["coalesced"] += 1
+        else:
+            self._admit()
+            self.stats["evaluations"] += 1
+            future = asyncio.get_running_loop().run_in_executor(self.executor, self.evaluate, wallet)
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+
+        # shield: one caller disconnecting must not cancel the shared evaluation
+        result = dict(await asyncio.shield(future))
+        result["wallet"] = wallet
+        if with_vc and not result.get("degraded"):  # a partial score is returned but never signed
+            from vc_issuer import issue_vc
+            # off the event loop: the first call also loads (or creates) the issuer key file
+            result["vc"] = await asyncio.get_running_loop().run_in_executor(
+                self.executor, issue_vc, wallet, result["score"], result["risk_level"], result["zk_kyc_passed"],
+                result["did_info"])
+        return result
+
+    async def verify(self, credentials: list) -> list:
+        """
+        Verify a batch of credentials on the executor.
+
+        Raises:
+            Overloaded: `max_pending` jobs are already queued or running.
+        """
+        from vc_signer import verify_many
+
+        self._admit()
+        self._verifying += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, verify_many, credentials)
+        finally:
+            self._verifying -= 1
+
+    def snapshot(self) -> dict:
+        return dict(self.stats, in_flight=len(self._in_flight), verifying=self._verifying, workers=self.workers,
+                    max_pending=self.max_pending, uptime_seconds=round(time.monotonic() - self._started_at, 1))
+
+    # --- HTTP ----------------------------------------------------------------
+
+    async def route(self, method: str, target: str, body: bytes):
+        """Return `(status, payload, extra_headers)` for one request."""
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        path = url.path.rstrip("/")
+
+        if path == "/health":
+            return 200, {"status": "ok"}, {}
+        if path == "/stats":
+            return 200, self.snapshot(), {}
+        if path == "/metrics":
+            return 200, render_metrics().encode(), {"Content-Type": METRICS_CONTENT_TYPE}
+
+        if path == "/score" or path.startswith("/score/"):
+            if method == "GET" and path.startswith("/score/"):
+                wallet = path[len("/score/"):]
+                with_vc = query.get("vc", ["0"])[0] in ("1", "true")
+            elif method == "POST" and path == "/score":
+                try:
+                    payload = json.loads(body or b"{}")
+                    wallet = payload["wallet"]
+                except (ValueError, KeyError, TypeError):
+                    return 400, {"error": 'expected JSON body {"wallet": "0x..."}'}, {}
+                with_vc = bool(payload.get("issue_vc", False))
+            else:
+                return 405, {"error": "use GET /score/<wallet> or POST /score"}, {}
+
+            if not isinstance(wallet, str) or not WALLET_RE.match(wallet):
+                return 400, {"error": f"invalid wallet address: {wallet!r}"}, {}
+            try:
+                return 200, await self.score(wallet, with_vc), {}
+            except Overloaded as e:
+                return 503, {"error": "overloaded", "detail": str(e)}, {"Retry-After": "1"}
+            except EtherscanError as e:
+                self.stats["errors"] += 1
+                return 502, {"error": "etherscan", "detail": str(e)}, {}
+            except Exception as e:
+                self.stats["errors"] += 1
+                return 500, {"error": str(e)}, {}
+
+        if path == "/verify":
+            if method != "POST":
+                return 405, {"error": "use POST /verify"}, {}
+            try:
+                credentials = json.loads(body or b"{}")["credentials"]
+                if not isinstance(credentials, list) or not all(isinstance(vc, dict) for vc in credentials):
+                    raise TypeError
+            except (ValueError, KeyError, TypeError):
+                return 400, {"error": 'expected JSON body {"credentials": [...]}'}, {}
+            try:
+                results = await self.verify(credentials)
+            except Overloaded as e:
+                return 503, {"error": "overloaded", "detail": str(e)}, {"Retry-After": "1"}
+            return 200, {"results": results, "valid": sum(results)}, {}
+
+        return 404, {"error": "not found"}, {}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve one connection (HTTP/1.1 keep-alive)."""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    return
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    return
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        name, value = line.split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+
+                try:
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    # The body cannot be skipped without a usable length, so the connection ends here
+                    status, payload, extra = 400, {"error": "Content-Length must be a non-negative integer"}, {}
+                    keep_alive = False
+                elif length > MAX_BODY_BYTES:
+                    status, payload, extra = 413, {"error": "body too large"}, {}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    self.stats["requests"] += 1
+                    status, payload, extra = await self.route(method.upper(), target, body)
+                    connection = headers.get("connection", "").lower()
+                    keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+
+                if isinstance(payload, bytes):
+                    data, content_type = payload, extra.pop("Content-Type")
+                else:
+                    data, content_type = json.dumps(payload).encode(), "application/json"
+                response = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}",
+                            f"Content-Type: {content_type}",
+                            f"Content-Length: {len(data)}",
+                            f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+                response += [f"{name}: {value}" for name, value in extra.items()]
+                writer.write(("\r\n".join(response) + "\r\n\r\n").encode() + data)
+                await writer.drain()
+                if not keep_alive:
+                    return
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = SCORING_HOST, port: int = SCORING_PORT, ready=None):
+        """Run until cancelled. `ready(port)` is called once the socket is listening."""
+        server = await asyncio.start_server(self.handle, host, port, limit=MAX_HEADER_BYTES)
+        bound_port = server.sockets[0].getsockname()[1]
+        if ready is not None:
+            ready(bound_port)
+        else:
+            logger.info("🛰️ Scoring service listening on http://%s:%s", host, bound_port)
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve wallet trust scores over HTTP.")
+    parser.add_argument("--host", default=SCORING_HOST)
+    parser.add_argument("--port", type=int, default=SCORING_PORT)
+    parser.add_argument("--workers", type=int, default=SCORING_WORKERS)
+    parser.add_argument("--max-pending", type=int, default=SCORING_MAX_PENDING)
+    args = parser.parse_args()
+
+    configure_logging()
+    start_exporter()
+    service = ScoringService(workers=args.workers, max_pending=args.max_pending)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
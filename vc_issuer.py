@@ -1,15 +1,21 @@
+import io
 import json
-import qrcode
 from datetime import datetime
 
+from metrics import timed
+from vc_signer import canonical_json, issuer_did, sign_credential, vc_hash  # noqa: F401 (re-exported)
+
+@timed("vc_issue")
 def issue_vc(wallet_address, score, risk_level, kyc_passed, did_info):
+    """Build the TrustScoreCredential and sign it with the issuer's Ed25519 key (see vc_signer)."""
+    issued = datetime.utcnow().isoformat() + "Z"
     vc = {
         "@context": ["https://www.w3.org/2018/credentials/v1"],
         "type": ["VerifiableCredential", "TrustScoreCredential"],
-        "issuer": did_info["did"],
-        "issuanceDate": datetime.utcnow().isoformat() + "Z",
+        "issuer": issuer_did(),
+        "issuanceDate": issued,
         "credentialSubject": {
-            "id": f"did:ethr:{wallet_address}",
+            "id": did_info.get("did") or f"did:ethr:{wallet_address}",
             "wallet": wallet_address,
             "zk_kyc_passed": kyc_passed,
             "score": score,
@@ -17,24 +23,19 @@ def issue_vc(wallet_address, score, risk_level, kyc_passed, did_info):
             "tx_count": None,
             "contracts_interacted": None,
         },
-        "proof": {
-            "type": "Ed25519Signature2020",
-            "created": datetime.utcnow().isoformat() + "Z",
-            "verificationMethod": did_info["verification_method"],
-            "proofPurpose": "assertionMethod",
-            "jws": "eyJ...simulated...signature...AbCdEf=="
-        }
     }
 
-    # ✅ Save VC to file
-    with open("credential.json", "w") as f:
-        json.dump(vc, f, indent=4)
-    print("📜 Verifiable Credential exported to credential.json ✅")
+    return sign_credential(vc, created=issued)
 
-    # ✅ Generate QR code
-    vc_json = json.dumps(vc)
-    qr = qrcode.make(vc_json)
-    qr.save("credential_qr.png")
-    print("🔳 QR code saved to credential_qr.png ✅")
+def credential_json(vc):
+    """credential.json contents as bytes."""
+    return json.dumps(vc, indent=4).encode()
 
-    return vc  # ✅ This is the fix
+@timed("qr")
+def credential_qr_png(vc):
+    """QR code of the compact VC JSON as PNG bytes (nothing is written to disk)."""
+    import qrcode
+    qr = qrcode.make(json.dumps(vc))
+    buf = io.BytesIO()
+    qr.save(buf)
+    return buf.getvalue()
@@ -0,0 +1,161 @@
+# vc_reader.py
+
+"""
+Bulk, cached reads of the VCRegistry.
+
+`VCRegistryReader.get_many` reads `getVC` for thousands of wallets using
+JSON-RPC batches (one HTTP request per `max_batch` wallets) and keeps the
+decoded records in an LRU cache. Cached entries never expire on a timer;
+instead `VCRegistered` events emitted since the last check invalidate
+exactly the wallets that changed.
+"""
+
+import logging
+import threading
+import time
+from collections import namedtuple
+
+from web3 import Web3
+
+from cache import LRUCache
+from rpc_batch import BatchRPCClient, JSONRPCError
+
+VCRecord = namedtuple("VCRecord", ["vc_hash", "score", "timestamp"])
+VCRecord.__doc__ = "On-chain VC record: vc_hash (32 bytes), score (0-255), timestamp (unix seconds)."
+
+EMPTY_RECORD = VCRecord(b"\x00" * 32, 0, 0)
+VC_REGISTERED_TOPIC = Web3.keccak(text="VCRegistered(address,bytes32,uint8,uint256)").hex()
+LOG_BLOCK_RANGE = 5_000
+
+logger = logging.getLogger(__name__)
+
+
+class VCRegistryReader:
+    """
+    Args:
+        w3 (Web3): Web3 instance (used for event polling and the unbatched fallback).
+        contract: VCRegistry contract object.
+        rpc_url (str): HTTP JSON-RPC endpoint for batching (default: the HTTPProvider's URL;
+            providers without one fall back to one `eth_call` per wallet).
+        max_batch (int): Calls per JSON-RPC batch.
+        cache_size (int): Records kept in the LRU cache.
+        invalidation_interval (float): Minimum seconds between `VCRegistered` log polls.
+    """
+
+    def __init__(self, w3, contract, rpc_url: str = None, max_batch: int = 100, cache_size: int = 100_000,
+                 invalidation_interval: float = 15.0):
+        self.w3 = w3
+        self.contract = contract
+        rpc_url = rpc_url or getattr(w3.provider, "endpoint_uri", None)
+        self.rpc = BatchRPCClient(rpc_url, max_batch=max_batch) if rpc_url else None
+        self.cache = LRUCache(max_entries=cache_size)
+        self.invalidation_interval = invalidation_interval
+        self.rpc_calls = 0
+        self._log_cursor = None
+        self._refreshed_at = 0.0
+        self._refresh_lock = threading.Lock()
+
+    def _decode(self, data) -> VCRecord:
+        raw = bytes(data) if isinstance(data, (bytes, bytearray)) else Web3.to_bytes(hexstr=data)
+        vc_hash, score, timestamp = self.w3.codec.decode(["bytes32", "uint8", "uint256"], raw)
+        return VCRecord(vc_hash, score, timestamp)
+
+    def _fetch(self, addresses) -> dict:
+        if self.rpc is None:
+            records = {}
+            for address in addresses:
+                self.rpc_calls += 1
+                records[address] = VCRecord(*self.contract.functions.getVC(address).call())
+            return records
+
+        calls = [("eth_call", [{"to": self.contract.address,
+                                "data": self.contract.encodeABI(fn_name="getVC", args=[address])}, "latest"])
+                 for address in addresses]
+        results = self.rpc.batch(calls)
+        self.rpc_calls += len(calls)
+        records = {}
+        for address, result in zip(addresses, results):
+            if isinstance(result, JSONRPCError):
+                logger.warning("⚠️ getVC failed for %s: %s", address, result)
+                continue
+            records[address] = self._decode(result)
+        return records
+
+    def refresh(self) -> set:
+        """
+        Invalidate cached wallets that emitted `VCRegistered` since the last poll.
+
+        Returns:
+            set: Checksum addresses that were invalidated.
+        """
+        with self._refresh_lock:
+            latest = self.w3.eth.block_number
+            if self._log_cursor is None:
+                self._log_cursor = latest
+                self._refreshed_at = time.monotonic()
+                return set()
+
+            changed = set()
+            for start in range(self._log_cursor, latest + 1, LOG_BLOCK_RANGE):
+                logs = self.w3.eth.get_logs({
+                    "address": self.contract.address,
+                    "topics": [VC_REGISTERED_TOPIC],
+                    "fromBlock": start,
+                    "toBlock": min(start + LOG_BLOCK_RANGE - 1, latest),
+                })
+                for log in logs:
+                    wallet = Web3.to_checksum_address(bytes(log["topics"][1])[-20:])
+                    changed.add(wallet)
+                    self.cache.invalidate(wallet)
+            # The cursor block is re-read next time: reads may have happened mid-block.
+            self._log_cursor = latest
+            self._refreshed_at = time.monotonic()
+            return changed
+
+    def get_many(self, wallets) -> dict:
+        """
+        Read VC records for many wallets.
+
+        Returns:
+            dict: checksum address -> VCRecord (EMPTY_RECORD-equal for wallets without a VC).
+            Wallets whose call failed are omitted.
+        """
+        if time.monotonic() - self._refreshed_at >= self.invalidation_interval:
+            self.refresh()
+
+        records = {}
+        missing = []
+        for wallet in wallets:
+            address = Web3.to_checksum_address(wallet)
+            record = self.cache.get(address)
+            if record is None:
+                missing.append(address)
+            else:
+                records[address] = record
+
+        if missing:
+            fetched = self._fetch(list(dict.fromkeys(missing)))
+            for address, record in fetched.items():
+                self.cache.set(address, record)
+            records.update(fetched)
+        return records
+
+    def get(self, wallet) -> VCRecord:
+        """Read one wallet's record (cached); raises if the call fails."""
+        address = Web3.to_checksum_address(wallet)
+        records = self.get_many([address])
+        if address not in records:
+            raise JSONRPCError(f"getVC failed for {address}")
+        return records[address]
+
+
+_readers = {}
+_readers_lock = threading.Lock()
+
+
+def get_vc_reader(w3, contract, **kwargs) -> VCRegistryReader:
+    """Process-wide reader per contract so the cache survives Streamlit reruns."""
+    with _readers_lock:
+        if contract.address not in _readers:
+            _readers[contract.address] = VCRegistryReader(w3, contract, **kwargs)
+        return _readers[contract.address]
@@ -0,0 +1,297 @@
+# vc_registration.py
+
+"""
+Pipelined on-chain VC registration.
+
+`RegistrationService` allocates nonces locally (so concurrent sessions in the
+same process never reuse one), submits `registerVC` transactions without
+waiting for them to be mined, and tracks receipts on a background thread.
+Transactions still pending after `stuck_after` seconds are re-sent with the
+same nonce and a bumped gas price. Status is queryable per VC hash.
+
+Works against any Web3 provider, including the in-process eth-tester chain:
+
+    w3 = Web3(Web3.EthereumTesterProvider())
+"""
+
+import logging
+import threading
+import time
+
+from web3 import Web3
+from web3.exceptions import TransactionNotFound
+
+from metrics import observe_stage, timed
+
+PENDING = "pending"
+SUBMITTED = "submitted"
+CONFIRMED = "confirmed"
+FAILED = "failed"
+
+# Nodes reject same-nonce replacements that bump the gas price by less than 10%.
+REPLACEMENT_BUMP = 1.125
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_vc_hash(vc_hash) -> str:
+    if isinstance(vc_hash, (bytes, bytearray)):
+        return "0x" + bytes(vc_hash).hex()
+    vc_hash = vc_hash.lower()
+    return vc_hash if vc_hash.startswith("0x") else "0x" + vc_hash
+
+
+class NonceManager:
+    """
+    Hands out consecutive nonces for one account without a node round trip per tx.
+
+    Seeded from the node's pending transaction count and re-synced after a
+    nonce error.
+    """
+
+    def __init__(self, w3, address):
+        self.w3 = w3
+        self.address = address
+        self._next = None
+        self._lock = threading.Lock()
+
+    def allocate(self) -> int:
+        with self._lock:
+            if self._next is None:
+                self._next = self.w3.eth.get_transaction_count(self.address, "pending")
+            nonce = self._next
+            self._next += 1
+            return nonce
+
+    def resync(self):
+        with self._lock:
+            self._next = self.w3.eth.get_transaction_count(self.address, "pending")
+
+
+class Registration:
+    """Status of one VC registration."""
+
+    def __init__(self, vc_hash: str, score: int, timestamp: int):
+        self.vc_hash = vc_hash
+        self.score = score
+        self.timestamp = timestamp
+        self.status = PENDING
+        self.nonce = None
+        self.gas_price = None
+        self.tx_hashes = []  # every attempt, newest last
+        self.tx_hash = None  # the attempt that was mined (or the latest one)
+        self.block_number = None
+        self.submitted_at = None  # latest attempt (reset by replacements)
+        self.first_sent_at = None
+        self.replacements = 0
+        self.error = None
+        self.done = threading.Event()
+
+    def as_dict(self) -> dict:
+        return {
+            "vc_hash": self.vc_hash,
+            "status": self.status,
+            "tx_hash": self.tx_hash,
+            "nonce": self.nonce,
+            "block_number": self.block_number,
+            "replacements": self.replacements,
+            "error": self.error,
+        }
+
+
+class RegistrationService:
+    """
+    Submit `registerVC` transactions back-to-back and track them in the background.
+
+    Args:
+        w3 (Web3): Connected Web3 instance.
+        contract: VCRegistry contract object.
+        private_key (str): Key of the registering account.
+        chain_id (int): Chain id (default: asked from the node once).
+        gas_limit (int): Gas limit per registration.
+        gas_price_multiplier (float): Applied to the node's gas price at submission.
+        stuck_after (float): Seconds without a receipt before a tx is replaced.
+        max_replacements (int): Replacement attempts before giving up.
+        poll_interval (float): Seconds between receipt polls.
+    """
+
+    def __init__(self, w3, contract, private_key, chain_id: int = None, gas_limit: int = 250000,
+                 gas_price_multiplier: float = 1.0, stuck_after: float = 90.0, max_replacements: int = 3,
+                 poll_interval: float = 2.0):
+        self.w3 = w3
+        self.contract = contract
+        self.account = w3.eth.account.from_key(private_key)
+        self.chain_id = chain_id
+        self.gas_limit = gas_limit
+        self.gas_price_multiplier = gas_price_multiplier
+        self.stuck_after = stuck_after
+        self.max_replacements = max_replacements
+        self.poll_interval = poll_interval
+        self.nonces = NonceManager(w3, self.account.address)
+
+        self._registrations = {}
+        self._in_flight = set()
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._tracker = threading.Thread(target=self._track, name="vc-receipts", daemon=True)
+        self._tracker.start()
+
+    # --- submission -------------------------------------------------------
+
+    def _sign_and_send(self, reg: Registration, gas_price: int) -> str:
+        tx = self.contract.functions.registerVC(
+            Web3.to_bytes(hexstr=reg.vc_hash),
+            int(reg.score),
+            reg.timestamp
+        ).build_transaction({
+            'chainId': self.chain_id,
+            'gas': self.gas_limit,
+            'gasPrice': gas_price,
+            'nonce': reg.nonce,
+            'from': self.account.address,
+        })
+        signed_tx = self.account.sign_transaction(tx)
+        tx_hash = self.w3.eth.send_raw_transaction(signed_tx.rawTransaction).hex()
+        reg.gas_price = gas_price
+        reg.tx_hashes.append(tx_hash)
+        reg.tx_hash = tx_hash
+        reg.submitted_at = time.monotonic()
+        if reg.first_sent_at is None:
+            reg.first_sent_at = reg.submitted_at
+        return tx_hash
+
+    @timed("tx_submit")
+    def submit(self, vc_hash, score: int, timestamp: int = None) -> Registration:
+        """
+        Sign and broadcast a registration; returns immediately with its status record.
+        Send errors are recorded on the record (status "failed") rather than raised.
+        A VC hash that is already pending, in flight or confirmed here is not sent
+        again: its existing record is returned (only a failed one is retried).
+        """
+        reg = Registration(normalize_vc_hash(vc_hash), score, timestamp or int(time.time()))
+        with self._lock:
+            existing = self._registrations.get(reg.vc_hash)
+            if existing is not None and existing.status != FAILED:
+                return existing
+            self._registrations[reg.vc_hash] = reg
+
+        if self.chain_id is None:
+            self.chain_id = self.w3.eth.chain_id
+        gas_price = int(self.w3.eth.gas_price * self.gas_price_multiplier)
+
+        # Sends are serialized so the node always sees nonces in order and a failed
+        # send can hand its nonce back before anyone allocates past it.
+        with self._send_lock:
+            for attempt in range(2):
+                reg.nonce = self.nonces.allocate()
+                try:
+                    self._sign_and_send(reg, gas_price)
+                    break
+                except Exception as e:
+                    # Another process used this account, or the node rejected the tx.
+                    self.nonces.resync()
+                    if attempt == 1 or "nonce" not in str(e).lower():
+                        reg.status = FAILED
+                        reg.error = str(e)
+                        reg.done.set()
+                        return reg
+
+        reg.status = SUBMITTED
+        with self._lock:
+            self._in_flight.add(reg.vc_hash)
+        self._wake.set()
+        return reg
+
+    def submit_many(self, items) -> list:
+        """Submit `(vc_hash, score)` pairs back-to-back without waiting for receipts."""
+        return [self.submit(vc_hash, score) for vc_hash, score in items]
+
+    # --- status -----------------------------------------------------------
+
+    def status(self, vc_hash):
+        """Return the `Registration` for a VC hash, or None if it was never submitted here."""
+        with self._lock:
+            return self._registrations.get(normalize_vc_hash(vc_hash))
+
+    def wait(self, vc_hash, timeout: float = None) -> Registration:
+        """Block until the registration is confirmed or failed (or `timeout` elapses)."""
+        reg = self.status(vc_hash)
+        if reg is not None:
+            reg.done.wait(timeout)
+        return reg
+
+    def stop(self):
+        self._stopped = True
+        self._wake.set()
+        self._tracker.join(timeout=5)
+
+    # --- background receipt tracking ----------------------------------------
+
+    def _track(self):
+        while not self._stopped:
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            with self._lock:
+                in_flight = [self._registrations[h] for h in self._in_flight]
+            for reg in in_flight:
+                try:
+                    self._check(reg)
+                except Exception as e:
+                    logger.warning("⚠️ Receipt check failed for %s: %s", reg.vc_hash, e)
+
+    def _finish(self, reg: Registration, status: str):
+        if reg.first_sent_at is not None:
+            observe_stage("receipt_wait", time.monotonic() - reg.first_sent_at)
+        reg.status = status
+        with self._lock:
+            self._in_flight.discard(reg.vc_hash)
+        reg.done.set()
+
+    def _check(self, reg: Registration):
+        for tx_hash in reversed(reg.tx_hashes):
+            try:
+                receipt = self.w3.eth.get_transaction_receipt(tx_hash)
+            except TransactionNotFound:
+                continue
+            reg.tx_hash = tx_hash
+            reg.block_number = receipt["blockNumber"]
+            if receipt["status"] != 1:
+                reg.error = "transaction reverted"
+            self._finish(reg, CONFIRMED if receipt["status"] == 1 else FAILED)
+            return
+
+        if time.monotonic() - reg.submitted_at < self.stuck_after:
+            return
+        if reg.replacements >= self.max_replacements:
+            reg.error = f"not mined after {reg.replacements} replacements"
+            self._finish(reg, FAILED)
+            return
+
+        gas_price = max(int(reg.gas_price * REPLACEMENT_BUMP), int(self.w3.eth.gas_price * self.gas_price_multiplier))
+        reg.replacements += 1
+        try:
+            with self._send_lock:
+                self._sign_and_send(reg, gas_price)
+        except Exception as e:
+            # "nonce too low" usually means an earlier attempt was mined; the next poll finds its receipt.
+            reg.submitted_at = time.monotonic()
+            if "nonce" not in str(e).lower():
+                logger.warning("⚠️ Could not replace stuck tx for %s: %s", reg.vc_hash, e)
+
+
+_services = {}
+_services_lock = threading.Lock()
+
+
+def get_registration_service(w3, contract, private_key, **kwargs) -> RegistrationService:
+    """
+    Process-wide service per (account, contract), so every session shares one nonce
+    sequence and one receipt tracker (Streamlit reruns reuse it too).
+    """
+    key = (w3.eth.account.from_key(private_key).address, contract.address)
+    with _services_lock:
+        if key not in _services:
+            _services[key] = RegistrationService(w3, contract, private_key, **kwargs)
+        return _services[key]
@@ -1,33 +1,192 @@
 # visualizer.py
 
-import matplotlib.pyplot as plt
+"""
+Chart rendering for the UIs.
 
-def visualize_wallet_analysis(tx_count, unique_contracts, risk_level):
+Both charts are drawn on prebuilt figure templates (layout computed once;
+each render only updates bar heights, labels and the title) and the encoded
+images are memoized in an LRU cache, so repeated inputs cost a dict lookup.
+Standalone Figures are used instead of pyplot, whose global state is shared
+between concurrent Streamlit sessions. matplotlib is imported when the first
+template is built (or by `warm_up`), not when this module is imported.
+
+`fmt` selects the output: "png" (default), "svg", or "spec" for a
+Vega-Lite dict that the browser renders (`st.vega_lite_chart`).
+"""
+
+import io
+import os
+import threading
+
+from cache import LRUCache
+from metrics import timed
+
+CHART_CACHE_SIZE = int(os.getenv("CHART_CACHE_SIZE", "512"))
+
+chart_cache = LRUCache(max_entries=CHART_CACHE_SIZE)
+
+
+def _encode(fig, fmt):
+    buf = io.BytesIO()
+    fig.savefig(buf, format=fmt)
+    return buf.getvalue()
+
+
+class _ActivityChart:
+    """Prebuilt "Transactions / Unique Contracts" bar chart."""
+
+    def __init__(self):
+        from matplotlib.figure import Figure
+        self.lock = threading.Lock()
+        self.fig = Figure(figsize=(5, 3.5))
+        ax = self.ax = self.fig.subplots()
+        self.bars = ax.bar(["Transactions", "Unique Contracts"], [0, 0], color=["skyblue", "lightgreen"],
+                           width=0.4, edgecolor="black")
+        self.labels = [ax.annotate("0",
+                                   xy=(bar.get_x() + bar.get_width() / 2, 0),
+                                   xytext=(0, 3),
+                                   textcoords="offset points",
+                                   ha='center', va='bottom',
+                                   fontsize=10)
+                       for bar in self.bars]
+        ax.set_title("Wallet Activity Overview (Risk: MEDIUM)")
+        ax.set_ylabel("Count")
+        ax.grid(axis="y", linestyle="--", alpha=0.6)
+        # Lay out once with wide tick labels so six-digit counts still fit
+        ax.set_ylim(0, 999_999)
+        self.fig.tight_layout()
+
+    def render(self, tx_count, unique_contracts, risk_level, fmt):
+        with self.lock:
+            values = [tx_count, unique_contracts]
+            for bar, label, value in zip(self.bars, self.labels, values):
+                bar.set_height(value)
+                label.xy = (bar.get_x() + bar.get_width() / 2, value)
+                label.set_text(f"{int(value)}")
+            self.ax.set_ylim(0, max(values) + 5)
+            self.ax.set_title(f"Wallet Activity Overview (Risk: {risk_level.upper()})")
+            return _encode(self.fig, fmt)
+
+
+class _ScoreChart:
+    """Prebuilt single "Trust Score" bar on a 0-100 axis."""
+
+    def __init__(self):
+        from matplotlib.figure import Figure
+        self.lock = threading.Lock()
+        self.fig = Figure()
+        self.ax = self.fig.subplots()
+        self.bars = self.ax.bar(["Trust Score"], [0])
+        self.ax.set_ylim(0, 100)
+        # Same placement and "%g" text as `ax.bar_label`, but updatable in place
+        bar = self.bars[0]
+        self.label = self.ax.annotate("0", xy=(bar.get_x() + bar.get_width() / 2, 0), xytext=(0, 0),
+                                      textcoords="offset points", ha="center", va="bottom")
+
+    def render(self, score, color, fmt):
+        with self.lock:
+            bar = self.bars[0]
+            bar.set_height(score)
+            bar.set_color(color)
+            self.label.xy = (bar.get_x() + bar.get_width() / 2, score)
+            self.label.set_text(f"{score:g}")
+            return _encode(self.fig, fmt)
+
+
+_templates = {}
+_templates_lock = threading.Lock()
+
+
+def _template(cls):
+    with _templates_lock:
+        if cls not in _templates:
+            _templates[cls] = cls()
+        return _templates[cls]
+
+
+def warm_up():
+    """Import matplotlib and build both templates ahead of the first render."""
+    _template(_ActivityChart)
+    _template(_ScoreChart)
+
+
+def wallet_analysis_spec(tx_count, unique_contracts, risk_level):
+    """Vega-Lite spec of the activity chart (a few hundred bytes, rendered client-side)."""
+    return {
+        "$schema": "https://vega.github.io/schema/vega-lite/v5.json",
+        "title": f"Wallet Activity Overview (Risk: {risk_level.upper()})",
+        "data": {"values": [
+            {"label": "Transactions", "count": tx_count, "color": "skyblue"},
+            {"label": "Unique Contracts", "count": unique_contracts, "color": "lightgreen"},
+        ]},
+        "layer": [
+            {"mark": {"type": "bar", "stroke": "black"},
+             "encoding": {"color": {"field": "color", "type": "nominal", "scale": None}}},
+            {"mark": {"type": "text", "dy": -8}, "encoding": {"text": {"field": "count"}}},
+        ],
+        "encoding": {
+            "x": {"field": "label", "type": "nominal", "title": None, "sort": None},
+            "y": {"field": "count", "type": "quantitative", "title": "Count"},
+        },
+    }
+
+
+def score_chart_spec(score, color):
+    """Vega-Lite spec of the trust-score bar."""
+    return {
+        "$schema": "https://vega.github.io/schema/vega-lite/v5.json",
+        "data": {"values": [{"label": "Trust Score", "score": score}]},
+        "layer": [
+            {"mark": {"type": "bar", "color": color}},
+            {"mark": {"type": "text", "dy": -8}, "encoding": {"text": {"field": "score"}}},
+        ],
+        "encoding": {
+            "x": {"field": "label", "type": "nominal", "title": None},
+            "y": {"field": "score", "type": "quantitative", "title": None, "scale": {"domain": [0, 100]}},
+        },
+    }
+
+
+@timed("chart")
+def visualize_wallet_analysis(tx_count, unique_contracts, risk_level, fmt="png"):
     """
     Creates a bar chart to visualize wallet's on-chain behavior.
-    Saves the figure as 'wallet_analysis.png'.
+
+    Args:
+        tx_count (int): Transactions.
+        unique_contracts (int): Unique contracts interacted with.
+        risk_level (str): "low" | "medium" | "high".
+        fmt (str): "png", "svg" or "spec".
+
+    Returns:
+        bytes (png/svg) or dict (Vega-Lite spec). Nothing is written to disk.
+    """
+    if fmt == "spec":
+        return wallet_analysis_spec(tx_count, unique_contracts, risk_level)
+    key = ("activity", int(tx_count), int(unique_contracts), risk_level, fmt)
+    image = chart_cache.get(key)
+    if image is None:
+        image = _template(_ActivityChart).render(int(tx_count), int(unique_contracts), risk_level, fmt)
+        chart_cache.set(key, image)
+    return image
+
+
+@timed("chart")
+def render_score_chart(score, color, fmt="png"):
+    """
+    Single-bar trust score chart (0-100).
+
+    Scores are bucketed to one decimal, which is also the label precision.
+
+    Returns:
+        bytes (png/svg) or dict (Vega-Lite spec).
     """
-    labels = ["Transactions", "Unique Contracts"]
-    values = [tx_count, unique_contracts]
-    colors = ["skyblue", "lightgreen"]
-
-    fig, ax = plt.subplots(figsize=(5, 3.5))
-    bars = ax.bar(labels, values, color=colors, width=0.4, edgecolor="black")
-
-    for bar in bars:
-        height = bar.get_height()
-        ax.annotate(f"{int(height)}",
-                    xy=(bar.get_x() + bar.get_width() / 2, height),
-                    xytext=(0, 3),
-                    textcoords="offset points",
-                    ha='center', va='bottom',
-                    fontsize=10)
-
-    ax.set_ylim(0, max(values) + 5)
-    ax.set_title(f"Wallet Activity Overview (Risk: {risk_level.upper()})")
-    ax.set_ylabel("Count")
-    ax.grid(axis="y", linestyle="--", alpha=0.6)
-
-    plt.tight_layout()
-    plt.savefig("wallet_analysis.png")
-    plt.close()
+    score = round(float(score), 1)
+    if fmt == "spec":
+        return score_chart_spec(score, color)
+    key = ("score", score, color, fmt)
+    image = chart_cache.get(key)
+    if image is None:
+        image = _template(_ScoreChart).render(score, color, fmt)
+        chart_cache.set(key, image)
+    return image
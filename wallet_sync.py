@@ -0,0 +1,356 @@
+# wallet_sync.py
+
+"""
+Per-wallet aggregate store for incremental Etherscan syncing.
+
+Instead of downloading a wallet's full history on every evaluation we keep a
+running aggregate (last seen block, tx count, interacted contracts, risky flag)
+and only ask Etherscan for blocks after the cursor. Pages are requested with
+`sort=asc`; when a page comes back full the next request restarts at the last
+block seen (which may be only partially returned) and de-duplicates by tx hash,
+so wallets beyond Etherscan's 10k-result window are synced correctly.
+
+One aggregate is kept per Etherscan list action (`ACTION_SPECS`: normal,
+internal, ERC-20 and NFT transfers); `merge_features` combines a wallet's
+aggregates into the single feature record the scorer reads.
+
+Only rows the wallet sent (`from` == wallet) add interacted counterparties:
+anyone can airdrop a token or NFT to any address, so inbound transfers must
+not earn contract points or trip the risky-contract penalty. Senders of
+inbound rows are kept in a separate `inbound` set the scorer does not read.
+
+Pages may be any iterable of tx dicts (only `fields_for(action)` are read), so
+a streamed page is folded in while it is still downloading. Counterparties
+are kept as a `CompactAddressSet` (sorted 20-byte keys) and stored as that raw
+buffer; rows written as JSON hex lists still load. The store also keeps a
+counterparty -> wallet index (`wallet_counterparties`), so the wallets that
+sent to a newly listed risky contract are found with one indexed query
+instead of decoding every stored aggregate.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+from address_index import CompactAddressSet, address_to_bytes
+
+ETHERSCAN_MAX_WINDOW = 10_000
+
+# count_key: feature name of the row count
+# id_fields: identify a row (one tx can emit several token transfers or internal calls)
+# counterparty_fields: addresses the wallet interacted with, read from rows it sent (`from` == wallet)
+ActionSpec = namedtuple("ActionSpec", ["count_key", "id_fields", "counterparty_fields"])
+ACTION_SPECS = {
+    "txlist": ActionSpec("tx_count", ("hash",), ("to",)),
+    "txlistinternal": ActionSpec("internal_tx_count", ("hash", "traceId"), ("to",)),
+    "tokentx": ActionSpec("token_transfer_count", ("hash", "logIndex"), ("to", "contractAddress")),
+    "tokennfttx": ActionSpec("nft_transfer_count", ("hash", "logIndex"), ("to", "contractAddress")),
+}
+ACTIONS = tuple(ACTION_SPECS)
+
+
+def fields_for(action: str) -> tuple:
+    """The only fields the aggregate reads from an `action` row."""
+    spec = ACTION_SPECS[action]
+    return tuple(dict.fromkeys(("blockNumber", "from") + spec.id_fields + spec.counterparty_fields))
+
+
+TX_FIELDS = fields_for("txlist")
+
+logger = logging.getLogger(__name__)
+
+
+class WalletAggregate:
+    """Running totals for one (wallet, Etherscan action) pair."""
+
+    def __init__(self, address, action="txlist", last_block=-1, tx_count=0, contracts=None,
+                 risky=False, boundary_hashes=None, updated_at=None, first_block=-1, inbound=None):
+        self.address = address
+        self.action = action
+        self.first_block = first_block
+        self.last_block = last_block
+        self.tx_count = tx_count
+        if isinstance(contracts, CompactAddressSet):
+            self.contracts = contracts
+        elif isinstance(contracts, (bytes, bytearray)):
+            self.contracts = CompactAddressSet.from_bytes(contracts)
+        else:
+            self.contracts = CompactAddressSet(contracts or ())
+        # senders of rows the wallet received (spam drops included); not a scoring input
+        if isinstance(inbound, (bytes, bytearray)):
+            self.inbound = CompactAddressSet.from_bytes(inbound)
+        else:
+            self.inbound = inbound if isinstance(inbound, CompactAddressSet) else CompactAddressSet(inbound or ())
+        self.risky = risky
+        # ids of the rows already counted in `last_block`, used to de-duplicate page overlaps
+        self.boundary_hashes = set(boundary_hashes or ())
+        self.updated_at = updated_at
+        # counterparties added since load, written to the store's reverse index on save
+        self.new_contracts = set()
+
+    def apply(self, txs) -> int:
+        """Fold a page of ascending txs into the aggregate. Returns how many were new."""
+        spec = ACTION_SPECS[self.action]
+        id_field = spec.id_fields[0] if len(spec.id_fields) == 1 else None
+        own = self.address.lower()
+        added = 0
+        for tx in txs:
+            block = int(tx.get("blockNumber", 0))
+            if id_field:
+                row_id = tx.get(id_field)
+            else:
+                row_id = ":".join(tx.get(f) or "" for f in spec.id_fields)
+            if block < self.last_block or (block == self.last_block and row_id in self.boundary_hashes):
+                continue
+            if block > self.last_block:
+                self.last_block = block
+                self.boundary_hashes = set()
+            if row_id:
+                self.boundary_hashes.add(row_id)
+            if self.first_block < 0:
+                self.first_block = block
+
+            self.tx_count += 1
+            added += 1
+            sender = tx.get("from")
+            if not sender or sender.lower() != own:
+                if sender:
+                    self.inbound.add(sender)
+                continue
+            for field in spec.counterparty_fields:
+                counterparty = tx.get(field)
+                if counterparty and counterparty.lower() != own:
+                    self.contracts.add(counterparty)
+                    self.new_contracts.add(counterparty)
+        return added
+
+    def summary(self, risky_contracts) -> dict:
+        self.risky = not self.contracts.isdisjoint(risky_contracts)
+        return {
+            "tx_count": self.tx_count,
+            "unique_contracts_interacted": len(self.contracts),
+            "interacted_with_risky_contract": self.risky,
+        }
+
+
+def merge_features(aggregates, risky_contracts) -> dict:
+    """
+    Combine one wallet's per-action aggregates into a single feature record.
+
+    Args:
+        aggregates (list): `WalletAggregate`s of the same wallet, one per action.
+        risky_contracts: Anything supporting `in` on 20-byte keys (e.g. an `AddressIndex`).
+
+    Returns:
+        dict: a row count per action (`tx_count`, `internal_tx_count`, ...; 0 for
+        actions not given), first/last activity block (None without activity),
+        distinct counterparties of rows the wallet sent across all actions (also
+        reported as `unique_contracts_interacted`, the scorer's input), the number
+        of them that are risky, `interacted_with_risky_contract`, and
+        `unique_inbound_counterparties` (senders of received rows; informational).
+    """
+    features = {spec.count_key: 0 for spec in ACTION_SPECS.values()}
+    for agg in aggregates:
+        features[ACTION_SPECS[agg.action].count_key] = agg.tx_count
+    active = [agg for agg in aggregates if agg.tx_count]
+    counterparties = CompactAddressSet.union_all([agg.contracts for agg in aggregates])
+    risky_hits = sum(1 for key in counterparties.keys() if key in risky_contracts)
+    for agg in aggregates:
+        agg.risky = bool(risky_hits) and not agg.contracts.isdisjoint(risky_contracts)
+    features.update({
+        "first_activity_block": min((agg.first_block for agg in active), default=None),
+        "last_activity_block": max((agg.last_block for agg in active), default=None),
+        "unique_counterparties": len(counterparties),
+        "unique_contracts_interacted": len(counterparties),
+        "unique_inbound_counterparties": len(CompactAddressSet.union_all([agg.inbound for agg in aggregates])),
+        "risky_contract_hits": risky_hits,
+        "interacted_with_risky_contract": risky_hits > 0,
+    })
+    return features
+
+
+class WalletSyncStore:
+    """SQLite-backed persistence for `WalletAggregate` rows."""
+
+    CHUNK = 500  # stays under SQLite's bound-parameter limit
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS wallet_sync (
+                address TEXT NOT NULL,
+                action TEXT NOT NULL,
+                first_block INTEGER,
+                inbound BLOB,
+                last_block INTEGER NOT NULL,
+                tx_count INTEGER NOT NULL,
+                contracts BLOB NOT NULL,
+                risky INTEGER NOT NULL,
+                boundary_hashes TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (address, action)
+            )
+        """)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(wallet_sync)")}
+        if "first_block" not in columns:
+            # NULL marks rows synced before the first block was tracked
+            self._conn.execute("ALTER TABLE wallet_sync ADD COLUMN first_block INTEGER")
+        if "inbound" not in columns:
+            # NULL marks rows synced when inbound transfers still counted as interactions
+            self._conn.execute("ALTER TABLE wallet_sync ADD COLUMN inbound BLOB")
+        indexed = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'wallet_counterparties'"
+        ).fetchone()
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS wallet_counterparties (
+                counterparty BLOB NOT NULL,
+                address TEXT NOT NULL,
+                PRIMARY KEY (counterparty, address)
+            ) WITHOUT ROWID
+        """)
+        if not indexed:
+            self._index_stored_counterparties()
+        self._conn.commit()
+
+    def _index_stored_counterparties(self):
+        """One-time backfill of the reverse index from aggregates saved before it existed."""
+        rows = 0
+        for address, contracts in self._conn.execute("SELECT address, contracts FROM wallet_sync").fetchall():
+            if isinstance(contracts, str):
+                contracts = json.loads(contracts)
+            keys = WalletAggregate(address, contracts=contracts).contracts.keys()
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO wallet_counterparties (counterparty, address) VALUES (?, ?)",
+                ((key, address) for key in keys),
+            )
+            rows += 1
+        if rows:
+            logger.info("🗂️ Indexed counterparties of %d stored aggregates", rows)
+
+    def load(self, address: str, action: str = "txlist") -> WalletAggregate:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT first_block, last_block, tx_count, contracts, risky, boundary_hashes, updated_at, inbound "
+                "FROM wallet_sync WHERE address = ? AND action = ?",
+                (address, action),
+            ).fetchone()
+        if row is None:
+            return WalletAggregate(address, action)
+        first_block, last_block, tx_count, contracts, risky, boundary_hashes, updated_at, inbound = row
+        if first_block is None or inbound is None:
+            # Synced before first blocks (or the direction of each row) were tracked: start over once
+            logger.info("🔁 Re-syncing %s %s from block 0", address, action)
+            return WalletAggregate(address, action)
+        if isinstance(contracts, str):  # rows written before contracts were stored as binary keys
+            contracts = json.loads(contracts)
+        return WalletAggregate(address, action, last_block, tx_count, contracts,
+                               bool(risky), json.loads(boundary_hashes), updated_at, first_block, inbound)
+
+    def save(self, agg: WalletAggregate):
+        agg.updated_at = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO wallet_sync "
+                "(address, action, first_block, last_block, tx_count, contracts, risky, boundary_hashes, "
+                "updated_at, inbound) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (agg.address, agg.action, agg.first_block, agg.last_block, agg.tx_count, agg.contracts.to_bytes(),
+                 int(agg.risky), json.dumps(sorted(agg.boundary_hashes)), agg.updated_at, agg.inbound.to_bytes()),
+            )
+            if agg.new_contracts:
+                keys = {address_to_bytes(c) for c in agg.new_contracts} - {None}
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO wallet_counterparties (counterparty, address) VALUES (?, ?)",
+                    ((key, agg.address) for key in keys),
+                )
+            self._conn.commit()
+        agg.new_contracts = set()
+
+    def reset(self, address: str, action: str = None):
+        """Forget a wallet's cursor so the next sync starts from block 0."""
+        with self._lock:
+            if action is None:
+                self._conn.execute("DELETE FROM wallet_sync WHERE address = ?", (address,))
+                self._conn.execute("DELETE FROM wallet_counterparties WHERE address = ?", (address,))
+            else:
+                self._conn.execute("DELETE FROM wallet_sync WHERE address = ? AND action = ?", (address, action))
+            self._conn.commit()
+
+    def wallets_with_counterparties(self, keys) -> set:
+        """
+        Wallets whose stored aggregates sent to any of `keys` (20-byte counterparty keys).
+
+        A per-action `reset` leaves the wallet's index rows in place, so the result
+        may include a wallet that no longer lists the counterparty; never one that does.
+        """
+        keys = list(keys)
+        wallets = set()
+        with self._lock:
+            for start in range(0, len(keys), self.CHUNK):
+                chunk = keys[start:start + self.CHUNK]
+                rows = self._conn.execute(
+                    "SELECT DISTINCT address FROM wallet_counterparties "
+                    f"WHERE counterparty IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                )
+                wallets.update(address for (address,) in rows)
+        return wallets
+
+
+class _PageTally:
+    """Pass a page through while counting it and remembering its last block."""
+
+    def __init__(self, txs, startblock: int):
+        self.txs = txs
+        self.count = 0
+        self.last_block = startblock
+
+    def __iter__(self):
+        for tx in self.txs:
+            self.count += 1
+            self.last_block = int(tx.get("blockNumber", self.last_block))
+            yield tx
+
+
+def sync_wallet(agg: WalletAggregate, fetch_page, page_size: int = ETHERSCAN_MAX_WINDOW) -> bool:
+    """
+    Advance `agg` to the chain head by fetching only blocks after its cursor.
+
+    Args:
+        agg (WalletAggregate): Aggregate to update in place.
+        fetch_page (callable): `fetch_page(address, startblock, page_size)` returning an
+            ascending iterable of txs (a list or a stream), or None on error.
+        page_size (int): Results per request (Etherscan caps a window at 10k).
+
+    Returns:
+        bool: True if the sync reached the end of the history, False if a page failed
+        (the aggregate still holds everything fetched before the failure).
+    """
+    startblock = agg.last_block if agg.boundary_hashes else agg.last_block + 1
+    while True:
+        txs = fetch_page(agg.address, startblock, page_size)
+        if txs is None:
+            return False
+        page = _PageTally(txs, startblock)
+        agg.apply(page)
+        logger.debug("📡 Etherscan %s: %d txs from block %s", agg.action, page.count, startblock)
+        if page.count < page_size:
+            return True
+
+        next_start = page.last_block
+        if next_start <= startblock:
+            # A single block holds a full window of txs; skip past it rather than loop forever.
+            logger.warning("⚠️ Block %s has more than %d txs for %s; some were skipped",
+                           startblock, page_size, agg.address)
+            next_start = startblock + 1
+            agg.boundary_hashes = set()
+        startblock = next_start
@@ -0,0 +1,397 @@
+# watchlist.py
+
+"""
+Block-driven re-scoring of a watchlist of wallets.
+
+Instead of re-running `get_wallet_data` for every wallet on a timer, the
+service follows new blocks on a node (WATCHLIST_RPC_URL) and re-scores only
+the wallets that changed:
+
+- activity: each new block range costs one JSON-RPC batch of
+  `eth_getBlockByNumber` (full txs) plus one `eth_getLogs` for the ERC-20 /
+  ERC-721 `Transfer` topic. Every tx sender/recipient and transfer party is
+  looked up in a set of watched addresses, so the work per block follows the
+  block's size and the number of changed wallets, not the watchlist's.
+  (Internal txs need traces and are picked up at the wallet's next re-score.)
+- risky contracts: when the risky-contract list changes, the newly listed
+  addresses are looked up in the sync store's counterparty -> wallet index
+  (wallet_sync), once per list change; the cost follows the number of newly
+  listed addresses, not the watchlist's size.
+
+Changed wallets go into a priority queue (risky hits first, then by block)
+and are re-scored through `evaluator.evaluate_wallet` at a rate that leaves
+the rest of the Etherscan key budget to interactive traffic
+(WATCHLIST_RATE_SHARE of it; one re-score costs one request per
+FEATURE_ACTIONS endpoint). Each re-score whose score or risk level differs
+from the last one seen emits a score-change event to the `subscribe`d callbacks.
+
+    python watchlist.py wallets.txt --rpc-url http://127.0.0.1:8545 --events events.jsonl
+
+WATCHLIST_CONFIRMATIONS holds blocks back a little so Etherscan has indexed
+them by the time the wallet is re-scored.
+"""
+
+import argparse
+import heapq
+import itertools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+from address_index import CompactAddressSet
+from etherscan_client import TokenBucket, get_client
+from evaluator import evaluate_wallet
+from fetch_onchain import (FEATURE_ACTIONS, invalidate_wallet_data, load_risky_contracts, normalize_address,
+                           sync_store)
+from logging_config import configure_logging
+from metrics import REGISTRY, start_exporter
+from rpc_batch import BatchRPCClient, JSONRPCError
+
+load_dotenv()
+WATCHLIST_RPC_URL = os.getenv("WATCHLIST_RPC_URL")
+WATCHLIST_POLL_INTERVAL = float(os.getenv("WATCHLIST_POLL_INTERVAL", "6"))
+WATCHLIST_CONFIRMATIONS = int(os.getenv("WATCHLIST_CONFIRMATIONS", "2"))
+WATCHLIST_MAX_BLOCKS = int(os.getenv("WATCHLIST_MAX_BLOCKS", "50"))
+WATCHLIST_WORKERS = int(os.getenv("WATCHLIST_WORKERS", "4"))
+WATCHLIST_RATE_SHARE = float(os.getenv("WATCHLIST_RATE_SHARE", "0.5"))
+
+# Transfer(address,address,uint256): ERC-20 transfers and ERC-721 transfers share the topic
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+PRIORITY_RISKY = 0
+PRIORITY_ACTIVITY = 1
+
+BLOCKS = REGISTRY.counter("trust_watchlist_blocks_total", "Blocks scanned for watched wallets.")
+RESCORES = REGISTRY.counter("trust_watchlist_rescores_total", "Watchlist re-scores by trigger and outcome.",
+                            ("reason", "outcome"))
+SCORE_CHANGES = REGISTRY.counter("trust_watchlist_score_changes_total", "Score-change events emitted.")
+
+logger = logging.getLogger(__name__)
+
+
+def _quantity(value) -> int:
+    """A JSON-RPC quantity ("0x1b4"); some node stand-ins return plain integers."""
+    return value if isinstance(value, int) else int(value, 16)
+
+
+def _topic_address(topic: str) -> str:
+    return "0x" + topic[-40:].lower()
+
+
+class WatchlistService:
+    """
+    Follow new blocks and re-score the watched wallets they touch.
+
+    Args:
+        wallets (iterable): Wallet addresses to watch.
+        rpc_url (str): Node JSON-RPC endpoint (default WATCHLIST_RPC_URL).
+        evaluate (callable): Per-wallet evaluation returning at least `score` and `risk_level`.
+        scores (dict): Known wallet → score, so the first re-score only emits an event on change.
+        rate (float): Re-scores per second (default: WATCHLIST_RATE_SHARE of the Etherscan
+            client's total rate, divided by the requests one re-score makes).
+        workers (int): Re-scores running at once.
+        poll_interval (float): Seconds between head checks.
+        confirmations (int): Blocks held back from the head.
+        max_blocks (int): Most blocks scanned per poll (a backlog is worked off over several).
+        start_block (int): First block to scan (default: the head when the service starts).
+    """
+
+    def __init__(self, wallets=(), rpc_url: str = None, evaluate=evaluate_wallet, scores: dict = None,
+                 rate: float = None, workers: int = WATCHLIST_WORKERS,
+                 poll_interval: float = WATCHLIST_POLL_INTERVAL, confirmations: int = WATCHLIST_CONFIRMATIONS,
+                 max_blocks: int = WATCHLIST_MAX_BLOCKS, start_block: int = None):
+        rpc_url = rpc_url or WATCHLIST_RPC_URL
+        if not rpc_url:
+            raise ValueError("no RPC endpoint: set WATCHLIST_RPC_URL or pass rpc_url")
+        self.rpc = BatchRPCClient(rpc_url, max_batch=max_blocks)
+        self.evaluate = evaluate
+        self.watched = {normalize_address(w) for w in wallets}
+        self.scores = {normalize_address(w): s for w, s in (scores or {}).items()}
+        self.risk_levels = {}
+        self.poll_interval = poll_interval
+        self.confirmations = confirmations
+        self.max_blocks = max_blocks
+        self.last_block = start_block - 1 if start_block is not None else None
+        self.head = None
+        self.listeners = []
+
+        if rate is None:
+            client = get_client()
+            rate = sum(b.rate for b in client.buckets.values()) * WATCHLIST_RATE_SHARE / len(FEATURE_ACTIONS)
+        self.budget = TokenBucket(rate, capacity=max(1.0, rate))
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="watchlist")
+
+        self.risky = load_risky_contracts()
+        self._risky_version = None
+        self._risky_keys = None
+
+        self._queue = []  # (priority, block, seq, wallet); stale entries are skipped when popped
+        self._queued = {}  # wallet → (priority, block, reason) of its live entry
+        self._in_flight = set()
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._threads = []
+
+    # --- watchlist ------------------------------------------------------------------
+
+    def add(self, wallet_address):
+        with self._cond:
+            self.watched.add(normalize_address(wallet_address))
+
+    def remove(self, wallet_address):
+        address = normalize_address(wallet_address)
+        with self._cond:
+            self.watched.discard(address)
+            self._queued.pop(address, None)
+
+    def subscribe(self, callback):
+        """Call `callback(event)` for every score-change event (from a worker thread)."""
+        self.listeners.append(callback)
+
+    # --- detection ------------------------------------------------------------------
+
+    def _head(self) -> int:
+        return _quantity(self.rpc.call("eth_blockNumber", [])) - self.confirmations
+
+    def poll_once(self) -> int:
+        """
+        Scan the blocks since the last poll (at most `max_blocks`) and queue the watched
+        wallets they touch. Returns how many wallets were queued.
+
+        Raises:
+            JSONRPCError: the node could not be read (the range is retried next poll).
+        """
+        head = self.head = self._head()
+        if self.last_block is None:
+            self.last_block = head
+            logger.info("👀 Watching %d wallets from block %d", len(self.watched), head + 1)
+            return 0
+        if head <= self.last_block:
+            return 0
+        start, end = self.last_block + 1, min(head, self.last_block + self.max_blocks)
+
+        blocks = self.rpc.batch([("eth_getBlockByNumber", [hex(n), True]) for n in range(start, end + 1)])
+        logs = self.rpc.call("eth_getLogs", [{"fromBlock": hex(start), "toBlock": hex(end),
+                                              "topics": [TRANSFER_TOPIC]}])
+        touched = {}
+        for block in blocks:
+            if isinstance(block, JSONRPCError) or block is None:
+                raise block or JSONRPCError("block not found")
+            number = _quantity(block["number"])
+            for tx in block.get("transactions") or ():
+                for party in (tx.get("from"), tx.get("to")):
+                    if party and party.lower() in self.watched:
+                        touched[party.lower()] = number
+        for log in logs or ():
+            topics = log.get("topics") or []
+            for topic in topics[1:3]:
+                party = _topic_address(topic)
+                if party in self.watched:
+                    touched[party] = _quantity(log["blockNumber"])
+
+        self.last_block = end
+        BLOCKS.inc(end - start + 1)
+        for wallet, number in touched.items():
+            self.enqueue(wallet, PRIORITY_ACTIVITY, "activity", number)
+        if touched:
+            logger.info("📦 Blocks %d-%d: %d watched wallets active", start, end, len(touched))
+        return len(touched)
+
+    def check_risky_list(self) -> int:
+        """
+        Queue watched wallets whose stored counterparties include newly listed risky
+        contracts. Returns how many were queued (0 unless the list changed).
+        """
+        index = self.risky.current()
+        if self.risky.version == self._risky_version:
+            return 0
+        current = CompactAddressSet.from_bytes(b"".join(index.keys()))
+        previous, self._risky_keys, self._risky_version = self._risky_keys, current, self.risky.version
+        if previous is None:
+            return 0
+        added = current - previous
+        if not added:
+            return 0
+
+        hits = 0
+        for wallet in sync_store.wallets_with_counterparties(added.keys()):
+            if wallet in self.watched:
+                self.enqueue(wallet, PRIORITY_RISKY, "risky_listed", self.last_block)
+                hits += 1
+        logger.info("☣️ %d risky contracts listed; %d watched wallets interacted with them", len(added), hits)
+        return hits
+
+    # --- scheduling -----------------------------------------------------------------
+
+    def enqueue(self, wallet_address, priority: int = PRIORITY_ACTIVITY, reason: str = "manual", block: int = None):
+        """Queue a re-score; a wallet already queued keeps its most urgent entry."""
+        wallet = normalize_address(wallet_address)
+        block = block if block is not None else -1
+        with self._cond:
+            current = self._queued.get(wallet)
+            if current is not None and current[:2] <= (priority, block):
+                return
+            self._queued[wallet] = (priority, block, reason)
+            heapq.heappush(self._queue, (priority, block, next(self._seq), wallet))
+            self._cond.notify()
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._queued)
+
+    def _next(self):
+        """Pop the most urgent live entry that is not already being re-scored, or None."""
+        deferred, found = [], None
+        while self._queue:
+            entry = heapq.heappop(self._queue)
+            priority, block, _, wallet = entry
+            live = self._queued.get(wallet)
+            if live is None or live[:2] != (priority, block):
+                continue  # superseded or removed
+            if wallet in self._in_flight:
+                deferred.append(entry)  # re-scored again once the running one finishes
+                continue
+            found = (wallet, self._queued.pop(wallet)[2], block)
+            break
+        for entry in deferred:
+            heapq.heappush(self._queue, entry)
+        return found
+
+    def _dispatch_loop(self):
+        while not self._stop.is_set():
+            with self._cond:
+                item = self._next()
+                if item is None:
+                    self._cond.wait(timeout=1.0)
+                    continue
+                self._in_flight.add(item[0])
+            self.budget.acquire()
+            self.executor.submit(self._rescore, *item)
+
+    def _rescore(self, wallet: str, reason: str, block: int):
+        try:
+            invalidate_wallet_data(wallet)
+            result = self.evaluate(wallet)
+        except Exception as e:
+            RESCORES.inc(reason=reason, outcome="error")
+            logger.warning("⚠️ Re-scoring %s failed: %s", wallet, e)
+            return
+        finally:
+            with self._cond:
+                self._in_flight.discard(wallet)
+                self._cond.notify()
+        if result.get("degraded"):
+            # A partial score (e.g. the DID registry was down) is not a change; keep the last one
+            RESCORES.inc(reason=reason, outcome="degraded")
+            logger.warning("⚠️ Re-scoring %s was partial (%s); keeping its last score", wallet,
+                           ", ".join(result["degraded"]))
+            return
+        RESCORES.inc(reason=reason, outcome="ok")
+
+        with self._cond:
+            old_score, old_risk = self.scores.get(wallet), self.risk_levels.get(wallet)
+            self.scores[wallet], self.risk_levels[wallet] = result["score"], result["risk_level"]
+        if old_score == result["score"] and old_risk in (None, result["risk_level"]):
+            return
+        event = {
+            "type": "score_change",
+            "wallet": wallet,
+            "reason": reason,
+            "block": block if block >= 0 else None,
+            "old_score": old_score,
+            "new_score": result["score"],
+            "old_risk_level": old_risk,
+            "new_risk_level": result["risk_level"],
+            "time": time.time(),
+        }
+        SCORE_CHANGES.inc()
+        logger.info("🔔 %s: %s → %s (%s)", wallet, old_score, result["score"], reason)
+        for callback in self.listeners:
+            try:
+                callback(event)
+            except Exception as e:
+                logger.warning("⚠️ Score-change listener failed: %s", e)
+
+    # --- lifecycle ------------------------------------------------------------------
+
+    def _poll_loop(self):
+        while not self._stop.is_set():
+            try:
+                self.check_risky_list()
+                self.poll_once()
+            except JSONRPCError as e:
+                logger.warning("⚠️ Block poll failed: %s", e)
+            except Exception:
+                logger.exception("❌ Watchlist poll iteration failed")
+            else:
+                if self.last_block < self.head:
+                    continue  # still behind: scan the next range right away
+            self._stop.wait(self.poll_interval)
+
+    def start(self):
+        """Start the poller and dispatcher threads."""
+        for target, name in ((self._poll_loop, "watchlist-poll"), (self._dispatch_loop, "watchlist-dispatch")):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, wait: bool = True):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self.executor.shutdown(wait=wait, cancel_futures=not wait)
+
+
+def read_watchlist(path: str) -> list:
+    """One wallet address per line; blank lines and # comments are skipped."""
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-score watched wallets as new blocks touch them.")
+    parser.add_argument("wallets_file", help="Text file with one wallet address per line")
+    parser.add_argument("--rpc-url", default=WATCHLIST_RPC_URL, help="Node JSON-RPC endpoint")
+    parser.add_argument("--events", help="Append score-change events as JSON lines to this file (default: stdout)")
+    parser.add_argument("--poll-interval", type=float, default=WATCHLIST_POLL_INTERVAL)
+    parser.add_argument("--start-block", type=int, help="First block to scan (default: current head)")
+    parser.add_argument("--workers", type=int, default=WATCHLIST_WORKERS)
+    parser.add_argument("--rate", type=float, help="Re-scores per second (default: share of the Etherscan budget)")
+    args = parser.parse_args(argv)
+    if not args.rpc_url:
+        parser.error("set WATCHLIST_RPC_URL or pass --rpc-url")
+
+    configure_logging()
+    start_exporter()
+    out = open(args.events, "a") if args.events else sys.stdout
+    lock = threading.Lock()
+
+    def write_event(event):
+        with lock:
+            out.write(json.dumps(event) + "\n")
+            out.flush()
+
+    service = WatchlistService(read_watchlist(args.wallets_file), args.rpc_url, rate=args.rate,
+                               workers=args.workers, poll_interval=args.poll_interval, start_block=args.start_block)
+    service.subscribe(write_event)
+    service.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        service.stop(wait=False)
+    finally:
+        if args.events:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()